@@ -0,0 +1,99 @@
+"""Benchmark: vazão e latência da API HTTP (calcloc.api) com clientes concorrentes.
+
+Uso:
+    python benchmarks/bench_api.py [--clientes 32] [--requisicoes 400] [--workers-pdf 2]
+
+Sobe o servidor nesta mesma máquina (porta livre, banco temporário) e, para cada rota,
+dispara --requisicoes requisições a partir de --clientes threads, cada uma com sua
+conexão keep-alive. Os orçamentos vêm do gerador sintético de bench_pipeline.py.
+Sai com código 1 se alguma resposta não tiver o status esperado.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import Gerador  # noqa: E402
+from calcloc.api import criar_servidor  # noqa: E402
+
+
+def corpo_json(orcamento):
+    """Orçamento do gerador no formato do corpo da API."""
+    return json.dumps({
+        "cliente": orcamento["cliente"],
+        "vendedor": orcamento["vendedor"],
+        "preco_m2": orcamento["preco_m2_base"],
+        "observacao": orcamento["observacao"],
+        "itens_confeccionados": orcamento["itens_confeccionados"],
+        "itens_bobinas": orcamento["itens_bobinas"],
+    }).encode("utf-8")
+
+
+def disparar(porta, requisicoes, clientes):
+    """Executa (método, caminho, corpo, status esperado) em paralelo; retorna (tempo total, latências ms, falhas)."""
+    locais = threading.local()
+
+    def enviar(requisicao):
+        metodo, caminho, corpo, esperado = requisicao
+        if not hasattr(locais, "conexao"):
+            locais.conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+        inicio = time.perf_counter()
+        locais.conexao.request(metodo, caminho, body=corpo, headers={"Content-Type": "application/json"})
+        resposta = locais.conexao.getresponse()
+        resposta.read()
+        return (time.perf_counter() - inicio) * 1000, resposta.status == esperado
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        resultados = list(executor.map(enviar, requisicoes))
+    return time.perf_counter() - inicio, sorted(r[0] for r in resultados), sum(not r[1] for r in resultados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--requisicoes", type=int, default=400)
+    parser.add_argument("--workers-pdf", type=int, default=None)
+    args = parser.parse_args()
+
+    gerador = Gerador()
+    n = args.requisicoes
+    with tempfile.TemporaryDirectory() as tmp:
+        servidor = criar_servidor(porta=0, banco=os.path.join(tmp, "orcamentos.db"), workers_pdf=args.workers_pdf, silencioso=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        porta = servidor.server_address[1]
+        try:
+            corpos = [corpo_json(gerador.orcamento()) for _ in range(n)]
+            rodadas = {
+                "POST /precificar": [("POST", "/precificar", c, 200) for c in corpos],
+                "POST /orcamentos": [("POST", "/orcamentos", c, 201) for c in corpos],
+                "GET /orcamentos/<id>": [("GET", f"/orcamentos/{i}", None, 200) for i in range(1, n + 1)],
+                "POST /pdf": [("POST", "/pdf", c, 200) for c in corpos],
+                "GET /orcamentos/<id>/pdf": [("GET", f"/orcamentos/{i}/pdf", None, 200) for i in range(1, n + 1)],
+                "GET /orcamentos/<id>/pdf (cache)": [("GET", f"/orcamentos/{i}/pdf", None, 200) for i in range(1, n + 1)],
+            }
+            print(f"{args.clientes} clientes, {n} requisições por rota")
+            print(f"{'rota':<34} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'falhas':>7}")
+            falhas_total = 0
+            for nome, requisicoes in rodadas.items():
+                tempo, latencias, falhas = disparar(porta, requisicoes, args.clientes)
+                p95 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))]
+                print(f"{nome:<34} {len(requisicoes) / tempo:>8.1f} {statistics.median(latencias):>9.2f} {p95:>9.2f} {falhas:>7}")
+                falhas_total += falhas
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+    sys.exit(1 if falhas_total else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: tempo de carga de um orçamento vs. tamanho das tabelas, sem e com índices.
+
+Uso:
+    python benchmarks/bench_indices.py [--tamanhos 1000 10000 100000] [--amostras 200]
+
+Cria um banco temporário com o mesmo schema de init_db, mede as três consultas de
+carregar_orcamento_por_id para IDs aleatórios e repete a medição depois de criar
+os mesmos índices que init_db cria (INDICES_DB em calcloc.db).
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calcloc.db import INDICES_DB  # noqa: E402
+
+SCHEMA = [
+    """CREATE TABLE orcamentos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, data_hora TEXT, cliente_nome TEXT, cliente_cnpj TEXT,
+        tipo_cliente TEXT, estado TEXT, frete TEXT, tipo_pedido TEXT, vendedor_nome TEXT,
+        vendedor_tel TEXT, vendedor_email TEXT, observacao TEXT, preco_m2_base REAL, data_hora_iso TEXT)""",
+    """CREATE TABLE itens_confeccionados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, orcamento_id INTEGER, produto TEXT, comprimento REAL,
+        largura REAL, quantidade INTEGER, cor TEXT, preco_unitario REAL)""",
+    """CREATE TABLE itens_bobinas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, orcamento_id INTEGER, produto TEXT, comprimento REAL,
+        largura REAL, quantidade INTEGER, cor TEXT, preco_unitario REAL, espessura REAL)""",
+]
+
+ITENS_POR_ORCAMENTO = 3
+
+
+def popular(conn, n_orcamentos):
+    rnd = random.Random(42)
+    conn.executemany(
+        "INSERT INTO orcamentos (data_hora, cliente_nome, cliente_cnpj, vendedor_nome, preco_m2_base, data_hora_iso) VALUES (?, ?, ?, ?, ?, ?)",
+        ((
+            "01/01/2025 10:00", f"Cliente {rnd.randrange(2000)}", f"{rnd.randrange(10**13):014d}",
+            "Vendedor", 10.0, "2025-01-01 10:00",
+        ) for _ in range(n_orcamentos)),
+    )
+    conn.executemany(
+        "INSERT INTO itens_confeccionados (orcamento_id, produto, comprimento, largura, quantidade, cor, preco_unitario) VALUES (?, 'Encerado', 2.0, 3.0, 1, '', 10.0)",
+        ((i,) for i in range(1, n_orcamentos + 1) for _ in range(ITENS_POR_ORCAMENTO)),
+    )
+    conn.executemany(
+        "INSERT INTO itens_bobinas (orcamento_id, produto, comprimento, largura, quantidade, cor, preco_unitario) VALUES (?, 'Vitro 0,40', 50.0, 1.4, 1, '', 10.0)",
+        ((i,) for i in range(1, n_orcamentos + 1) for _ in range(ITENS_POR_ORCAMENTO)),
+    )
+    conn.commit()
+
+
+def medir_carga(conn, n_orcamentos, amostras):
+    """Tempo médio (ms) das três consultas de carregar_orcamento_por_id."""
+    rnd = random.Random(7)
+    ids = [rnd.randint(1, n_orcamentos) for _ in range(amostras)]
+    cur = conn.cursor()
+    inicio = time.perf_counter()
+    for orcamento_id in ids:
+        cur.execute("SELECT * FROM orcamentos WHERE id=?", (orcamento_id,)).fetchone()
+        cur.execute("SELECT produto, comprimento, largura, quantidade, cor, preco_unitario FROM itens_confeccionados WHERE orcamento_id=?", (orcamento_id,)).fetchall()
+        cur.execute("SELECT produto, comprimento, largura, quantidade, cor, espessura, preco_unitario FROM itens_bobinas WHERE orcamento_id=?", (orcamento_id,)).fetchall()
+    return (time.perf_counter() - inicio) * 1000 / amostras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--amostras", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'orçamentos':>12} {'sem índice (ms)':>16} {'com índice (ms)':>16} {'ganho':>8}")
+    for n in args.tamanhos:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+            for ddl in SCHEMA:
+                conn.execute(ddl)
+            popular(conn, n)
+            # Com poucos IDs por tamanho grande a versão sem índice fica lenta; limita as amostras
+            amostras = min(args.amostras, max(10, 2_000_000 // n))
+            sem_indice = medir_carga(conn, n, amostras)
+            for ddl in INDICES_DB:
+                conn.execute(ddl)
+            conn.execute("ANALYZE")
+            com_indice = medir_carga(conn, n, args.amostras)
+            conn.close()
+        print(f"{n:>12} {sem_indice:>16.3f} {com_indice:>16.3f} {sem_indice / com_indice:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: tempo até a primeira renderização do app (cold start).
+
+Uso:
+    python benchmarks/bench_inicializacao.py [--repeticoes 5] [--limite 3.0]
+
+Cada repetição roda num processo Python novo: importa o Streamlit e executa o
+streamlit_app.py uma vez com o AppTest (página "Novo Orçamento"), num diretório
+temporário com o banco já criado. Também confere que numpy, pandas, fpdf e openpyxl não
+foram importados na primeira renderização.
+
+Sai com código 1 se a mediana passar de --limite segundos ou se algum módulo
+pesado for importado, para servir de teste de regressão no CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+MODULOS_TARDIOS = ["numpy", "pandas", "fpdf", "openpyxl"]
+
+# Executado em cada processo filho; imprime uma linha JSON com as medições
+FILHO = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_import = time.perf_counter() - inicio
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+inicio = time.perf_counter()
+at.run()
+t_render = time.perf_counter() - inicio
+print(json.dumps({
+    "import": t_import,
+    "render": t_render,
+    "erros": [e.message for e in at.exception],
+    "carregados": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def medir(cwd):
+    saida = subprocess.run(
+        [sys.executable, "-c", FILHO, APP, *MODULOS_TARDIOS],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=None, help="mediana máxima (s) da primeira renderização")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        medir(cwd)  # cria o banco (migrações) fora da medição
+        medicoes = [medir(cwd) for _ in range(args.repeticoes)]
+
+    renders = [m["render"] for m in medicoes]
+    imports = [m["import"] for m in medicoes]
+    carregados = sorted({modulo for m in medicoes for modulo in m["carregados"]})
+    erros = [erro for m in medicoes for erro in m["erros"]]
+
+    print(f"import do Streamlit:       mediana {statistics.median(imports):.3f}s")
+    print(f"primeira renderização:     mediana {statistics.median(renders):.3f}s (mín {min(renders):.3f}s, máx {max(renders):.3f}s)")
+    print(f"módulos tardios carregados: {', '.join(carregados) or 'nenhum'}")
+
+    falhou = False
+    if erros:
+        print(f"ERRO: o app lançou exceção: {erros[0]}")
+        falhou = True
+    if carregados:
+        print(f"ERRO: {', '.join(carregados)} importado(s) na primeira renderização")
+        falhou = True
+    if args.limite is not None and statistics.median(renders) > args.limite:
+        print(f"ERRO: mediana acima do limite de {args.limite:.3f}s")
+        falhou = True
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark: exportação de PDFs em ZIP com 1..N processos.
+
+Uso:
+    python benchmarks/bench_lote_pdf.py [--orcamentos 200] [--workers 1 2 4]
+
+Mede o tempo de exportar_pdfs_zip para cada quantidade de workers e o ganho
+em relação a um único processo. O ZIP é gravado num arquivo temporário.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calcloc.lote_pdf import contexto_processos, exportar_pdfs_zip  # noqa: E402
+from calcloc.precificacao import calcular_valores_bobinas  # noqa: E402
+
+PRODUTOS_CONF = ["Encerado", "Lonil de PVC", "Lonil KP", "Acrylic", "Tela de Sombreamento 50%"]
+PRODUTOS_BOB = ["Vitro 0,40", "Duramax", "Capota Marítima", "Encerado"]
+
+
+def gerar_tarefas(n, rnd):
+    for orcamento_id in range(1, n + 1):
+        itens_bob = [{
+            'produto': rnd.choice(PRODUTOS_BOB),
+            'comprimento': round(rnd.uniform(1.0, 60.0), 2),
+            'largura': 1.4,
+            'quantidade': rnd.randint(1, 5),
+            'cor': "",
+            'espessura': 0.4,
+            'preco_unitario': round(rnd.uniform(5.0, 80.0), 2),
+        } for _ in range(rnd.randint(0, 4))]
+        args_pdf = dict(
+            orcamento_id=orcamento_id,
+            cliente={"nome": f"Cliente {orcamento_id}", "cnpj": "00.000.000/0001-00", "tipo_cliente": "Revenda",
+                     "estado": "SP", "frete": "CIF", "tipo_pedido": "Direta"},
+            vendedor={"nome": "Vendedor", "tel": "", "email": ""},
+            itens_confeccionados=[{
+                'produto': rnd.choice(PRODUTOS_CONF),
+                'comprimento': round(rnd.uniform(0.5, 12.0), 2),
+                'largura': round(rnd.uniform(0.5, 4.0), 2),
+                'quantidade': rnd.randint(1, 10),
+                'cor': "Azul",
+            } for _ in range(rnd.randint(1, 8))],
+            itens_bobinas=itens_bob,
+            resumo_conf=None,
+            resumo_bob=calcular_valores_bobinas(itens_bob, 20.0),
+            observacao="Orçamento sintético para benchmark.",
+            preco_m2=20.0,
+            data_hora="01/01/2025 10:00",
+        )
+        yield f"orcamento_{orcamento_id}.pdf", args_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orcamentos", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'tempo (s)':>10} {'PDFs/s':>8} {'ganho':>7}")
+    t_base = None
+    for workers in args.workers:
+        with tempfile.TemporaryFile() as destino, ProcessPoolExecutor(workers, mp_context=contexto_processos()) as executor:
+            executor.submit(int).result()  # inicia o forkserver fora da medição
+            inicio = time.perf_counter()
+            gravados = exportar_pdfs_zip(gerar_tarefas(args.orcamentos, random.Random(42)), destino, executor=executor, janela=2 * workers)
+            tempo = time.perf_counter() - inicio
+            destino.seek(0)
+            assert len(zipfile.ZipFile(destino).namelist()) == gravados == args.orcamentos
+        t_base = t_base or tempo
+        print(f"{workers:>8} {tempo:>10.3f} {gravados / tempo:>8.1f} {t_base / tempo:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
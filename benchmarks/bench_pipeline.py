@@ -0,0 +1,298 @@
+"""Benchmark: operações do app sobre um histórico sintético em várias escalas.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--escalas 1000 10000 100000] [--amostras 30]
+        [--saida relatorio.json] [--comparar relatorio_anterior.json] [--tolerancia 1.25]
+        [--folga-ms 1.0] [--banco orcamentos.db]
+
+Preenche um banco (temporário, ou --banco) com orçamentos sintéticos gravados por
+salvar_orcamentos_em_lote: produtos de PRODUTOS, UFs de ESTADOS, clientes recorrentes e
+a mistura de orçamentos só com confeccionados, só com bobinas e mistos. Em cada escala
+mede, com as funções do próprio app (calcloc.db, calcloc.precificacao, calcloc.pdf e
+calcloc.exportacao):
+
+    historico       primeira página do Histórico (buscar_orcamentos + contar_orcamentos)
+    filtro_cliente  Histórico filtrado por um cliente
+    filtro_busca    Histórico filtrado pela busca textual (FTS)
+    filtro_datas    Histórico filtrado por um intervalo de 30 dias
+    carregar        carregar_orcamento_por_id de um ID aleatório
+    salvar          salvar_orcamento de um orçamento novo
+    precificacao    calcular_valores_confeccionados + calcular_valores_bobinas
+    pdf             gerar_pdf de um orçamento salvo (sem o cache de PDFs)
+    exportacao      exportar_resumo (xlsx) do histórico inteiro
+
+As escalas crescem o mesmo banco (da menor para a maior). O relatório JSON (--saida)
+traz mediana, p95 e máximo (ms) de cada operação por escala; com --comparar, sai com
+código 1 se alguma mediana piorar mais que --tolerancia vezes (e mais que --folga-ms)
+em relação ao relatório anterior, para acompanhar regressões entre versões.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calcloc import db  # noqa: E402
+from calcloc.catalogo import ESTADOS, ICMS_PADRAO, PRODUTOS, icms_por_estado, info_produto  # noqa: E402
+from calcloc.exportacao import exportar_resumo  # noqa: E402
+from calcloc.pdf import args_pdf_orcamento_salvo, gerar_pdf  # noqa: E402
+from calcloc.precificacao import calcular_valores_bobinas, calcular_valores_confeccionados  # noqa: E402
+
+# Fração dos orçamentos: só confeccionados, só bobinas, mistos
+MISTURA = {"confeccionado": 0.60, "bobina": 0.25, "misto": 0.15}
+LOTE_INSERCAO = 1000
+ITENS_POR_PAGINA = 25
+INICIO_HISTORICO = datetime(2023, 1, 1, 8, 0)
+DIAS_HISTORICO = 730
+
+PRODUTOS_VALIDOS = [p for p in PRODUTOS if p.strip()]
+# UFs com alíquota própria (SP, MG, PR, RJ, RS, SC) concentram a maior parte das vendas
+PESOS_ESTADOS = [4 if icms_por_estado[uf] != ICMS_PADRAO else 1 for uf in ESTADOS]
+CORES = ["", "", "Azul", "Preto", "Branco", "Verde", "Amarelo"]
+LARGURAS_BOBINA = [1.0, 1.4, 1.5, 2.0, 3.0]
+VENDEDORES = [f"Vendedor {i}" for i in range(1, 7)]
+RAZOES = ["Transportes", "Comércio", "Agropecuária", "Toldos", "Coberturas", "Indústria", "Logística"]
+
+
+class Gerador:
+    """Orçamentos sintéticos reprodutíveis (semente fixa) no formato de salvar_orcamentos_em_lote."""
+
+    def __init__(self, semente=42, n_clientes=2000):
+        self.rnd = random.Random(semente)
+        self.clientes = [self._cliente(i) for i in range(1, n_clientes + 1)]
+
+    def _cliente(self, i):
+        rnd = self.rnd
+        raiz = rnd.randrange(10**8)
+        return {
+            "nome": f"{rnd.choice(RAZOES)} {rnd.choice(PRODUTOS_VALIDOS).split()[0]} {i} Ltda",
+            "cnpj": f"{raiz // 10**6:02d}.{raiz // 1000 % 1000:03d}.{raiz % 1000:03d}/0001-{rnd.randrange(100):02d}",
+            "tipo_cliente": rnd.choice(["Consumidor Final", "Revenda"]),
+            "estado": rnd.choices(ESTADOS, PESOS_ESTADOS)[0],
+            "frete": rnd.choice(["CIF", "FOB"]),
+        }
+
+    def _confeccionado(self, preco_m2):
+        rnd = self.rnd
+        return {
+            'produto': rnd.choice(PRODUTOS_VALIDOS),
+            'comprimento': round(rnd.uniform(0.5, 12.0), 2),
+            'largura': round(rnd.uniform(0.5, 4.0), 2),
+            'quantidade': rnd.randint(1, 10),
+            'cor': rnd.choice(CORES),
+            'preco_unitario': preco_m2,
+        }
+
+    def _bobina(self, preco_m2):
+        rnd = self.rnd
+        produto = rnd.choice(PRODUTOS_VALIDOS)
+        item = {
+            'produto': produto,
+            'comprimento': float(rnd.choice([25, 50, 50, 100])),
+            'largura': rnd.choice(LARGURAS_BOBINA),
+            'quantidade': rnd.randint(1, 5),
+            'cor': rnd.choice(CORES),
+            'preco_unitario': preco_m2,
+        }
+        if info_produto(produto).exige_espessura:
+            item['espessura'] = rnd.choice([0.08, 0.10, 0.40, 0.80, 1.00])
+        return item
+
+    def orcamento(self):
+        rnd = self.rnd
+        tipo = rnd.choices(list(MISTURA), list(MISTURA.values()))[0]
+        preco_m2 = round(rnd.uniform(5.0, 60.0), 2)
+        conf = [self._confeccionado(preco_m2) for _ in range(rnd.randint(1, 8))] if tipo != "bobina" else []
+        bob = [self._bobina(preco_m2) for _ in range(rnd.randint(1, 4))] if tipo != "confeccionado" else []
+        return {
+            "cliente": dict(rnd.choice(self.clientes), tipo_pedido=rnd.choices(["Direta", "Industrialização"], [9, 1])[0]),
+            "vendedor": {"nome": rnd.choice(VENDEDORES), "tel": "", "email": ""},
+            "itens_confeccionados": conf,
+            "itens_bobinas": bob,
+            "observacao": rnd.choice(["", "", "Entrega em 15 dias.", "Cliente pediu ilhós a cada 50 cm."]),
+            "preco_m2_base": preco_m2,
+            "data_hora": INICIO_HISTORICO + timedelta(minutes=rnd.randrange(DIAS_HISTORICO * 24 * 60)),
+        }
+
+
+def contar(tabela):
+    with db.conexao_db() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+
+
+def tamanho_banco(caminho):
+    # Com WAL, páginas ainda não transferidas para o arquivo principal ficam no -wal
+    return sum(os.path.getsize(c) for c in (caminho, caminho + "-wal") if os.path.exists(c))
+
+
+def popular(gerador, quantidade):
+    """Grava `quantidade` orçamentos em lotes de LOTE_INSERCAO; retorna o tempo (s)."""
+    inicio = time.perf_counter()
+    while quantidade > 0:
+        lote = min(quantidade, LOTE_INSERCAO)
+        db.salvar_orcamentos_em_lote([gerador.orcamento() for _ in range(lote)])
+        quantidade -= lote
+    return time.perf_counter() - inicio
+
+
+def cronometrar(operacao, amostras):
+    """Executa operacao() `amostras` vezes (após uma execução de aquecimento); retorna mediana, p95 e máximo em ms."""
+    operacao()  # imports tardios (fpdf, openpyxl) e cache do SQLite fora da medição
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        operacao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "amostras": amostras,
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p95_ms": round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3),
+        "max_ms": round(tempos[-1], 3),
+    }
+
+
+def operacoes(gerador, rnd, destino, amostras):
+    """Operações medidas: nome -> (função sem argumentos, fator de amostras)."""
+    n_orcamentos = contar("orcamentos")
+    clientes = [c["nome"] for c in gerador.clientes]
+    # Orçamentos novos gerados antes da medição (a geração não entra no tempo)
+    novos = iter([gerador.orcamento() for _ in range(2 * (amostras + 1))])
+
+    def historico(**filtros):
+        db.buscar_orcamentos(**filtros, limit=ITENS_POR_PAGINA, offset=0)
+        db.contar_orcamentos(**filtros)
+
+    def filtro_datas():
+        inicio = (INICIO_HISTORICO + timedelta(days=rnd.randrange(DIAS_HISTORICO - 30))).date()
+        historico(data_inicio=inicio, data_fim=inicio + timedelta(days=30))
+
+    def precificacao():
+        orcamento = next(novos)
+        cliente = orcamento["cliente"]
+        calcular_valores_confeccionados(orcamento["itens_confeccionados"], orcamento["preco_m2_base"],
+                                        cliente["tipo_cliente"], cliente["estado"], cliente["tipo_pedido"])
+        calcular_valores_bobinas(orcamento["itens_bobinas"], orcamento["preco_m2_base"], cliente["tipo_pedido"])
+
+    def salvar():
+        orcamento = next(novos)
+        db.salvar_orcamento(orcamento["cliente"], orcamento["vendedor"], orcamento["itens_confeccionados"],
+                            orcamento["itens_bobinas"], orcamento["observacao"], orcamento["preco_m2_base"])
+
+    def exportacao():
+        destino.seek(0)
+        destino.truncate()
+        exportar_resumo(db.iterar_resumo_orcamentos({}), destino, "xlsx")
+
+    return {
+        "historico": (historico, 1),
+        "filtro_cliente": (lambda: historico(cliente=rnd.choice(clientes)), 1),
+        "filtro_busca": (lambda: historico(busca=rnd.choice(PRODUTOS_VALIDOS).split()[0]), 1),
+        "filtro_datas": (filtro_datas, 1),
+        "carregar": (lambda: db.carregar_orcamento_por_id(rnd.randint(1, n_orcamentos)), 1),
+        "salvar": (salvar, 1),
+        "precificacao": (precificacao, 1),
+        "pdf": (lambda: gerar_pdf(**args_pdf_orcamento_salvo(*db.carregar_orcamento_por_id(rnd.randint(1, n_orcamentos)))), 1),
+        # O histórico inteiro por amostra: poucas repetições
+        "exportacao": (exportacao, 0.1),
+    }
+
+
+def comparar(relatorio, anterior, tolerancia, folga_ms):
+    """Lista (escala, operação, razão) das medianas que pioraram mais que `tolerancia` vezes.
+
+    Diferenças abaixo de `folga_ms` são ignoradas: operações de microssegundos oscilam muito entre execuções.
+    """
+    medianas = {
+        (escala["orcamentos"], nome): medicao["mediana_ms"]
+        for escala in anterior["escalas"] for nome, medicao in escala["operacoes"].items()
+    }
+    regressoes = []
+    for escala in relatorio["escalas"]:
+        for nome, medicao in escala["operacoes"].items():
+            base = medianas.get((escala["orcamentos"], nome))
+            if base:
+                razao = medicao["mediana_ms"] / base
+                print(f"{escala['orcamentos']:>9} {nome:<15} {base:>10.3f} -> {medicao['mediana_ms']:>10.3f} ms ({razao:.2f}x)")
+                if razao > tolerancia and medicao["mediana_ms"] - base > folga_ms:
+                    regressoes.append((escala["orcamentos"], nome, razao))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--amostras", type=int, default=30)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="arquivo do relatório JSON")
+    parser.add_argument("--comparar", help="relatório JSON anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=1.25, help="piora máxima aceita da mediana (razão)")
+    parser.add_argument("--folga-ms", type=float, default=1.0, help="piora absoluta (ms) ignorada na comparação")
+    parser.add_argument("--banco", help="grava o histórico sintético neste arquivo em vez de um temporário")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = args.banco or os.path.join(tmp, "orcamentos.db")
+        db.configurar(caminho)
+        db.init_db()
+        gerador = Gerador(args.semente)
+        rnd = random.Random(args.semente)
+        relatorio = {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "semente": args.semente,
+            "amostras": args.amostras,
+            "escalas": [],
+        }
+        with tempfile.TemporaryFile(dir=tmp) as destino:
+            for escala in sorted(args.escalas):
+                faltam = escala - contar("orcamentos")
+                t_insercao = popular(gerador, faltam) if faltam > 0 else 0.0
+                resultado = {
+                    "orcamentos": escala,
+                    "itens_confeccionados": contar("itens_confeccionados"),
+                    "itens_bobinas": contar("itens_bobinas"),
+                    "tamanho_banco_bytes": tamanho_banco(caminho),
+                    "insercao": {
+                        "orcamentos": max(faltam, 0),
+                        "segundos": round(t_insercao, 3),
+                        "orcamentos_por_s": round(faltam / t_insercao, 1) if t_insercao else None,
+                    },
+                    "operacoes": {},
+                }
+                print(f"\n{escala} orçamentos ({max(faltam, 0)} inseridos em {t_insercao:.2f}s)")
+                print(f"{'operação':<15} {'mediana':>10} {'p95':>10} {'máx (ms)':>10}")
+                for nome, (operacao, fator) in operacoes(gerador, rnd, destino, args.amostras).items():
+                    medicao = cronometrar(operacao, max(3, int(args.amostras * fator)))
+                    resultado["operacoes"][nome] = medicao
+                    print(f"{nome:<15} {medicao['mediana_ms']:>10.3f} {medicao['p95_ms']:>10.3f} {medicao['max_ms']:>10.3f}")
+                relatorio["escalas"].append(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nRelatório gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            anterior = json.load(arquivo)
+        print(f"\nComparação com {args.comparar} (tolerância {args.tolerancia:.2f}x):")
+        regressoes = comparar(relatorio, anterior, args.tolerancia, args.folga_ms)
+        for escala, nome, razao in regressoes:
+            print(f"ERRO: {nome} com {escala} orçamentos ficou {razao:.2f}x mais lento")
+        sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
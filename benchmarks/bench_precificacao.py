@@ -0,0 +1,80 @@
+"""Benchmark: cálculo por item (listas de dicts) vs. cálculo vetorizado (LoteItens).
+
+Uso:
+    python benchmarks/bench_precificacao.py [--tamanhos 10 1000 100000]
+
+Antes de medir, confere que calcular_lote_* devolve os mesmos valores que
+calcular_valores_* (a menos de arredondamento de ponto flutuante).
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calcloc.lote_precificacao import calcular_lote_bobinas, calcular_lote_confeccionados, lote_de_itens  # noqa: E402
+from calcloc.precificacao import calcular_valores_bobinas, calcular_valores_confeccionados  # noqa: E402
+
+PRODUTOS = [
+    "Encerado", "Lonil de PVC", "Lonil KP", "Capota Marítima", "Acrylic", "Agora",
+    "Tela de Sombreamento 50%", "Tela de Sombreamento 95%", "Vitro 0,40", "Duramax",
+]
+
+
+def gerar_itens(n, rnd):
+    return [{
+        'produto': rnd.choice(PRODUTOS),
+        'comprimento': round(rnd.uniform(0.5, 60.0), 2),
+        'largura': round(rnd.uniform(0.5, 4.0), 2),
+        'quantidade': rnd.randint(1, 20),
+        'cor': "",
+        'preco_unitario': round(rnd.uniform(5.0, 80.0), 2),
+    } for _ in range(n)]
+
+
+def conferir(esperado, obtido):
+    for a, b in zip(esperado, obtido):
+        if not math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9):
+            raise AssertionError(f"Divergência entre cálculo por item e vetorizado: {esperado} != {obtido}")
+
+
+def cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    print(f"{'itens':>8} {'cálculo':>14} {'por item (ms)':>14} {'vetorizado (ms)':>16} {'ganho':>7}")
+    for n in args.tamanhos:
+        itens = gerar_itens(n, rnd)
+        lote = lote_de_itens(itens)
+        repeticoes = max(1, 20000 // n)
+        casos = {
+            "confeccionado": (
+                lambda: calcular_valores_confeccionados(itens, 10.0, "Revenda", "SP", "Direta"),
+                lambda: calcular_lote_confeccionados(lote, 10.0, "Revenda", "SP", "Direta"),
+            ),
+            "bobina": (
+                lambda: calcular_valores_bobinas(itens, 10.0, "Direta"),
+                lambda: calcular_lote_bobinas(lote, 10.0, "Direta"),
+            ),
+        }
+        for nome, (por_item, vetorizado) in casos.items():
+            conferir(por_item(), vetorizado())
+            t_item = cronometrar(por_item, repeticoes)
+            t_vet = cronometrar(vetorizado, repeticoes)
+            print(f"{n:>8} {nome:>14} {t_item:>14.3f} {t_vet:>16.3f} {t_item / t_vet:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
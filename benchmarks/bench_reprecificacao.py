@@ -0,0 +1,99 @@
+"""Benchmark: reprecificação do histórico, um orçamento por vez vs. pipeline em DataFrame.
+
+Uso:
+    python benchmarks/bench_reprecificacao.py [--orcamentos 1000 10000]
+
+O caminho "por orçamento" reproduz a exportação antiga (dicts por orçamento e uma
+chamada de calcular_valores_* por orçamento); o pipeline usa precificar_orcamentos.
+Os totais dos dois caminhos são conferidos antes da medição.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from calcloc.precificacao import calcular_valores_bobinas, calcular_valores_confeccionados  # noqa: E402
+from calcloc.reprecificacao import precificar_orcamentos  # noqa: E402
+
+PRODUTOS = [
+    "Encerado", "Lonil de PVC", "Lonil KP", "Capota Marítima", "Acrylic", "Agora",
+    "Tela de Sombreamento 50%", "Tela de Sombreamento 95%", "Vitro 0,40", "Duramax",
+]
+ESTADOS = ["SP", "RJ", "MG", "PR", "BA", "AM", "SC"]
+
+
+def gerar_historico(n, rnd):
+    cabecalhos = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "tipo_cliente": [rnd.choice(["Revenda", "Consumidor Final", " "]) for _ in range(n)],
+        "estado": [rnd.choice(ESTADOS) for _ in range(n)],
+        "tipo_pedido": [rnd.choice(["Direta", "Direta", "Industrialização"]) for _ in range(n)],
+        "preco_m2_base": [round(rnd.uniform(5.0, 80.0), 2) for _ in range(n)],
+    })
+
+    def itens(por_orcamento, com_preco):
+        linhas = []
+        for orcamento_id in range(1, n + 1):
+            for _ in range(rnd.randint(0, por_orcamento)):
+                linhas.append({
+                    "orcamento_id": orcamento_id,
+                    "produto": rnd.choice(PRODUTOS),
+                    "comprimento": round(rnd.uniform(0.5, 60.0), 2),
+                    "largura": round(rnd.uniform(0.5, 4.0), 2),
+                    "quantidade": rnd.randint(1, 10),
+                    "preco_unitario": (round(rnd.uniform(5.0, 80.0), 2) if rnd.random() < 0.5 else None) if com_preco else None,
+                })
+        colunas = ["orcamento_id", "produto", "comprimento", "largura", "quantidade", "preco_unitario"]
+        frame = pd.DataFrame(linhas, columns=colunas)
+        return frame if com_preco else frame.drop(columns="preco_unitario")
+
+    return cabecalhos, itens(4, com_preco=False), itens(3, com_preco=True)
+
+
+def por_orcamento(cabecalhos, itens_conf, itens_bob):
+    """Caminho antigo: agrupa em dicts e chama calcular_valores_* uma vez por orçamento."""
+    conf_por_id = {k: g.drop(columns="orcamento_id").to_dict("records") for k, g in itens_conf.groupby("orcamento_id")}
+    bob_por_id = {
+        k: [{**item, "preco_unitario": None if pd.isna(item["preco_unitario"]) else item["preco_unitario"]} for item in g.drop(columns="orcamento_id").to_dict("records")]
+        for k, g in itens_bob.groupby("orcamento_id")
+    }
+    totais = {}
+    for cab in cabecalhos.to_dict("records"):
+        conf = conf_por_id.get(cab["id"], [])
+        bob = bob_por_id.get(cab["id"], [])
+        resumo_conf = calcular_valores_confeccionados(conf, cab["preco_m2_base"], cab["tipo_cliente"], cab["estado"], cab["tipo_pedido"]) if conf else (0, 0, 0, 0, 0, 0)
+        resumo_bob = calcular_valores_bobinas(bob, cab["preco_m2_base"], cab["tipo_pedido"]) if bob else (0, 0, 0, 0, 0.0975)
+        totais[cab["id"]] = resumo_conf[3] + resumo_bob[3]
+    return pd.Series(totais)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orcamentos", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    print(f"{'orçamentos':>12} {'por orçamento (s)':>18} {'pipeline (s)':>13} {'ganho':>7}")
+    for n in args.orcamentos:
+        cabecalhos, itens_conf, itens_bob = gerar_historico(n, rnd)
+
+        inicio = time.perf_counter()
+        esperado = por_orcamento(cabecalhos, itens_conf, itens_bob)
+        t_antigo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        totais = precificar_orcamentos(cabecalhos, itens_conf, itens_bob)
+        t_pipeline = time.perf_counter() - inicio
+
+        np.testing.assert_allclose(totais["valor_final_total"].to_numpy(), esperado.reindex(totais.index).to_numpy(), rtol=1e-9)
+        print(f"{n:>12} {t_antigo:>18.3f} {t_pipeline:>13.3f} {t_antigo / t_pipeline:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
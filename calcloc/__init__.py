@@ -0,0 +1,5 @@
+"""Núcleo da Calculadora Grupo Locomotiva (sem dependência do Streamlit).
+
+Nenhum módulo tem efeitos na importação: o banco só é aberto na primeira chamada a
+calcloc.db.conexao_db() e as threads de tarefas só são criadas por calcloc.jobs.executor_jobs().
+"""
@@ -0,0 +1,308 @@
+"""API HTTP local de orçamentos (JSON), sobre o mesmo banco do app, sem o Streamlit.
+
+Uso:
+    python -m calcloc.api [--host 127.0.0.1] [--porta 8000] [--banco orcamentos.db] [--workers-pdf N]
+
+Rotas:
+    GET  /saude                  {"status": "ok"}
+    POST /precificar             totais do orçamento do corpo (nada é salvo)
+    POST /orcamentos             salva o orçamento do corpo; 201 com o ID e os totais
+    GET  /orcamentos/<id>        orçamento salvo (cliente, vendedor, itens e valor final)
+    GET  /orcamentos/<id>/pdf    PDF do orçamento salvo (com o cache de PDFs do app)
+    POST /pdf                    PDF do orçamento do corpo, sem salvar (sem ID)
+
+Corpo dos POST:
+    {"cliente": {"nome", "cnpj", "tipo_cliente", "estado", "frete", "tipo_pedido"},
+     "vendedor": {"nome", "tel", "email"}, "preco_m2": 25.5, "observacao": "",
+     "itens_confeccionados": [{"produto", "comprimento", "largura", "quantidade", "cor", "preco_unitario"}],
+     "itens_bobinas": [{... mesmos campos ..., "espessura"}]}
+validado com as mesmas regras da importação de planilhas (calcloc.importacao).
+
+Cada requisição roda numa thread (ThreadingHTTPServer); as conexões SQLite vêm do
+pool de calcloc.db (WAL: leituras concorrentes não esperam a escrita). Os PDFs são
+renderizados no pool de processos de calcloc.lote_pdf, então não disputam o GIL com as requisições.
+"""
+import argparse
+import json
+import re
+import sys
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from calcloc import db
+from calcloc.importacao import _cabecalho_orcamento, _item, precificar
+from calcloc.instrumentacao import medir
+from calcloc.lote_pdf import descartar_pool_pdf, encerrar_pool_pdf, pool_pdf
+from calcloc.pdf import gerar_pdf, gerar_pdf_orcamento_salvo
+
+MAX_CORPO_BYTES = 1024 * 1024
+CONEXOES_DB = 16
+MAX_ID_SQLITE = 2 ** 63 - 1
+
+COLUNAS_CONFECCIONADO = ["produto", "comprimento", "largura", "quantidade", "cor", "preco_unitario"]
+COLUNAS_BOBINA = ["produto", "comprimento", "largura", "quantidade", "cor", "espessura", "preco_unitario"]
+
+class ErroHTTP(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+# ============================
+# Conversão JSON <-> orçamento
+# ============================
+def orcamento_do_json(corpo):
+    """Valida o corpo e o converte no formato de salvar_orcamentos_em_lote (ValueError lista os problemas)."""
+    if not isinstance(corpo, dict):
+        raise ValueError("o corpo deve ser um objeto JSON")
+    cliente = corpo.get("cliente") or {}
+    vendedor = corpo.get("vendedor") or {}
+    if not isinstance(cliente, dict) or not isinstance(vendedor, dict):
+        raise ValueError("'cliente' e 'vendedor' devem ser objetos")
+    # Mesmas colunas da planilha de importação
+    cabecalho = {f"cliente_{campo}": cliente.get(campo) for campo in ("nome", "cnpj")}
+    cabecalho.update({campo: cliente.get(campo) for campo in ("tipo_cliente", "estado", "frete", "tipo_pedido")})
+    cabecalho.update({f"vendedor_{campo}": vendedor.get(campo) for campo in ("nome", "tel", "email")})
+    cabecalho.update(observacao=corpo.get("observacao"), preco_m2=corpo.get("preco_m2"))
+    orcamento = _cabecalho_orcamento(cabecalho)
+
+    erros = []
+    for chave, tipo in (("itens_confeccionados", "Confeccionado"), ("itens_bobinas", "Bobina")):
+        itens = corpo.get(chave) or []
+        if not isinstance(itens, list):
+            erros.append(f"'{chave}' deve ser uma lista")
+            continue
+        for indice, item in enumerate(itens):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("o item deve ser um objeto")
+                orcamento[chave].append(_item(dict(item, tipo=tipo), orcamento["preco_m2_base"])[1])
+            except ValueError as e:
+                erros.append(f"{chave}[{indice}]: {e}")
+    if erros:
+        raise ValueError("; ".join(erros))
+    if not orcamento["itens_confeccionados"] and not orcamento["itens_bobinas"]:
+        raise ValueError("o orçamento não tem itens")
+    return orcamento
+
+def totais_json(resumo_conf, resumo_bob):
+    """Tuplas de calcular_valores_confeccionados / calcular_valores_bobinas como objetos JSON."""
+    conf = dict(zip(("m2_total", "valor_bruto", "valor_ipi", "valor_final", "valor_st", "aliquota_st"), resumo_conf)) if resumo_conf else None
+    bob = dict(zip(("m_total", "valor_bruto", "valor_ipi", "valor_final", "ipi_rate"), resumo_bob)) if resumo_bob else None
+    valor_final = (conf["valor_final"] if conf else 0.0) + (bob["valor_final"] if bob else 0.0)
+    return {"confeccionados": conf, "bobinas": bob, "valor_final": round(valor_final, 2)}
+
+def orcamento_salvo_json(orc, confecc, bob, valor_final):
+    # orc: linha completa de 'orcamentos' (SELECT *), confecc/bob: tuplas de carregar_orcamento_por_id
+    return {
+        "id": orc[0],
+        "data_hora": orc[1],
+        "cliente": dict(zip(("nome", "cnpj", "tipo_cliente", "estado", "frete", "tipo_pedido"), orc[2:8])),
+        "vendedor": dict(zip(("nome", "tel", "email"), orc[8:11])),
+        "observacao": orc[11],
+        "preco_m2": orc[12],
+        "itens_confeccionados": [dict(zip(COLUNAS_CONFECCIONADO, c)) for c in confecc],
+        "itens_bobinas": [dict(zip(COLUNAS_BOBINA, b)) for b in bob],
+        "valor_final": valor_final,
+    }
+
+def _args_pdf(orcamento, orcamento_id=None):
+    resumo_conf, resumo_bob = precificar(orcamento)
+    cliente = orcamento["cliente"]
+    return dict(
+        orcamento_id=orcamento_id,
+        cliente=cliente,
+        vendedor=orcamento["vendedor"],
+        itens_confeccionados=orcamento["itens_confeccionados"],
+        itens_bobinas=orcamento["itens_bobinas"],
+        resumo_conf=resumo_conf,
+        resumo_bob=resumo_bob,
+        observacao=orcamento["observacao"],
+        preco_m2=orcamento["preco_m2_base"],
+        tipo_cliente=cliente["tipo_cliente"],
+        estado=cliente["estado"],
+    )
+
+# ============================
+# Rotas
+# ============================
+def _json(status, dados):
+    return status, "application/json; charset=utf-8", json.dumps(dados, ensure_ascii=False).encode("utf-8")
+
+def _pdf(nome_arquivo, pdf_bytes):
+    return 200, "application/pdf", pdf_bytes, {"Content-Disposition": f'inline; filename="{nome_arquivo}"'}
+
+def _carregar_salvo(orcamento_id):
+    orcamento_id = int(orcamento_id)
+    if orcamento_id > MAX_ID_SQLITE:
+        # Não cabe num INTEGER do SQLite (o sqlite3 levantaria OverflowError): não existe
+        raise ErroHTTP(404, f"Orçamento {orcamento_id} não encontrado")
+    orc, confecc, bob = db.carregar_orcamento_por_id(orcamento_id)
+    if orc is None:
+        raise ErroHTTP(404, f"Orçamento {orcamento_id} não encontrado")
+    return orc, confecc, bob
+
+def rota_saude(servidor, corpo):
+    return _json(200, {"status": "ok"})
+
+@medir("api_precificar")
+def rota_precificar(servidor, corpo):
+    return _json(200, totais_json(*precificar(orcamento_do_json(corpo))))
+
+@medir("api_salvar")
+def rota_salvar(servidor, corpo):
+    orcamento = orcamento_do_json(corpo)
+    orcamento_id = db.salvar_orcamentos_em_lote([orcamento])[0]
+    return _json(201, dict(totais_json(*precificar(orcamento)), id=orcamento_id))
+
+@medir("api_carregar")
+def rota_carregar(servidor, corpo, orcamento_id):
+    orc, confecc, bob = _carregar_salvo(orcamento_id)
+    valor_final = db.carregar_totais_por_ids([orc[0]]).get(orc[0])
+    return _json(200, orcamento_salvo_json(orc, confecc, bob, None if valor_final is None else round(valor_final, 2)))
+
+@medir("api_pdf_salvo")
+def rota_pdf_salvo(servidor, corpo, orcamento_id):
+    orc, confecc, bob = _carregar_salvo(orcamento_id)
+    return _pdf(f"orcamento_{orc[0]}.pdf", gerar_pdf_orcamento_salvo(orc, confecc, bob, renderizar=servidor.renderizar_pdf))
+
+@medir("api_pdf")
+def rota_pdf(servidor, corpo):
+    return _pdf("orcamento.pdf", servidor.renderizar_pdf(_args_pdf(orcamento_do_json(corpo))))
+
+ROTAS = [
+    ("GET", re.compile(r"/saude"), rota_saude),
+    ("POST", re.compile(r"/precificar"), rota_precificar),
+    ("POST", re.compile(r"/orcamentos"), rota_salvar),
+    ("GET", re.compile(r"/orcamentos/(\d+)"), rota_carregar),
+    ("GET", re.compile(r"/orcamentos/(\d+)/pdf"), rota_pdf_salvo),
+    ("POST", re.compile(r"/pdf"), rota_pdf),
+]
+
+# ============================
+# Servidor
+# ============================
+class _Requisicao(BaseHTTPRequestHandler):
+    server_version = "CalclocAPI/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive: clientes reaproveitam a conexão
+    # Cabeçalhos e corpo saem em writes separados: sem TCP_NODELAY, o Nagle espera o ACK atrasado (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def _ler_corpo(self):
+        """Lê o corpo inteiro, mesmo nas rotas que não o usam: bytes não lidos corromperiam a próxima requisição da conexão."""
+        try:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            tamanho = -1
+        if tamanho < 0:
+            self.close_connection = True
+            raise ErroHTTP(400, "Content-Length inválido")
+        if tamanho > MAX_CORPO_BYTES:
+            # O corpo fica sem ler: a conexão não pode ser reaproveitada
+            self.close_connection = True
+            raise ErroHTTP(413, f"Corpo maior que {MAX_CORPO_BYTES} bytes")
+        return self.rfile.read(tamanho) if tamanho else b""
+
+    @staticmethod
+    def _json_corpo(bruto):
+        if not bruto:
+            return None
+        try:
+            return json.loads(bruto)
+        except ValueError:
+            raise ErroHTTP(400, "Corpo não é um JSON válido") from None
+
+    def _atender(self, metodo):
+        caminho = self.path.split("?", 1)[0].rstrip("/") or "/"
+        try:
+            bruto = self._ler_corpo()
+            encontradas = [(m, rota, funcao) for m, rota, funcao in ROTAS if rota.fullmatch(caminho)]
+            if not encontradas:
+                raise ErroHTTP(404, f"Rota não encontrada: {caminho}")
+            for m, rota, funcao in encontradas:
+                if m == metodo:
+                    corpo = self._json_corpo(bruto) if metodo == "POST" else None
+                    resposta = funcao(self.server, corpo, *rota.fullmatch(caminho).groups())
+                    break
+            else:
+                raise ErroHTTP(405, f"Método {metodo} não permitido em {caminho}")
+        except ErroHTTP as e:
+            resposta = _json(e.status, {"erro": str(e)})
+        except ValueError as e:
+            resposta = _json(422, {"erro": str(e)})
+        except Exception as e:
+            self.log_error("Erro em %s %s: %r", metodo, caminho, e)
+            self.close_connection = True
+            resposta = _json(500, {"erro": "Erro interno"})
+        self._responder(*resposta)
+
+    def _responder(self, status, tipo, conteudo, cabecalhos=None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(conteudo)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, formato, *args):
+        if not self.server.silencioso:
+            super().log_message(formato, *args)
+
+class ServidorAPI(ThreadingHTTPServer):
+    """ThreadingHTTPServer com o pool de processos que renderiza os PDFs."""
+
+    daemon_threads = True
+    request_queue_size = 128  # conexões aguardando accept (o padrão do socketserver é 5)
+
+    def __init__(self, endereco, workers_pdf=None, silencioso=False):
+        self.silencioso = silencioso
+        self.workers_pdf = workers_pdf
+        super().__init__(endereco, _Requisicao)
+
+    def renderizar_pdf(self, args_pdf):
+        executor = pool_pdf(self.workers_pdf)
+        try:
+            return executor.submit(gerar_pdf, **args_pdf).result()
+        except BrokenProcessPool:
+            descartar_pool_pdf(executor)
+            raise
+
+    def server_close(self):
+        super().server_close()
+        encerrar_pool_pdf()
+
+def criar_servidor(host="127.0.0.1", porta=8000, banco=db.DB_NAME, workers_pdf=None, silencioso=False):
+    """Aplica as migrações no banco e cria o servidor (porta 0: uma porta livre qualquer)."""
+    db.configurar(banco, CONEXOES_DB)
+    db.init_db()
+    return ServidorAPI((host, porta), workers_pdf, silencioso)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="use 0.0.0.0 para aceitar conexões de outras máquinas")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--banco", default=db.DB_NAME, help=f"banco SQLite do app (padrão: {db.DB_NAME})")
+    parser.add_argument("--workers-pdf", type=int, default=None, help="processos para os PDFs (padrão: número de CPUs)")
+    parser.add_argument("--silencioso", action="store_true", help="não registra cada requisição")
+    args = parser.parse_args(argv)
+
+    servidor = criar_servidor(args.host, args.porta, args.banco, args.workers_pdf, args.silencioso)
+    print(f"API de orçamentos em http://{args.host}:{servidor.server_address[1]} (banco: {args.banco})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Catálogo de produtos, tabelas de ICMS, IPI e ST e fuso horário, montados uma vez por processo.
+
+As estruturas são imutáveis (tuplas e MappingProxyType) e construídas na importação
+do módulo; a cada rerun do Streamlit o app só faz consultas nelas.
+"""
+from types import MappingProxyType
+from typing import NamedTuple
+
+import pytz
+
+FUSO_HORARIO = pytz.timezone("America/Sao_Paulo")
+
+# ============================
+# ICMS por UF
+# ============================
+ICMS_PADRAO = 7
+_ICMS_ESPECIFICO = {"SP": 18, "MG": 12, "PR": 12, "RJ": 12, "RS": 12, "SC": 12}
+
+# Ordem do seletor de Estado: UFs com alíquota própria primeiro
+ESTADOS = tuple(_ICMS_ESPECIFICO) + (
+    "AC","AL","AM","AP","BA","CE","DF","ES","GO","MA","MT","MS",
+    "PA","PB","PE","PI","RN","RO","RR","SE","TO"
+)
+icms_por_estado = MappingProxyType({uf: _ICMS_ESPECIFICO.get(uf, ICMS_PADRAO) for uf in ESTADOS})
+
+# ============================
+# IPI e ST
+# ============================
+IPI_CONFECCIONADO_DEFAULT = 0.0325
+IPI_ZERO_PRODS = ("Acrylic", "Agora", "Tela de Sombreamento 95%")
+IPI_ZERO_PREFIXES = ("Tela de Sombreamento",)
+
+IPI_RATE_DEFAULT = 0.0975 # 9.75%
+IPI_RATE_CAPOTA = 0.0325 # 3.25%
+
+# Alíquotas de ST (%) por UF, aplicadas aos produtos com ST vendidos para Revenda
+st_por_estado = MappingProxyType({
+    "SP": 14, "RJ": 27, "MG": 22, "ES": 0, "PR": 22, "RS": 20, "SC": 0,
+    "BA": 29, "PE": 29, "CE": 19, "RN": 0, "PB": 29, "SE": 0, "AL": 29,
+    "DF": 29, "GO": 0, "MS": 0, "MT": 22, "AM": 29, "PA": 26, "RO": 0,
+    "RR": 27, "AC": 27, "AP": 29, "MA": 29, "PI": 22, "TO": 0
+})
+
+# ============================
+# Produtos
+# ============================
+PRODUTOS = (
+    " ","Lonil de PVC","Lonil KP","Lonil Inflável KP","Encerado","Duramax",
+    "Lonaleve","Sider Truck Teto","Sider Truck Lateral","Capota Marítima",
+    "Night&Day Plus 1,40","Night&Day Plus 2,00","Night&Day Listrado","Vitro 0,40",
+    "Vitro 0,50","Vitro 0,60","Vitro 0,80","Vitro 1,00","Durasol","Poli Light",
+    "Sunset","Tenda","Tenda 2,3x2,3","Acrylic","Agora","Lona Galpão Teto",
+    "Lona Galpão Lateral","Tela de Sombreamento 30%","Tela de Sombreamento 50%",
+    "Tela de Sombreamento 80%", "Tela de Sombreamento 95%","Geomembrana RV 0,42","Geomembrana RV 0,80",
+    "Geomembrana RV 1,00","Geomembrana ATX 0,80","Geomembrana ATX 1,00",
+    "Geomembrana ATX 1,50","Geo Bio s/ reforço 1,00","Geo Bio s/ reforço 1,20",
+    "Geo Bio s/ reforço 1,50","Geo Bio c/ reforço 1,20","Cristal com Pó",
+    "Cristal com Papel","Cristal Colorido","Filme Liso","Filme Kamurcinha",
+    "Filme Verniz","Block Lux","Filme Dimension","Filme Sarja","Filme Emborrachado",
+    "Filme Pneumático","Adesivo Branco Brilho 0,08","Adesivo Branco Brilho 0,10",
+    "Adesivo Branco Fosco 0,10","Adesivo Preto Brilho 0,08","Adesivo Preto Fosco 0,10",
+    "Adesivo Transparente Brilho 0,08","Adesivo Transparente Jateado 0,08",
+    "Adesivo Mascara Brilho 0,08","Adesivo Aço Escovado 0,08"
+)
+
+# Bobinas destes produtos pedem a espessura (mm)
+PREFIXOS_ESPESSURA = ("Geomembrana", "Geo", "Vitro", "Cristal", "Filme", "Adesivo", "Block Lux")
+
+# Produtos com ST quando vendidos para Revenda
+PRODUTOS_COM_ST = frozenset({"Encerado"})
+
+# Alíquota de IPI como bobina, quando diferente de IPI_RATE_DEFAULT
+IPI_BOBINA_POR_PRODUTO = MappingProxyType({"Encerado": 0.0, "Capota Marítima": IPI_RATE_CAPOTA})
+
+class Produto(NamedTuple):
+    nome: str
+    indice: int  # posição em PRODUTOS (índice do seletor); -1 fora do catálogo
+    ipi_zero: bool  # IPI zero como confeccionado
+    st_elegivel: bool
+    exige_espessura: bool
+    ipi_bobina: float  # alíquota de IPI como bobina
+
+def _produto(nome, indice):
+    return Produto(
+        nome=nome,
+        indice=indice,
+        ipi_zero=nome in IPI_ZERO_PRODS or nome.startswith(IPI_ZERO_PREFIXES),
+        st_elegivel=nome in PRODUTOS_COM_ST,
+        exige_espessura=nome.startswith(PREFIXOS_ESPESSURA),
+        ipi_bobina=IPI_BOBINA_POR_PRODUTO.get(nome, IPI_RATE_DEFAULT),
+    )
+
+CATALOGO = MappingProxyType({nome: _produto(nome, indice) for indice, nome in enumerate(PRODUTOS)})
+
+def info_produto(nome):
+    """Produto do catálogo; para nomes fora dele (orçamentos antigos) as flags são calculadas na hora."""
+    return CATALOGO.get(nome) or _produto(nome or "", -1)
@@ -0,0 +1,757 @@
+"""Banco SQLite dos orçamentos: pool de conexões, migrações, gravação, consultas do Histórico e cache de PDFs.
+
+Não depende do Streamlit e não abre o banco na importação: a primeira chamada a
+conexao_db() cria o pool para DB_NAME (ou para o arquivo passado a configurar()).
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from calcloc.catalogo import FUSO_HORARIO
+from calcloc.instrumentacao import medir
+from calcloc.precificacao import calcular_valores_bobinas, calcular_valores_confeccionados, get_order_summary_info, valores_por_produto
+
+# ============================
+# Banco SQLite
+# ============================
+DB_NAME = "orcamentos.db"
+
+# data_hora é salvo como "%d/%m/%Y %H:%M"; data_hora_iso guarda o mesmo instante como "%Y-%m-%d %H:%M"
+DATA_HORA_FMT = "%d/%m/%Y %H:%M"
+DATA_HORA_ISO_FMT = "%Y-%m-%d %H:%M"
+# Conversão SQL de data_hora para data_hora_iso (usada apenas na migração das linhas antigas)
+_DATA_HORA_ISO_SQL = "(substr(data_hora,7,4) || '-' || substr(data_hora,4,2) || '-' || substr(data_hora,1,2) || ' ' || substr(data_hora,12,5))"
+
+INDICES_DB = [
+    "CREATE INDEX IF NOT EXISTS idx_itens_confeccionados_orcamento_id ON itens_confeccionados(orcamento_id)",
+    "CREATE INDEX IF NOT EXISTS idx_itens_bobinas_orcamento_id ON itens_bobinas(orcamento_id)",
+    # Compostos com data_hora_iso: filtro por cliente/CNPJ/vendedor + intervalo de datas
+    "CREATE INDEX IF NOT EXISTS idx_orcamentos_cliente_nome ON orcamentos(cliente_nome, data_hora_iso)",
+    "CREATE INDEX IF NOT EXISTS idx_orcamentos_cliente_cnpj ON orcamentos(cliente_cnpj, data_hora_iso)",
+    "CREATE INDEX IF NOT EXISTS idx_orcamentos_vendedor_nome ON orcamentos(vendedor_nome, data_hora_iso)",
+]
+
+# ============================
+# Pool de conexões SQLite (compartilhado pelo processo)
+# ============================
+# WAL: leituras não bloqueiam a escrita (e vice-versa); busy_timeout: escritas concorrentes esperam em vez de
+# falhar com "database is locked"; synchronous=NORMAL é seguro com WAL e evita um fsync por commit.
+PRAGMAS_DB = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # 16 MB por conexão
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA temp_store=MEMORY",
+]
+
+class PoolConexoes:
+    """Pool de conexões SQLite reutilizadas entre reruns e sessões.
+
+    Cada conexão é emprestada a uma única thread por vez (as threads de script do
+    Streamlit são recriadas a cada rerun, então conexões por thread não seriam reaproveitadas).
+    """
+
+    def __init__(self, db_name, tamanho_max=8):
+        self.db_name = db_name
+        self._livres = queue.LifoQueue(maxsize=tamanho_max)
+
+    def _nova_conexao(self):
+        conn = sqlite3.connect(self.db_name, timeout=5, check_same_thread=False)
+        for pragma in PRAGMAS_DB:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def conexao(self):
+        try:
+            conn = self._livres.get_nowait()
+        except queue.Empty:
+            conn = self._nova_conexao()
+        try:
+            yield conn
+        finally:
+            # Nunca devolve ao pool uma conexão com transação pendente (ex.: após uma exceção)
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._livres.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def configurar(db_name=DB_NAME, tamanho_max=8):
+    """Aponta conexao_db para outro arquivo de banco (ex.: benchmarks e ferramentas de linha de comando)."""
+    global _pool
+    with _pool_lock:
+        _pool = PoolConexoes(db_name, tamanho_max)
+
+def _pool_conexoes():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(DB_NAME)
+    return _pool
+
+def conexao_db():
+    """Empresta uma conexão do pool do processo: `with conexao_db() as conn: ...`"""
+    return _pool_conexoes().conexao()
+
+# ============================
+# Migrações versionadas (PRAGMA user_version guarda a última migração aplicada)
+# ============================
+def _adicionar_coluna(cur, tabela, coluna, tipo):
+    """ALTER TABLE ADD COLUMN apenas se a coluna ainda não existir (bancos criados por versões antigas)."""
+    colunas = {row[1] for row in cur.execute(f"PRAGMA table_info({tabela})")}
+    if coluna not in colunas:
+        cur.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+        print(f"Migração de DB: Coluna '{coluna}' adicionada à tabela '{tabela}'.")
+
+def _migracao_001_schema_base(cur):
+    # Tabelas originais; bancos anteriores ao controle de versão podem não ter todas as colunas
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS orcamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_hora TEXT,
+            cliente_nome TEXT,
+            cliente_cnpj TEXT,
+            tipo_cliente TEXT,
+            estado TEXT,
+            frete TEXT,
+            tipo_pedido TEXT,
+            vendedor_nome TEXT,
+            vendedor_tel TEXT,
+            vendedor_email TEXT,
+            observacao TEXT,
+            preco_m2_base REAL -- Nome da coluna ajustado para consistência
+        )
+    """)
+    _adicionar_coluna(cur, "orcamentos", "preco_m2_base", "REAL")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS itens_confeccionados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            orcamento_id INTEGER,
+            produto TEXT,
+            comprimento REAL,
+            largura REAL,
+            quantidade INTEGER,
+            cor TEXT,
+            preco_unitario REAL, 
+            FOREIGN KEY (orcamento_id) REFERENCES orcamentos(id)
+        )
+    """)
+    _adicionar_coluna(cur, "itens_confeccionados", "preco_unitario", "REAL")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS itens_bobinas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            orcamento_id INTEGER,
+            produto TEXT,
+            comprimento REAL,
+            largura REAL,
+            quantidade INTEGER,
+            cor TEXT,
+            preco_unitario REAL, 
+            FOREIGN KEY (orcamento_id) REFERENCES orcamentos(id)
+        )
+    """)
+    _adicionar_coluna(cur, "itens_bobinas", "preco_unitario", "REAL")
+    _adicionar_coluna(cur, "itens_bobinas", "espessura", "REAL")
+
+def _migracao_002_data_hora_iso(cur):
+    # Coluna data_hora_iso ("AAAA-MM-DD HH:MM", ordenável e indexável), preenchida a partir de data_hora
+    _adicionar_coluna(cur, "orcamentos", "data_hora_iso", "TEXT")
+    cur.execute(f"""
+        UPDATE orcamentos SET data_hora_iso = {_DATA_HORA_ISO_SQL}
+        WHERE data_hora_iso IS NULL AND data_hora IS NOT NULL
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_orcamentos_data_hora_iso ON orcamentos(data_hora_iso)")
+
+def _migracao_003_indices(cur):
+    # Chaves estrangeiras dos itens e colunas dos filtros do Histórico
+    for ddl in INDICES_DB:
+        cur.execute(ddl)
+
+def _migracao_004_pdf_cache(cur):
+    # Cache de PDFs de orçamentos salvos, endereçado por (orcamento_id, hash das entradas do PDF)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_cache (
+            orcamento_id INTEGER NOT NULL,
+            chave TEXT NOT NULL,
+            pdf BLOB NOT NULL,
+            tamanho INTEGER NOT NULL,
+            ultimo_acesso REAL NOT NULL,
+            PRIMARY KEY (orcamento_id, chave)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_pdf_cache_ultimo_acesso ON pdf_cache(ultimo_acesso)")
+
+def _migracao_005_jobs(cur):
+    # Fila de tarefas em segundo plano (exportações e lotes de PDF); o arquivo gerado fica em disco
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            parametros TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            progresso INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            nome_arquivo TEXT NOT NULL,
+            mime TEXT NOT NULL,
+            arquivo TEXT,
+            erro TEXT,
+            criado_em REAL NOT NULL,
+            concluido_em REAL
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+
+def _migracao_006_totais(cur):
+    # Totais de cada orçamento, gravados junto com o orçamento em salvar_orcamentos_em_lote
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS orcamentos_totais (
+            orcamento_id INTEGER PRIMARY KEY REFERENCES orcamentos(id),
+            m2_total REAL NOT NULL,
+            m_total REAL NOT NULL,
+            valor_bruto REAL NOT NULL,
+            valor_ipi REAL NOT NULL,
+            valor_st REAL NOT NULL,
+            valor_final REAL NOT NULL,
+            produto_mais_selecionado TEXT NOT NULL,
+            tipo_item TEXT NOT NULL
+        )
+    """)
+    # Preenche os orçamentos já existentes, precificados em lotes (DataFrames)
+    ids = [row[0] for row in cur.execute("SELECT id FROM orcamentos WHERE id NOT IN (SELECT orcamento_id FROM orcamentos_totais)")]
+    for inicio in range(0, len(ids), 1000):
+        cur.executemany(INSERT_TOTAIS_SQL, _totais_em_lote(cur.connection, ids[inicio:inicio + 1000]))
+
+def _migracao_007_agregados(cur):
+    # Totais por produto, estado, vendedor e mês, para a página Relatórios; preenchida pela migração 009
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS agregados_vendas (
+            dimensao TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            orcamentos INTEGER NOT NULL,
+            valor_final REAL NOT NULL,
+            m2_total REAL NOT NULL,
+            PRIMARY KEY (dimensao, chave)
+        )
+    """)
+
+def _migracao_008_busca(cur):
+    # Índice FTS5 da busca do Histórico (rowid = id do orçamento); sem acentos e com índices de prefixo
+    # de 2 e 3 caracteres para a busca enquanto se digita
+    cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS orcamentos_busca USING fts5(
+            cliente_nome, cliente_cnpj, cnpj_digitos, observacao, produtos,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    """)
+    cur.execute("""
+        INSERT INTO orcamentos_busca (rowid, cliente_nome, cliente_cnpj, cnpj_digitos, observacao, produtos)
+        SELECT o.id, o.cliente_nome, o.cliente_cnpj, '', o.observacao,
+               (SELECT group_concat(produto, ' ') FROM (
+                    SELECT produto FROM itens_confeccionados WHERE orcamento_id = o.id
+                    UNION SELECT produto FROM itens_bobinas WHERE orcamento_id = o.id))
+        FROM orcamentos o
+    """)
+    # Só dígitos do CNPJ/CPF, para encontrar "12345678" em "12.345.678/0001-90"
+    for orcamento_id, cnpj in cur.execute("SELECT rowid, cliente_cnpj FROM orcamentos_busca").fetchall():
+        cur.execute("UPDATE orcamentos_busca SET cnpj_digitos = ? WHERE rowid = ?", (_somente_digitos(cnpj), orcamento_id))
+
+def _migracao_009_produtos(cur):
+    # Valor final e m² de cada produto de cada orçamento, gravados junto com o orçamento: a dimensão
+    # "produto" dos Relatórios soma os itens de cada produto (antes, o orçamento inteiro ia para o
+    # produto mais selecionado e só a área dos confeccionados contava)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS orcamentos_produtos (
+            orcamento_id INTEGER NOT NULL REFERENCES orcamentos(id),
+            produto TEXT NOT NULL,
+            valor_final REAL NOT NULL,
+            m2_total REAL NOT NULL,
+            PRIMARY KEY (orcamento_id, produto)
+        )
+    """)
+    ids = [row[0] for row in cur.execute("SELECT id FROM orcamentos")]
+    for inicio in range(0, len(ids), 1000):
+        cur.executemany(INSERT_PRODUTOS_SQL, _produtos_em_lote(cur.connection, ids[inicio:inicio + 1000]))
+    _refazer_agregados(cur)
+
+def _migracao_010_area_agregados(cur):
+    # Estado, vendedor e mês passam a somar a área das bobinas também, como a dimensão "produto"
+    _refazer_agregados(cur)
+
+def _refazer_agregados(cur):
+    """Refaz agregados_vendas do zero a partir dos totais e das linhas por produto."""
+    cur.execute("DELETE FROM agregados_vendas")
+    cur.execute(SOMAR_AGREGADOS_SQL, (json.dumps([row[0] for row in cur.execute("SELECT id FROM orcamentos")]),))
+
+# Nunca reordenar nem remover: a posição na lista (1, 2, ...) é a versão gravada em user_version
+MIGRACOES = [
+    _migracao_001_schema_base,
+    _migracao_002_data_hora_iso,
+    _migracao_003_indices,
+    _migracao_004_pdf_cache,
+    _migracao_005_jobs,
+    _migracao_006_totais,
+    _migracao_007_agregados,
+    _migracao_008_busca,
+    _migracao_009_produtos,
+    _migracao_010_area_agregados,
+]
+
+@medir()
+def init_db():
+    """Aplica, numa única transação, as migrações ainda não registradas em PRAGMA user_version."""
+    with conexao_db() as conn:
+        # BEGIN IMMEDIATE: outro processo migrando ao mesmo tempo espera, e a versão é relida dentro da transação
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.cursor()
+            versao = cur.execute("PRAGMA user_version").fetchone()[0]
+            for numero, migracao in enumerate(MIGRACOES[versao:], start=versao + 1):
+                migracao(cur)
+                cur.execute(f"PRAGMA user_version = {numero}")
+                print(f"Migração de DB: versão {numero} aplicada ({migracao.__name__}).")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        # Atualiza as estatísticas do planejador (só reanalisa o que mudou)
+        conn.execute("PRAGMA optimize")
+
+# ============================
+# Função corrigida: salvar_orcamento
+# ============================
+INSERT_TOTAIS_SQL = """
+    INSERT OR REPLACE INTO orcamentos_totais (orcamento_id, m2_total, m_total, valor_bruto, valor_ipi, valor_st, valor_final, produto_mais_selecionado, tipo_item)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_PRODUTOS_SQL = """
+    INSERT OR REPLACE INTO orcamentos_produtos (orcamento_id, produto, valor_final, m2_total) VALUES (?, ?, ?, ?)
+"""
+
+DIMENSOES_AGREGADOS = {"produto": "Produto", "estado": "Estado", "vendedor": "Vendedor", "mes": "Mês"}
+
+# Soma os orçamentos informados (lista JSON de IDs) em agregados_vendas, uma linha por dimensão e chave.
+# Estado, vendedor e mês somam os totais do orçamento; produto soma os itens de cada produto
+# (orcamentos_produtos), então um orçamento conta em cada um dos seus produtos. A área vem sempre de
+# orcamentos_produtos (confeccionados e bobinas), para que o total de m² seja o mesmo em todas as dimensões
+SOMAR_AGREGADOS_SQL = """
+    WITH novos AS (
+        SELECT o.id, o.estado, o.vendedor_nome AS vendedor,
+               substr(o.data_hora_iso, 1, 7) AS mes, t.valor_final,
+               (SELECT COALESCE(SUM(p.m2_total), 0) FROM orcamentos_produtos p WHERE p.orcamento_id = o.id) AS m2_total
+        FROM orcamentos o JOIN orcamentos_totais t ON t.orcamento_id = o.id
+        WHERE o.id IN (SELECT value FROM json_each(?))
+    )
+    INSERT INTO agregados_vendas (dimensao, chave, orcamentos, valor_final, m2_total)
+    SELECT dimensao, chave, COUNT(*), SUM(valor_final), SUM(m2_total) FROM (
+        SELECT 'produto' AS dimensao, p.produto AS chave, p.valor_final, p.m2_total
+        FROM orcamentos_produtos p WHERE p.orcamento_id IN (SELECT id FROM novos)
+        UNION ALL SELECT 'estado', estado, valor_final, m2_total FROM novos
+        UNION ALL SELECT 'vendedor', vendedor, valor_final, m2_total FROM novos
+        UNION ALL SELECT 'mes', mes, valor_final, m2_total FROM novos
+    )
+    GROUP BY dimensao, chave
+    ON CONFLICT (dimensao, chave) DO UPDATE SET
+        orcamentos = orcamentos + excluded.orcamentos,
+        valor_final = valor_final + excluded.valor_final,
+        m2_total = m2_total + excluded.m2_total
+"""
+
+def _somente_digitos(texto):
+    return "".join(c for c in (texto or "") if c.isdigit())
+
+def _totais_orcamento(orcamento):
+    """Totais de um orçamento (dict de salvar_orcamentos_em_lote): (linha de orcamentos_totais, sem o ID;
+    {produto: [valor_final, m2_total]} para orcamentos_produtos).
+
+    Usa as mesmas funções da tela e do PDF, então o valor gravado é o valor exibido.
+    """
+    cliente = orcamento.get("cliente") or {}
+    preco_m2_base = orcamento.get("preco_m2_base") or 0.0
+    tipo_pedido = cliente.get("tipo_pedido", "")
+    itens_conf = orcamento.get("itens_confeccionados") or []
+    itens_bob = orcamento.get("itens_bobinas") or []
+    m2_total, bruto_conf, ipi_conf, final_conf, valor_st, aliquota_st = calcular_valores_confeccionados(
+        itens_conf, preco_m2_base, cliente.get("tipo_cliente", ""), cliente.get("estado", ""), tipo_pedido
+    )
+    m_total, bruto_bob, ipi_bob, final_bob, ipi_rate_bob = calcular_valores_bobinas(itens_bob, preco_m2_base, tipo_pedido)
+    tipo_item, produto_mais_selecionado, _ = get_order_summary_info(
+        [(i['produto'], i['comprimento'], i['largura'], i['quantidade']) for i in itens_conf],
+        [(i['produto'], i['comprimento'], i['largura'], i['quantidade']) for i in itens_bob],
+    )
+    totais = (m2_total, m_total, bruto_conf + bruto_bob, ipi_conf + ipi_bob, valor_st,
+              final_conf + final_bob, produto_mais_selecionado, tipo_item)
+    return totais, valores_por_produto(itens_conf, itens_bob, preco_m2_base, aliquota_st, ipi_rate_bob, tipo_pedido)
+
+def _totais_em_lote(conn, orcamento_ids):
+    """Equivalente em lote de _totais_orcamento para orçamentos já salvos: linhas para INSERT_TOTAIS_SQL."""
+    from calcloc.reprecificacao import precificar_orcamentos, resumir_itens_orcamentos
+
+    cabecalhos, itens_conf, itens_bob = _orcamentos_dataframes(conn, orcamento_ids)
+    totais = precificar_orcamentos(cabecalhos, itens_conf, itens_bob)
+    resumo = resumir_itens_orcamentos(cabecalhos["id"], itens_conf, itens_bob)
+    return list(zip(
+        totais.index.tolist(),
+        totais["m2_total"].tolist(),
+        totais["m_total"].tolist(),
+        (totais["valor_bruto_conf"] + totais["valor_bruto_bob"]).tolist(),
+        (totais["valor_ipi_conf"] + totais["valor_ipi_bob"]).tolist(),
+        totais["valor_st"].tolist(),
+        totais["valor_final_total"].tolist(),
+        resumo["produto_mais_selecionado"].tolist(),
+        resumo["tipo_item"].tolist(),
+    ))
+
+def _produtos_em_lote(conn, orcamento_ids):
+    """Equivalente em lote de valores_por_produto para orçamentos já salvos: linhas para INSERT_PRODUTOS_SQL."""
+    from calcloc.reprecificacao import precificar_orcamentos, valores_por_produto_orcamentos
+
+    cabecalhos, itens_conf, itens_bob = _orcamentos_dataframes(conn, orcamento_ids)
+    totais = precificar_orcamentos(cabecalhos, itens_conf, itens_bob)
+    produtos = valores_por_produto_orcamentos(cabecalhos, itens_conf, itens_bob, totais)
+    return list(zip(
+        produtos["orcamento_id"].tolist(),
+        produtos["produto"].tolist(),
+        produtos["valor_final"].tolist(),
+        produtos["m2_total"].tolist(),
+    ))
+
+def _inserir_orcamento(cur, orcamento, agora):
+    """Insere o cabeçalho e os itens (executemany) de um orçamento; retorna o ID gerado."""
+    cliente = orcamento.get("cliente") or {}
+    vendedor = orcamento.get("vendedor") or {}
+    # Importações podem preservar a data original do orçamento
+    data_hora = orcamento.get("data_hora") or agora
+    cur.execute("""
+        INSERT INTO orcamentos (data_hora, cliente_nome, cliente_cnpj, tipo_cliente, estado, frete, tipo_pedido, vendedor_nome, vendedor_tel, vendedor_email, observacao, preco_m2_base, data_hora_iso)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        data_hora.strftime(DATA_HORA_FMT),
+        cliente.get("nome",""),
+        cliente.get("cnpj",""),
+        cliente.get("tipo_cliente",""),
+        cliente.get("estado",""),
+        cliente.get("frete",""),
+        cliente.get("tipo_pedido",""),
+        vendedor.get("nome",""),
+        vendedor.get("tel",""),
+        vendedor.get("email",""),
+        orcamento.get("observacao", ""),
+        orcamento.get("preco_m2_base"),
+        data_hora.strftime(DATA_HORA_ISO_FMT)
+    ))
+    orcamento_id = cur.lastrowid
+
+    cur.executemany("""
+        INSERT INTO itens_confeccionados (orcamento_id, produto, comprimento, largura, quantidade, cor, preco_unitario)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (orcamento_id, item['produto'], item['comprimento'], item['largura'], item['quantidade'], item.get('cor',''), item.get('preco_unitario'))
+        for item in orcamento.get("itens_confeccionados") or []
+    ])
+
+    cur.executemany("""
+        INSERT INTO itens_bobinas (orcamento_id, produto, comprimento, largura, quantidade, cor, espessura, preco_unitario)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (orcamento_id, item['produto'], item['comprimento'], item['largura'], item['quantidade'], item.get('cor',''), item.get('espessura'), item.get('preco_unitario'))
+        for item in orcamento.get("itens_bobinas") or []
+    ])
+
+    totais, produtos = _totais_orcamento(orcamento)
+    cur.execute(INSERT_TOTAIS_SQL, (orcamento_id, *totais))
+    cur.executemany(INSERT_PRODUTOS_SQL, [(orcamento_id, produto, valor, m2) for produto, (valor, m2) in produtos.items()])
+
+    produtos = dict.fromkeys(item['produto'] for item in (orcamento.get("itens_confeccionados") or []) + (orcamento.get("itens_bobinas") or []))
+    cur.execute("""
+        INSERT INTO orcamentos_busca (rowid, cliente_nome, cliente_cnpj, cnpj_digitos, observacao, produtos)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        orcamento_id, cliente.get("nome",""), cliente.get("cnpj",""), _somente_digitos(cliente.get("cnpj","")),
+        orcamento.get("observacao", ""), " ".join(produtos)
+    ))
+    return orcamento_id
+
+@medir()
+def salvar_orcamentos_em_lote(orcamentos):
+    """Salva vários orçamentos numa única transação (importações, reenvio de carrinhos salvos).
+
+    Cada orçamento é um dict com as chaves cliente, vendedor, itens_confeccionados,
+    itens_bobinas, observacao, preco_m2_base e, opcionalmente, data_hora (datetime).
+    Retorna a lista de IDs na mesma ordem; se um falhar, nenhum é salvo.
+    """
+    agora = datetime.now(FUSO_HORARIO)
+    with conexao_db() as conn:
+        conn.execute("BEGIN")
+        try:
+            cur = conn.cursor()
+            ids = [_inserir_orcamento(cur, orcamento, agora) for orcamento in orcamentos]
+            # Relatórios: soma os novos orçamentos aos agregados na mesma transação
+            cur.execute(SOMAR_AGREGADOS_SQL, (json.dumps(ids),))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return ids
+
+# Sem @medir: a medição fica em salvar_orcamentos_em_lote, senão cada gravação do formulário contaria duas vezes
+def salvar_orcamento(cliente, vendedor, itens_confeccionados, itens_bobinas, observacao, preco_m2_base):
+    return salvar_orcamentos_em_lote([{
+        "cliente": cliente,
+        "vendedor": vendedor,
+        "itens_confeccionados": itens_confeccionados,
+        "itens_bobinas": itens_bobinas,
+        "observacao": observacao,
+        "preco_m2_base": preco_m2_base,
+    }])[0]
+
+# ============================
+# Histórico: filtros e paginação no SQL
+# ============================
+def consulta_busca(texto):
+    """Converte o texto digitado numa consulta FTS5: todos os termos, cada um como prefixo."""
+    termos = "".join(c if c.isalnum() else " " for c in texto or "").split()
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+def _filtros_orcamentos_sql(cliente=None, cnpj=None, id_prefixo="", data_inicio=None, data_fim=None, busca=""):
+    """Monta a cláusula WHERE (e parâmetros) dos filtros do Histórico."""
+    condicoes = []
+    params = []
+    consulta = consulta_busca(busca)
+    if consulta:
+        # Busca textual pelo índice FTS5 (cliente, CNPJ, observação e produtos)
+        condicoes.append("id IN (SELECT rowid FROM orcamentos_busca WHERE orcamentos_busca MATCH ?)")
+        params.append(consulta)
+    if id_prefixo:
+        # Permite pesquisa por prefixo do ID (string); comparação literal, sem os curingas do LIKE (_ e %)
+        condicoes.append("substr(CAST(id AS TEXT), 1, length(?)) = ?")
+        params.extend([str(id_prefixo)] * 2)
+    if cliente and cliente != "Todos":
+        condicoes.append("cliente_nome = ?")
+        params.append(cliente)
+    if cnpj and cnpj != "Todos":
+        condicoes.append("cliente_cnpj = ?")
+        params.append(cnpj)
+    # Intervalo de datas como range scan no índice de data_hora_iso
+    if data_inicio:
+        condicoes.append("data_hora_iso >= ?")
+        params.append(data_inicio.isoformat())
+    if data_fim:
+        condicoes.append("data_hora_iso < ?")
+        params.append((data_fim + timedelta(days=1)).isoformat())
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, params
+
+@medir()
+def buscar_orcamentos(cliente=None, cnpj=None, id_prefixo="", data_inicio=None, data_fim=None, busca="", limit=None, offset=0):
+    where, params = _filtros_orcamentos_sql(cliente, cnpj, id_prefixo, data_inicio, data_fim, busca)
+    sql = f"SELECT id, data_hora, cliente_nome, cliente_cnpj, vendedor_nome FROM orcamentos {where} ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [int(limit), int(offset)]
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    return rows
+
+@medir()
+def contar_orcamentos(cliente=None, cnpj=None, id_prefixo="", data_inicio=None, data_fim=None, busca=""):
+    where, params = _filtros_orcamentos_sql(cliente, cnpj, id_prefixo, data_inicio, data_fim, busca)
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM orcamentos {where}", params)
+        total = cur.fetchone()[0]
+    return total
+
+def sugerir_clientes(busca, limite=8):
+    """Nomes de clientes que casam com a busca (prefixo), para sugestão abaixo da caixa de busca."""
+    consulta = consulta_busca(busca)
+    if not consulta:
+        return []
+    with conexao_db() as conn:
+        cur = conn.execute("""
+            SELECT DISTINCT cliente_nome FROM orcamentos_busca
+            WHERE orcamentos_busca MATCH ? AND cliente_nome != ''
+            ORDER BY rank LIMIT ?
+        """, (f"{{cliente_nome cliente_cnpj cnpj_digitos}}: ({consulta})", limite))
+        return [row[0] for row in cur.fetchall()]
+
+def buscar_intervalo_datas():
+    """Retorna (data_mais_antiga, data_mais_recente) dos orçamentos salvos, ou (None, None)."""
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        # MIN/MAX sobre a coluna indexada são resolvidos direto no índice
+        cur.execute("SELECT MIN(data_hora_iso), MAX(data_hora_iso) FROM orcamentos")
+        min_iso, max_iso = cur.fetchone()
+    if min_iso is None:
+        return None, None
+    return datetime.strptime(min_iso, DATA_HORA_ISO_FMT).date(), datetime.strptime(max_iso, DATA_HORA_ISO_FMT).date()
+
+# ============================
+# Função corrigida: carregar_orcamento_por_id
+# ============================
+@medir()
+def carregar_orcamento_por_id(orcamento_id):
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        # >>> CORREÇÃO 2: Renomeia a coluna mapeada para 'preco_base_utilizado' para melhor semântica.
+        # A ordem dos campos em 'orc_cols' deve corresponder à ordem no CREATE TABLE (SELECT *)
+        orc_cols = ['id','data_hora','cliente_nome','cliente_cnpj','tipo_cliente','estado','frete','tipo_pedido','vendedor_nome','vendedor_tel','vendedor_email','observacao', 'preco_base_utilizado']
+        # Buscando todas as colunas
+        cur.execute("SELECT * FROM orcamentos WHERE id=?", (orcamento_id,))
+        orc = cur.fetchone()
+        cur.execute("SELECT produto, comprimento, largura, quantidade, cor, preco_unitario FROM itens_confeccionados WHERE orcamento_id=?", (orcamento_id,))
+        confecc = cur.fetchall()
+        cur.execute("SELECT produto, comprimento, largura, quantidade, cor, espessura, preco_unitario FROM itens_bobinas WHERE orcamento_id=?", (orcamento_id,))
+        bob = cur.fetchall()
+    return orc, confecc, bob
+
+# ============================
+# Carregamento em lote: carregar_orcamentos_por_ids
+# ============================
+@medir()
+def carregar_orcamentos_por_ids(orcamento_ids):
+    """Carrega vários orçamentos em 3 consultas (cabeçalhos, confeccionados e bobinas).
+
+    Retorna um dict {orcamento_id: (orc, confecc, bob)} com as mesmas tuplas de
+    carregar_orcamento_por_id. Os IDs são passados como um único array JSON
+    (json_each), então o número de consultas não depende da quantidade de IDs.
+    """
+    ids = [int(i) for i in orcamento_ids]
+    if not ids:
+        return {}
+    ids_json = json.dumps(ids)
+
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM orcamentos WHERE id IN (SELECT value FROM json_each(?))", (ids_json,))
+        orcs = cur.fetchall()
+        cur.execute("""
+            SELECT orcamento_id, produto, comprimento, largura, quantidade, cor, preco_unitario
+            FROM itens_confeccionados WHERE orcamento_id IN (SELECT value FROM json_each(?))
+            ORDER BY id
+        """, (ids_json,))
+        confecc_rows = cur.fetchall()
+        cur.execute("""
+            SELECT orcamento_id, produto, comprimento, largura, quantidade, cor, espessura, preco_unitario
+            FROM itens_bobinas WHERE orcamento_id IN (SELECT value FROM json_each(?))
+            ORDER BY id
+        """, (ids_json,))
+        bob_rows = cur.fetchall()
+
+    # Agrupa os itens em memória por orcamento_id
+    confecc_por_id = {}
+    for row in confecc_rows:
+        confecc_por_id.setdefault(row[0], []).append(row[1:])
+    bob_por_id = {}
+    for row in bob_rows:
+        bob_por_id.setdefault(row[0], []).append(row[1:])
+
+    return {
+        orc[0]: (orc, confecc_por_id.get(orc[0], []), bob_por_id.get(orc[0], []))
+        for orc in orcs
+    }
+
+def _orcamentos_dataframes(conn, orcamento_ids):
+    """Orçamentos em DataFrames (cabecalhos, itens_confeccionados, itens_bobinas) para a precificação em lote.
+
+    Os itens trazem a coluna orcamento_id e o preco_unitario salvo; os cabeçalhos vêm em id decrescente.
+    """
+    import pandas as pd
+
+    ids_json = json.dumps([int(i) for i in orcamento_ids])
+    cabecalhos = pd.read_sql_query(
+        "SELECT * FROM orcamentos WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id DESC",
+        conn, params=(ids_json,)
+    )
+    itens_confeccionados = pd.read_sql_query("""
+        SELECT orcamento_id, produto, comprimento, largura, quantidade, cor, preco_unitario
+        FROM itens_confeccionados WHERE orcamento_id IN (SELECT value FROM json_each(?))
+        ORDER BY id
+    """, conn, params=(ids_json,))
+    itens_bobinas = pd.read_sql_query("""
+        SELECT orcamento_id, produto, comprimento, largura, quantidade, cor, espessura, preco_unitario
+        FROM itens_bobinas WHERE orcamento_id IN (SELECT value FROM json_each(?))
+        ORDER BY id
+    """, conn, params=(ids_json,))
+    return cabecalhos, itens_confeccionados, itens_bobinas
+
+def buscar_agregados(dimensao):
+    """Linhas (chave, orcamentos, valor_final, m2_total) de agregados_vendas para uma dimensão."""
+    ordem = "chave" if dimensao == "mes" else "valor_final DESC"
+    with conexao_db() as conn:
+        return conn.execute(
+            f"SELECT chave, orcamentos, valor_final, m2_total FROM agregados_vendas WHERE dimensao = ? ORDER BY {ordem}",
+            (dimensao,)
+        ).fetchall()
+
+def carregar_totais_por_ids(orcamento_ids):
+    """{id: valor_final} da tabela orcamentos_totais."""
+    with conexao_db() as conn:
+        return dict(conn.execute(
+            "SELECT orcamento_id, valor_final FROM orcamentos_totais WHERE orcamento_id IN (SELECT value FROM json_each(?))",
+            (json.dumps([int(i) for i in orcamento_ids]),)
+        ))
+
+def iterar_resumo_orcamentos(filtros, tamanho_lote=1000):
+    """Linhas do resumo de exportação (COLUNAS_RESUMO) dos orçamentos filtrados, lidas com um cursor.
+
+    Os valores vêm de orcamentos_totais: nenhum item é recarregado nem reprecificado.
+    """
+    where, params = _filtros_orcamentos_sql(**filtros)
+    with conexao_db() as conn:
+        cur = conn.execute(f"""
+            SELECT id, cliente_nome, cliente_cnpj, tipo_cliente, estado, frete, tipo_pedido,
+                   t.produto_mais_selecionado, t.tipo_item, COALESCE(preco_m2_base, 0.0), t.m2_total, t.valor_final
+            FROM orcamentos JOIN orcamentos_totais t ON t.orcamento_id = orcamentos.id
+            {where} ORDER BY id DESC
+        """, params)
+        while linhas := cur.fetchmany(tamanho_lote):
+            yield from linhas
+
+# ============================
+# Cache de PDFs (tabela pdf_cache, LRU limitado por tamanho)
+# ============================
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def buscar_pdf_cache(orcamento_id, chave):
+    """Retorna o PDF em cache para (orcamento_id, chave), ou None; um acerto renova o acesso (LRU)."""
+    with conexao_db() as conn:
+        row = conn.execute("SELECT pdf FROM pdf_cache WHERE orcamento_id=? AND chave=?", (orcamento_id, chave)).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE pdf_cache SET ultimo_acesso=? WHERE orcamento_id=? AND chave=?", (time.time(), orcamento_id, chave))
+    return bytes(row[0])
+
+def salvar_pdf_cache(orcamento_id, chave, pdf_bytes):
+    """Guarda um PDF no cache e remove os menos usados recentemente até caber em PDF_CACHE_MAX_BYTES."""
+    with conexao_db() as conn:
+        with conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO pdf_cache (orcamento_id, chave, pdf, tamanho, ultimo_acesso)
+                VALUES (?, ?, ?, ?, ?)
+            """, (orcamento_id, chave, sqlite3.Binary(pdf_bytes), len(pdf_bytes), time.time()))
+            conn.execute("""
+                DELETE FROM pdf_cache WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, SUM(tamanho) OVER (ORDER BY ultimo_acesso DESC, rowid DESC) AS acumulado
+                        FROM pdf_cache
+                    ) WHERE acumulado > ?
+                )
+            """, (PDF_CACHE_MAX_BYTES,))
+
@@ -0,0 +1,73 @@
+"""Exportação do resumo do Histórico (uma linha por orçamento) em CSV ou xlsx.
+
+As linhas chegam como um iterável (normalmente um cursor SQLite) e são gravadas
+no destino uma a uma, então a memória não depende do tamanho do histórico.
+"""
+import csv
+import io
+
+COLUNAS_RESUMO = [
+    "ID", "Nome do Cliente", "CNPJ/CPF", "Tipo do Cliente", "Estado", "Frete", "Tipo do Pedido",
+    "Produto Mais Selecionado", "Tipo do Item", "Preço Base Utilizado (R$)",
+    "Área Total em m² (Confeccionado)", "Final Total (R$)",
+]
+
+# Colunas em reais: gravadas com 2 casas, como aparecem na interface e no PDF
+COLUNAS_MONETARIAS = frozenset(i for i, coluna in enumerate(COLUNAS_RESUMO) if coluna.endswith("(R$)"))
+
+# formato -> (extensão, mime)
+FORMATOS_EXPORTACAO = {
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (".csv", "text/csv"),
+}
+
+def _arredondar_monetarios(linha):
+    return [round(valor, 2) if i in COLUNAS_MONETARIAS and isinstance(valor, float) else valor for i, valor in enumerate(linha)]
+
+def exportar_csv(linhas, destino):
+    """Grava o resumo em CSV (separador ';' e vírgula decimal, como o Excel em pt-BR espera).
+
+    linhas: tuplas na ordem de COLUNAS_RESUMO; destino: arquivo texto.
+    Retorna a quantidade de orçamentos gravados.
+    """
+    writer = csv.writer(destino, delimiter=";", lineterminator="\n")
+    writer.writerow(COLUNAS_RESUMO)
+    total = 0
+    for linha in linhas:
+        writer.writerow([
+            (f"{valor:.2f}" if i in COLUNAS_MONETARIAS else str(valor)).replace(".", ",") if isinstance(valor, float) else valor
+            for i, valor in enumerate(linha)
+        ])
+        total += 1
+    return total
+
+def exportar_xlsx(linhas, destino):
+    """Grava o resumo em xlsx com o modo write_only do openpyxl (linhas não ficam em memória).
+
+    linhas: tuplas na ordem de COLUNAS_RESUMO; destino: arquivo binário ou caminho.
+    Retorna a quantidade de orçamentos gravados.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(COLUNAS_RESUMO)
+    total = 0
+    for linha in linhas:
+        ws.append(_arredondar_monetarios(linha))
+        total += 1
+    wb.save(destino)
+    return total
+
+def exportar_resumo(linhas, destino, formato="xlsx"):
+    """Grava o resumo no arquivo binário `destino` no formato pedido ("xlsx" ou "csv")."""
+    if formato == "csv":
+        # utf-8-sig: o BOM faz o Excel reconhecer os acentos
+        texto = io.TextIOWrapper(destino, encoding="utf-8-sig", newline="")
+        total = exportar_csv(linhas, texto)
+        texto.flush()
+        texto.detach()
+        return total
+    if formato == "xlsx":
+        return exportar_xlsx(linhas, destino)
+    raise ValueError(f"Formato de exportação desconhecido: {formato}")
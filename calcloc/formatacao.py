@@ -0,0 +1,8 @@
+"""Formatação de valores para exibição (tela e PDF)."""
+
+def formatar_brl(valor):
+    """Formata um valor float para a moeda Brasileira R$"""
+    if valor is None:
+        return "R$ 0,00"
+    # Formatação com separadores de milhar e decimal
+    return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
@@ -0,0 +1,311 @@
+"""Importação de orçamentos em lote a partir de planilhas (CSV ou xlsx), sem o Streamlit.
+
+Uso:
+    python -m calcloc.importacao planilha.xlsx [--banco orcamentos.db] [--pdfs pasta|arquivo.zip]
+        [--workers N] [--simular]
+
+A planilha tem uma linha por item. Linhas com o mesmo valor na coluna "orcamento"
+formam um orçamento; os dados do cliente, do vendedor e o preço base são lidos da
+primeira linha de cada orçamento. Colunas (cabeçalho na primeira linha):
+
+    orcamento       chave do orçamento na planilha (obrigatória)
+    cliente_nome, cliente_cnpj, tipo_cliente, estado, frete, tipo_pedido,
+    vendedor_nome, vendedor_tel, vendedor_email, observacao
+    preco_m2        preço base por m² (obrigatória)
+    data_hora       opcional, "dd/mm/aaaa hh:mm"; sem ela vale a data da importação
+    tipo            "Confeccionado" (padrão) ou "Bobina"
+    produto, comprimento, largura, quantidade (obrigatórias)
+    cor, espessura (mm; obrigatória nas bobinas que pedem espessura), preco_unitario
+
+Os orçamentos são precificados com calcular_valores_confeccionados /
+calcular_valores_bobinas e salvos numa única transação (salvar_orcamentos_em_lote):
+se alguma linha for inválida, nada é salvo.
+"""
+import argparse
+import csv
+import math
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from calcloc import db
+from calcloc.catalogo import CATALOGO, ESTADOS, FUSO_HORARIO, info_produto
+from calcloc.formatacao import formatar_brl
+from calcloc.precificacao import calcular_valores_bobinas, calcular_valores_confeccionados
+
+TIPOS_ITEM = ("Confeccionado", "Bobina")
+TIPOS_CLIENTE = (" ", "Consumidor Final", "Revenda")
+TIPOS_PEDIDO = ("Direta", "Industrialização")
+FRETES = ("CIF", "FOB")
+
+# ============================
+# Leitura da planilha
+# ============================
+def _cabecalho(valores):
+    return [str(valor or "").strip().lower() for valor in valores]
+
+def _ler_csv(caminho):
+    # utf-8-sig: aceita o BOM gravado pelo Excel (e por exportar_csv)
+    with open(caminho, encoding="utf-8-sig", newline="") as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        delimitador = ";" if amostra.count(";") >= amostra.count(",") else ","
+        leitor = csv.reader(arquivo, delimiter=delimitador)
+        colunas = _cabecalho(next(leitor, []))
+        for linha in leitor:
+            if any(valor.strip() for valor in linha):
+                yield dict(zip(colunas, linha))
+
+def _ler_xlsx(caminho):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        colunas = _cabecalho(next(linhas, []))
+        for linha in linhas:
+            if any(valor not in (None, "") for valor in linha):
+                yield dict(zip(colunas, linha))
+    finally:
+        wb.close()
+
+def ler_planilha(caminho):
+    """Linhas da planilha como dicts (coluna -> valor), pulando linhas vazias."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".csv":
+        return list(_ler_csv(caminho))
+    if extensao in (".xlsx", ".xlsm"):
+        return list(_ler_xlsx(caminho))
+    raise ValueError(f"Formato de planilha não suportado: {extensao or caminho} (use .csv ou .xlsx)")
+
+# ============================
+# Conversão das linhas em orçamentos
+# ============================
+def _texto(linha, coluna, padrao=""):
+    valor = linha.get(coluna)
+    if valor is None:
+        return padrao
+    valor = str(valor).strip()
+    return valor or padrao
+
+def _numero(linha, coluna, obrigatorio=True):
+    """Número finito da célula; em CSV aceita vírgula decimal ("1.234,5")."""
+    valor = linha.get(coluna)
+    if isinstance(valor, (int, float)):
+        numero = float(valor)
+    else:
+        valor = str(valor or "").strip()
+        if not valor:
+            if obrigatorio:
+                raise ValueError(f"coluna '{coluna}' vazia")
+            return None
+        if "," in valor:
+            valor = valor.replace(".", "").replace(",", ".")
+        try:
+            numero = float(valor)
+        except ValueError:
+            numero = math.nan
+    # float() aceita "nan" e "inf"; NaN passaria por qualquer verificação de mínimo e chegaria ao banco
+    if not math.isfinite(numero):
+        raise ValueError(f"'{valor}' não é um número válido na coluna '{coluna}'")
+    return numero
+
+def _escolha(linha, coluna, opcoes, padrao):
+    valor = _texto(linha, coluna, padrao)
+    if valor not in opcoes:
+        raise ValueError(f"'{valor}' inválido na coluna '{coluna}' (opções: {', '.join(o.strip() or '(vazio)' for o in opcoes)})")
+    return valor
+
+def _data_hora(linha):
+    valor = linha.get("data_hora")
+    if not valor:
+        return None
+    if not isinstance(valor, datetime):
+        try:
+            valor = datetime.strptime(str(valor).strip(), db.DATA_HORA_FMT)
+        except ValueError:
+            raise ValueError(f"data_hora '{valor}' fora do formato dd/mm/aaaa hh:mm") from None
+    if valor > datetime.now(FUSO_HORARIO).replace(tzinfo=None):
+        raise ValueError(f"data_hora '{valor.strftime(db.DATA_HORA_FMT)}' está no futuro")
+    return valor
+
+def _cabecalho_orcamento(linha):
+    cliente = {
+        "nome": _texto(linha, "cliente_nome"),
+        "cnpj": _texto(linha, "cliente_cnpj"),
+        "tipo_cliente": _escolha(linha, "tipo_cliente", TIPOS_CLIENTE, " "),
+        "estado": _escolha(linha, "estado", ESTADOS, "SP"),
+        "frete": _escolha(linha, "frete", FRETES, "CIF"),
+        "tipo_pedido": _escolha(linha, "tipo_pedido", TIPOS_PEDIDO, "Direta"),
+    }
+    vendedor = {
+        "nome": _texto(linha, "vendedor_nome"),
+        "tel": _texto(linha, "vendedor_tel"),
+        "email": _texto(linha, "vendedor_email"),
+    }
+    preco_m2 = _numero(linha, "preco_m2")
+    if preco_m2 < 0:
+        raise ValueError("preco_m2 não pode ser negativo")
+    return {
+        "cliente": cliente,
+        "vendedor": vendedor,
+        "itens_confeccionados": [],
+        "itens_bobinas": [],
+        "observacao": _texto(linha, "observacao"),
+        "preco_m2_base": preco_m2,
+        "data_hora": _data_hora(linha),
+    }
+
+def _item(linha, preco_m2):
+    """(tipo, item) no mesmo formato dos itens adicionados pelo formulário do app."""
+    tipo = _escolha(linha, "tipo", TIPOS_ITEM, "Confeccionado")
+    produto = _texto(linha, "produto")
+    if not produto.strip() or produto not in CATALOGO:
+        raise ValueError(f"produto '{produto}' não está no catálogo")
+    item = {
+        'produto': produto,
+        'comprimento': _numero(linha, "comprimento"),
+        'largura': _numero(linha, "largura"),
+        'quantidade': _numero(linha, "quantidade"),
+        'cor': _texto(linha, "cor"),
+    }
+    if item['comprimento'] <= 0 or item['largura'] <= 0:
+        raise ValueError("comprimento e largura devem ser maiores que zero")
+    if item['quantidade'] < 1 or not item['quantidade'].is_integer():
+        raise ValueError("quantidade deve ser um inteiro maior que zero")
+    item['quantidade'] = int(item['quantidade'])
+    preco_unitario = _numero(linha, "preco_unitario", obrigatorio=False)
+    if preco_unitario is not None and preco_unitario < 0:
+        raise ValueError("preco_unitario não pode ser negativo")
+    item['preco_unitario'] = preco_m2 if preco_unitario is None else preco_unitario
+    if tipo == "Bobina" and info_produto(produto).exige_espessura:
+        item['espessura'] = _numero(linha, "espessura")
+        if item['espessura'] <= 0:
+            raise ValueError("espessura deve ser maior que zero")
+    return tipo, item
+
+def montar_orcamentos(linhas):
+    """Agrupa as linhas por "orcamento" (na ordem da planilha); retorna [(chave, orçamento)].
+
+    Valida todas as linhas antes de retornar: ValueError lista cada linha com problema
+    (a linha 1 é o cabeçalho).
+    """
+    orcamentos = {}
+    erros = []
+    for numero, linha in enumerate(linhas, start=2):
+        try:
+            chave = _texto(linha, "orcamento")
+            if not chave:
+                raise ValueError("coluna 'orcamento' vazia")
+            if chave not in orcamentos:
+                orcamentos[chave] = _cabecalho_orcamento(linha)
+            orcamento = orcamentos[chave]
+            tipo, item = _item(linha, orcamento["preco_m2_base"])
+            orcamento["itens_confeccionados" if tipo == "Confeccionado" else "itens_bobinas"].append(item)
+        except ValueError as e:
+            erros.append(f"linha {numero}: {e}")
+    if erros:
+        raise ValueError("Planilha inválida:\n" + "\n".join(erros))
+    return list(orcamentos.items())
+
+# ============================
+# Precificação, gravação e PDFs
+# ============================
+def precificar(orcamento):
+    """(resumo_conf, resumo_bob) como na tela de Novo Orçamento (None quando não há itens do tipo)."""
+    cliente = orcamento["cliente"]
+    conf = orcamento["itens_confeccionados"]
+    bob = orcamento["itens_bobinas"]
+    resumo_conf = calcular_valores_confeccionados(
+        conf, orcamento["preco_m2_base"], cliente["tipo_cliente"], cliente["estado"], cliente["tipo_pedido"]
+    ) if conf else None
+    resumo_bob = calcular_valores_bobinas(bob, orcamento["preco_m2_base"], cliente["tipo_pedido"]) if bob else None
+    return resumo_conf, resumo_bob
+
+def args_pdf(orcamento_id, orcamento, resumo_conf, resumo_bob):
+    """Argumentos de gerar_pdf para um orçamento importado (os mesmos do botão "Gerar PDF e Salvar")."""
+    cliente = orcamento["cliente"]
+    data_hora = orcamento.get("data_hora")
+    return dict(
+        orcamento_id=orcamento_id,
+        cliente=cliente,
+        vendedor=orcamento["vendedor"],
+        itens_confeccionados=orcamento["itens_confeccionados"],
+        itens_bobinas=orcamento["itens_bobinas"],
+        resumo_conf=resumo_conf,
+        resumo_bob=resumo_bob,
+        observacao=orcamento["observacao"],
+        preco_m2=orcamento["preco_m2_base"],
+        tipo_cliente=cliente["tipo_cliente"],
+        estado=cliente["estado"],
+        data_hora=data_hora.strftime(db.DATA_HORA_FMT) if data_hora else None,
+    )
+
+def gravar_pdfs(tarefas, destino, max_workers=None):
+    """Renderiza os PDFs em paralelo num ZIP (destino terminado em .zip) ou numa pasta; retorna a quantidade."""
+    from calcloc.lote_pdf import exportar_pdfs_zip, pool_pdf, renderizar_pdfs
+
+    executor = pool_pdf(max_workers)
+    if destino.lower().endswith(".zip"):
+        with open(destino, "wb") as arquivo:
+            return exportar_pdfs_zip(tarefas, arquivo, executor=executor)
+    os.makedirs(destino, exist_ok=True)
+    gravados = 0
+    for nome, pdf_bytes in renderizar_pdfs(tarefas, executor):
+        with open(os.path.join(destino, nome), "wb") as arquivo:
+            arquivo.write(pdf_bytes)
+        gravados += 1
+    return gravados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("planilha", help="arquivo .csv ou .xlsx com uma linha por item")
+    parser.add_argument("--banco", default=db.DB_NAME, help=f"banco SQLite do app (padrão: {db.DB_NAME})")
+    parser.add_argument("--pdfs", help="gera os PDFs nesta pasta (ou neste arquivo .zip)")
+    parser.add_argument("--workers", type=int, default=None, help="processos para os PDFs (padrão: número de CPUs)")
+    parser.add_argument("--simular", action="store_true", help="só valida e precifica, sem salvar")
+    args = parser.parse_args(argv)
+
+    try:
+        orcamentos = montar_orcamentos(ler_planilha(args.planilha))
+    except (OSError, ValueError) as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        return 1
+    if not orcamentos:
+        print("Nenhum orçamento na planilha.")
+        return 0
+    resumos = [precificar(orcamento) for _, orcamento in orcamentos]
+
+    if args.simular:
+        ids = [None] * len(orcamentos)
+    else:
+        try:
+            db.configurar(args.banco)
+            db.init_db()
+            ids = db.salvar_orcamentos_em_lote([orcamento for _, orcamento in orcamentos])
+        except sqlite3.Error as e:
+            print(f"ERRO ao salvar em {args.banco}: {e}. Nenhum orçamento foi salvo.", file=sys.stderr)
+            return 1
+
+    total = 0.0
+    for (chave, orcamento), orcamento_id, (resumo_conf, resumo_bob) in zip(orcamentos, ids, resumos):
+        valor_final = (resumo_conf[3] if resumo_conf else 0.0) + (resumo_bob[3] if resumo_bob else 0.0)
+        total += valor_final
+        n_itens = len(orcamento["itens_confeccionados"]) + len(orcamento["itens_bobinas"])
+        destino = f"ID {orcamento_id}" if orcamento_id else "simulado"
+        print(f"{chave}: {destino}, {orcamento['cliente']['nome'] or '-'}, {n_itens} item(ns), {formatar_brl(valor_final)}")
+    acao = "precificado(s)" if args.simular else "salvo(s)"
+    print(f"{len(orcamentos)} orçamento(s) {acao}; total {formatar_brl(total)}")
+
+    if args.pdfs and not args.simular:
+        tarefas = (
+            (f"orcamento_{orcamento_id}.pdf", args_pdf(orcamento_id, orcamento, resumo_conf, resumo_bob))
+            for (_, orcamento), orcamento_id, (resumo_conf, resumo_bob) in zip(orcamentos, ids, resumos)
+        )
+        gravados = gravar_pdfs(tarefas, args.pdfs, args.workers)
+        print(f"{gravados} PDF(s) gravado(s) em {args.pdfs}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
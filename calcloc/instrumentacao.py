@@ -0,0 +1,115 @@
+"""Medição de tempo dos caminhos quentes (banco, precificação, PDF e exportação).
+
+`medir` (decorador) e `medir_bloco` (context manager) registram, por nome, o número de
+chamadas, o tempo total/máximo e um histograma de latência. A medição é ligada com a
+variável de ambiente CALCLOC_METRICAS=1; desligada, cada chamada medida custa apenas a
+verificação de uma flag.
+
+Além do acumulado do processo, cada thread guarda os registros da "rodada" atual
+(no Streamlit, um rerun do script), iniciada por iniciar_rodada().
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites superiores (ms) das faixas do histograma; a última faixa é "acima de 5000 ms"
+LIMITES_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_ativo = os.environ.get("CALCLOC_METRICAS") == "1"
+_lock = threading.Lock()
+_estatisticas = {}
+_rodada = threading.local()
+
+class _Estatistica:
+    __slots__ = ("chamadas", "total_ms", "max_ms", "histograma")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histograma = [0] * (len(LIMITES_MS) + 1)
+
+    def registrar(self, ms):
+        self.chamadas += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.histograma[bisect.bisect_left(LIMITES_MS, ms)] += 1
+
+def metricas_ativas():
+    return _ativo
+
+def ativar(ligado=True):
+    global _ativo
+    _ativo = ligado
+
+def registrar(nome, ms):
+    """Registra uma medição (em ms) no acumulado do processo e na rodada da thread atual."""
+    with _lock:
+        estatistica = _estatisticas.get(nome)
+        if estatistica is None:
+            estatistica = _estatisticas[nome] = _Estatistica()
+        estatistica.registrar(ms)
+    registros = getattr(_rodada, "registros", None)
+    if registros is not None:
+        registros.append((nome, ms))
+
+@contextmanager
+def medir_bloco(nome):
+    if not _ativo:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, (time.perf_counter() - inicio) * 1000)
+
+def medir(nome=None):
+    """Decorador que mede cada chamada da função (nome padrão: o __qualname__ da função)."""
+    def decorador(func):
+        rotulo = nome or func.__qualname__
+
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return func(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registrar(rotulo, (time.perf_counter() - inicio) * 1000)
+        return medida
+    return decorador
+
+def iniciar_rodada():
+    """Começa uma nova rodada na thread atual; retorna o instante inicial (perf_counter)."""
+    _rodada.registros = []
+    return time.perf_counter()
+
+def registros_da_rodada():
+    """Lista de (nome, ms) medidos na rodada atual da thread, na ordem das chamadas."""
+    return list(getattr(_rodada, "registros", None) or [])
+
+def _faixa(indice):
+    return f"<= {LIMITES_MS[indice]} ms" if indice < len(LIMITES_MS) else f"> {LIMITES_MS[-1]} ms"
+
+def resumo():
+    """Acumulado do processo por nome: chamadas, total/média/máximo (ms) e histograma por faixa."""
+    with _lock:
+        return {
+            nome: {
+                "chamadas": e.chamadas,
+                "total_ms": round(e.total_ms, 3),
+                "media_ms": round(e.total_ms / e.chamadas, 3),
+                "max_ms": round(e.max_ms, 3),
+                "histograma": {_faixa(i): n for i, n in enumerate(e.histograma) if n},
+            }
+            for nome, e in sorted(_estatisticas.items())
+        }
+
+def zerar():
+    with _lock:
+        _estatisticas.clear()
@@ -0,0 +1,159 @@
+"""Tarefas em segundo plano (tabela jobs): exportação do Histórico e PDFs em ZIP.
+
+Exportações e lotes de PDF rodam numa thread do processo, fora do script da sessão: a página
+continua respondendo, e a tarefa (e o arquivo gerado) sobrevivem a reruns e reconexões do navegador.
+As threads só são criadas na primeira chamada a executor_jobs() (ou enfileirar_job()).
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from calcloc.db import buscar_orcamentos, conexao_db, iterar_resumo_orcamentos
+from calcloc.exportacao import exportar_resumo
+from calcloc.instrumentacao import medir
+from calcloc.lote_pdf import exportar_pdfs_zip
+from calcloc.pdf import tarefas_pdf_orcamentos
+
+JOBS_DIR = "exportacoes"
+JOBS_WORKERS = 2
+JOBS_RETENCAO_SEGUNDOS = 7 * 24 * 3600  # arquivos de tarefas concluídas são mantidos por 7 dias
+JOBS_PROGRESSO_INTERVALO = 1.0  # no máximo uma gravação de progresso por segundo
+
+ROTULOS_JOBS = {"exportacao": "Exportação do Histórico", "pdf_zip": "PDFs (ZIP)"}
+
+def parametros_job(filtros, **extras):
+    """Serializa os filtros do Histórico (datas em ISO) e parâmetros extras de uma tarefa."""
+    filtros = {k: v.isoformat() if hasattr(v, "isoformat") else v for k, v in filtros.items()}
+    return dict(extras, filtros=filtros)
+
+def _filtros_do_job(parametros):
+    filtros = dict(parametros["filtros"])
+    for chave in ("data_inicio", "data_fim"):
+        if filtros.get(chave):
+            filtros[chave] = datetime.fromisoformat(filtros[chave]).date()
+    return filtros
+
+def _atualizar_job(job_id, **campos):
+    with conexao_db() as conn:
+        conn.execute(f"UPDATE jobs SET {', '.join(f'{c} = ?' for c in campos)} WHERE id = ?", [*campos.values(), job_id])
+        conn.commit()
+
+def _progresso_job(job_id):
+    """Callback de progresso que grava no banco com intervalo mínimo de JOBS_PROGRESSO_INTERVALO."""
+    ultima = 0.0
+
+    def registrar(feitos):
+        nonlocal ultima
+        if time.monotonic() - ultima >= JOBS_PROGRESSO_INTERVALO:
+            ultima = time.monotonic()
+            _atualizar_job(job_id, progresso=feitos)
+    return registrar
+
+@medir("exportacao_historico")
+def _job_exportacao(job_id, parametros, destino):
+    progresso = _progresso_job(job_id)
+
+    def linhas():
+        for feitos, linha in enumerate(iterar_resumo_orcamentos(_filtros_do_job(parametros)), start=1):
+            yield linha
+            progresso(feitos)
+    exportar_resumo(linhas(), destino, parametros["formato"])
+
+@medir("exportacao_pdf_zip")
+def _job_pdf_zip(job_id, parametros, destino):
+    ids = [o[0] for o in buscar_orcamentos(**_filtros_do_job(parametros))]
+    exportar_pdfs_zip(tarefas_pdf_orcamentos(ids), destino, progresso=_progresso_job(job_id))
+
+TIPOS_JOBS = {"exportacao": _job_exportacao, "pdf_zip": _job_pdf_zip}
+
+def _executar_job(job_id):
+    with conexao_db() as conn:
+        # Reserva atômica: só uma thread passa uma tarefa de 'pendente' para 'executando'
+        cur = conn.execute("UPDATE jobs SET status = 'executando' WHERE id = ? AND status = 'pendente'", (job_id,))
+        conn.commit()
+        if cur.rowcount == 0:
+            return
+        tipo, parametros, nome_arquivo = conn.execute(
+            "SELECT tipo, parametros, nome_arquivo FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    caminho = os.path.join(JOBS_DIR, f"{job_id}_{nome_arquivo}")
+    try:
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        with open(caminho, "wb") as destino:
+            TIPOS_JOBS[tipo](job_id, json.loads(parametros), destino)
+    except Exception as e:
+        print(f"Tarefa {job_id} ({tipo}) falhou: {e}")
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        _atualizar_job(job_id, status="erro", erro=str(e), concluido_em=time.time())
+    else:
+        with conexao_db() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'concluido', progresso = total, arquivo = ?, concluido_em = ? WHERE id = ?",
+                (caminho, time.time(), job_id)
+            )
+            conn.commit()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def executor_jobs():
+    """Threads de tarefas do processo, criadas na primeira chamada. Ao criar, retoma as pendentes e marca as interrompidas."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOBS_WORKERS, thread_name_prefix="calcloc-job")
+            with conexao_db() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'erro', erro = 'Interrompida: o app foi reiniciado.', concluido_em = ? WHERE status = 'executando'",
+                    (time.time(),)
+                )
+                conn.commit()
+                pendentes = [row[0] for row in conn.execute("SELECT id FROM jobs WHERE status = 'pendente' ORDER BY id")]
+            for job_id in pendentes:
+                _executor.submit(_executar_job, job_id)
+    return _executor
+
+def _limpar_jobs_antigos():
+    """Remove tarefas finalizadas há mais de JOBS_RETENCAO_SEGUNDOS e seus arquivos."""
+    with conexao_db() as conn:
+        antigos = conn.execute(
+            "SELECT id, arquivo FROM jobs WHERE status IN ('concluido', 'erro') AND concluido_em < ?",
+            (time.time() - JOBS_RETENCAO_SEGUNDOS,)
+        ).fetchall()
+        for job_id, arquivo in antigos:
+            if arquivo and os.path.exists(arquivo):
+                os.remove(arquivo)
+        conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id, _ in antigos])
+        conn.commit()
+
+def enfileirar_job(tipo, parametros, nome_arquivo, mime, total=0):
+    """Registra uma tarefa e a envia às threads de segundo plano; retorna o ID da tarefa."""
+    _limpar_jobs_antigos()
+    with conexao_db() as conn:
+        cur = conn.execute(
+            "INSERT INTO jobs (tipo, parametros, nome_arquivo, mime, total, criado_em) VALUES (?, ?, ?, ?, ?, ?)",
+            (tipo, json.dumps(parametros), nome_arquivo, mime, total, time.time())
+        )
+        conn.commit()
+        job_id = cur.lastrowid
+    executor_jobs().submit(_executar_job, job_id)
+    return job_id
+
+def listar_jobs(limite=10):
+    with conexao_db() as conn:
+        return conn.execute("""
+            SELECT id, tipo, status, progresso, total, nome_arquivo, mime, arquivo, erro, criado_em
+            FROM jobs ORDER BY id DESC LIMIT ?
+        """, (limite,)).fetchall()
+
+def ha_jobs_ativos():
+    with conexao_db() as conn:
+        return bool(conn.execute("SELECT EXISTS (SELECT 1 FROM jobs WHERE status IN ('pendente', 'executando'))").fetchone()[0])
+
+def ler_arquivo_job(caminho):
+    with open(caminho, "rb") as f:
+        return f.read()
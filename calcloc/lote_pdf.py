@@ -0,0 +1,128 @@
+"""Exportação de muitos PDFs de orçamento (num único ZIP ou um a um), renderizados em paralelo.
+
+Os PDFs são gerados por gerar_pdf no pool de processos do processo (pool_pdf) e
+entregues (ou gravados no ZIP) na ordem das tarefas, assim que cada um fica pronto.
+Apenas uma janela de tarefas fica em andamento por vez, então a memória não cresce com o número de orçamentos.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import types
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from calcloc.pdf import gerar_pdf
+
+# Os workers nunca nascem de um fork do processo do app (que tem várias threads: um fork feito
+# enquanto outra thread segura um lock deixa o lock preso no worker). Com "forkserver", eles vêm
+# de um processo servidor de uma única thread, que já importou este módulo e o fpdf2
+_METODO = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+_contexto_base = multiprocessing.get_context(_METODO)
+
+class ProcessoPDF(_contexto_base.Process):
+    """Worker de PDF que não reexecuta o __main__ do processo pai.
+
+    Sob o Streamlit, sys.modules["__main__"] é o script do app: com "forkserver" ou "spawn",
+    cada worker importaria esse módulo (a interface inteira) antes de começar. Os workers só
+    precisam de calcloc.lote_pdf, então o __main__ fica escondido enquanto o worker é criado.
+    """
+
+    def start(self):
+        principal = sys.modules["__main__"]
+        neutro = sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            super().start()
+        finally:
+            # Um rerun do Streamlit pode ter instalado outro __main__ nesse meio-tempo: não o sobrescreve
+            if sys.modules["__main__"] is neutro:
+                sys.modules["__main__"] = principal
+
+class _ContextoPDF(type(_contexto_base)):
+    Process = ProcessoPDF
+
+def contexto_processos():
+    """Contexto de multiprocessing para os workers de PDF ("forkserver", ou "spawn" onde não houver)."""
+    contexto = _ContextoPDF()
+    if _METODO == "forkserver":
+        # Só vale se o servidor ainda não tiver sido iniciado neste processo
+        contexto.set_forkserver_preload(["calcloc.lote_pdf", "fpdf"])
+    return contexto
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool_pdf(max_workers=None):
+    """Pool de processos dos PDFs, criado na primeira chamada e reutilizado pelo resto do processo.
+
+    Os workers são criados sob demanda, no primeiro PDF. max_workers só vale na criação
+    (padrão: número de CPUs). Um pool quebrado (worker morto) é descartado e substituído.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto_processos())
+    return _pool
+
+def descartar_pool_pdf(executor):
+    """Depois de um BrokenProcessPool: encerra o pool e, se for o de pool_pdf(), a próxima chamada cria outro."""
+    global _pool
+    with _pool_lock:
+        if _pool is executor:
+            _pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def encerrar_pool_pdf():
+    """Encerra os workers de pool_pdf(); a próxima chamada cria um pool novo."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def _renderizar(args_pdf):
+    # Executado nos workers: precisa ser uma função de módulo (picklable)
+    return gerar_pdf(**args_pdf)
+
+def renderizar_pdfs(tarefas, executor=None, janela=None):
+    """Renderiza os PDFs em paralelo e gera (nome_arquivo, bytes do PDF) na ordem das tarefas.
+
+    tarefas: iterável (pode ser um gerador) de (nome_arquivo, kwargs de gerar_pdf).
+    executor: pool de processos a usar (padrão: pool_pdf()).
+    janela: PDFs em andamento ou aguardando consumo por vez (padrão: 2 por CPU).
+    """
+    executor = executor or pool_pdf()
+    janela = janela or 2 * (os.cpu_count() or 1)
+    pendentes = deque()
+    try:
+        for nome, args_pdf in tarefas:
+            pendentes.append((nome, executor.submit(_renderizar, args_pdf)))
+            if len(pendentes) >= janela:
+                nome_pronto, futuro = pendentes.popleft()
+                yield nome_pronto, futuro.result()
+        while pendentes:
+            nome_pronto, futuro = pendentes.popleft()
+            yield nome_pronto, futuro.result()
+    except BrokenProcessPool:
+        descartar_pool_pdf(executor)
+        raise
+
+def exportar_pdfs_zip(tarefas, destino, progresso=None, executor=None, janela=None):
+    """Renderiza os PDFs em paralelo e grava cada um em `destino` (arquivo binário) como ZIP.
+
+    tarefas: iterável (pode ser um gerador) de (nome_arquivo, kwargs de gerar_pdf).
+    progresso: callback opcional chamado com o número de PDFs já gravados.
+    executor / janela: como em renderizar_pdfs.
+    Retorna a quantidade de PDFs gravados.
+    """
+    gravados = 0
+    # Os PDFs já são comprimidos internamente; ZIP_STORED evita recomprimir
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_STORED) as zf:
+        for nome, pdf_bytes in renderizar_pdfs(tarefas, executor, janela):
+            zf.writestr(nome, pdf_bytes)
+            gravados += 1
+            if progresso:
+                progresso(gravados)
+    return gravados
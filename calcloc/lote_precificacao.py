@@ -0,0 +1,86 @@
+"""Cálculo vetorizado (NumPy) de lotes grandes de itens, equivalente a calcloc.precificacao.
+
+As funções calcular_lote_* fazem o cálculo de calcular_valores_* sobre um LoteItens colunar,
+numa única passada vetorizada. Fica fora de calcloc.precificacao para que o app, que só
+precifica o formulário, não pague a importação do NumPy na inicialização.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from calcloc.catalogo import IPI_RATE_DEFAULT, st_por_estado
+from calcloc.precificacao import _ipi_bobinas, _ipi_confeccionado, _tem_st
+
+class LoteItens(NamedTuple):
+    """Itens em formato colunar: um array NumPy por campo (preco_unitario é NaN quando ausente)."""
+    produto: np.ndarray
+    comprimento: np.ndarray
+    largura: np.ndarray
+    quantidade: np.ndarray
+    preco_unitario: np.ndarray
+
+    def __len__(self):
+        return len(self.produto)
+
+def lote_de_itens(itens):
+    """Converte uma lista de dicts de itens (formulário/banco) em um LoteItens."""
+    precos = [item.get('preco_unitario') for item in itens]
+    return LoteItens(
+        produto=np.array([item.get('produto', '') for item in itens], dtype=object),
+        comprimento=np.array([item['comprimento'] for item in itens], dtype=float),
+        largura=np.array([item['largura'] for item in itens], dtype=float),
+        quantidade=np.array([item['quantidade'] for item in itens], dtype=float),
+        preco_unitario=np.array([np.nan if p is None else p for p in precos], dtype=float),
+    )
+
+def _precos_do_lote(lote, preco_m2):
+    """Preço por item: preco_unitario quando informado, senão o preco_m2 do orçamento."""
+    return np.where(np.isnan(lote.preco_unitario), preco_m2, lote.preco_unitario)
+
+def _ipi_por_produto(produtos):
+    """Alíquota de IPI (confeccionado) por item, calculada uma vez por produto distinto."""
+    produtos = produtos.tolist()
+    aliquotas = {produto: _ipi_confeccionado(produto or '') for produto in set(produtos)}
+    return np.fromiter((aliquotas[produto] for produto in produtos), dtype=float, count=len(produtos))
+
+def calcular_lote_confeccionados(lote, preco_m2, tipo_cliente="", estado="", tipo_pedido="Direta"):
+    """Equivalente vetorizado de calcular_valores_confeccionados (mesma tupla de retorno)."""
+    if len(lote) == 0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 0
+
+    area = lote.comprimento * lote.largura * lote.quantidade
+    valor_bruto_itens = area * _precos_do_lote(lote, preco_m2)
+    m2_total = float(area.sum())
+    valor_bruto = float(valor_bruto_itens.sum())
+
+    if tipo_pedido == "Industrialização":
+        return m2_total, valor_bruto, 0.0, valor_bruto, 0.0, 0
+
+    valor_ipi = float((valor_bruto_itens * _ipi_por_produto(lote.produto)).sum())
+    valor_final = valor_bruto + valor_ipi
+
+    valor_st = 0.0
+    aliquota_st = 0
+    if tipo_cliente == "Revenda" and _tem_st(lote.produto.tolist()):
+        aliquota_st = st_por_estado.get(estado, 0)
+        valor_st = valor_final * aliquota_st / 100
+        valor_final += valor_st
+
+    return m2_total, valor_bruto, valor_ipi, valor_final, valor_st, aliquota_st
+
+def calcular_lote_bobinas(lote, preco_m2, tipo_pedido="Direta"):
+    """Equivalente vetorizado de calcular_valores_bobinas (mesma tupla de retorno)."""
+    if len(lote) == 0:
+        return 0.0, 0.0, 0.0, 0.0, IPI_RATE_DEFAULT
+
+    metros = lote.comprimento * lote.quantidade
+    m_total = float(metros.sum())
+    valor_bruto = float((metros * _precos_do_lote(lote, preco_m2)).sum())
+
+    if tipo_pedido == "Industrialização":
+        return m_total, valor_bruto, 0.0, valor_bruto, 0.0
+
+    ipi_rate_to_use = _ipi_bobinas(lote.produto.tolist())
+
+    valor_ipi = valor_bruto * ipi_rate_to_use
+    return m_total, valor_bruto, valor_ipi, valor_bruto + valor_ipi, ipi_rate_to_use
@@ -0,0 +1,276 @@
+"""Renderização do PDF de orçamento (FPDF).
+
+Os recursos do PDF são carregados uma vez por processo: os bytes do logo são lidos
+do disco na primeira renderização e reaproveitados (via BytesIO) nas seguintes. O JPEG
+é embutido como está (DCTDecode), então não há decodificação da imagem por documento.
+As métricas da fonte (Arial -> Helvetica, fonte padrão do PDF) já vêm das tabelas do
+próprio fpdf2. O fpdf2 em si só é importado na primeira renderização, para não pesar
+na inicialização do app.
+
+Os PDFs de orçamentos salvos (Histórico) ficam em cache na tabela pdf_cache (calcloc.db).
+"""
+import functools
+import hashlib
+import io
+import json
+from datetime import datetime
+
+from calcloc import db
+from calcloc.catalogo import FUSO_HORARIO
+from calcloc.formatacao import formatar_brl
+from calcloc.instrumentacao import medir
+from calcloc.precificacao import calcular_valores_bobinas
+
+# Caminho relativo ao diretório de execução do app (como no Streamlit Cloud)
+LOGO_PATH = "LOCOMOTIVA.JPG"
+
+# ============================
+# Recursos carregados uma vez por processo
+# ============================
+@functools.lru_cache(maxsize=None)
+def carregar_logo():
+    """Bytes do logo (LOGO_PATH), lidos uma única vez; None se o arquivo não existir ou não puder ser lido."""
+    try:
+        with open(LOGO_PATH, "rb") as arquivo:
+            return arquivo.read()
+    except OSError as e:
+        print(f"Logo não carregado ({LOGO_PATH}): {e}. Os PDFs serão gerados sem o logo.")
+        return None
+
+def _texto(pdf, largura, altura, txt):
+    """multi_cell com atalho para textos de uma linha (a maioria das linhas de item).
+
+    A quebra de linha do multi_cell mede o texto caractere a caractere e domina o tempo
+    de renderização; quando o texto cabe numa linha, um cell produz o mesmo resultado.
+    """
+    from fpdf import XPos, YPos
+
+    if "\n" not in txt and pdf.get_string_width(txt) <= largura - 2 * pdf.c_margin:
+        pdf.cell(largura, altura, txt, new_x=XPos.RIGHT, new_y=YPos.NEXT)
+    else:
+        pdf.multi_cell(largura, altura, txt)
+
+# ============================
+# Geração do PDF
+# ============================
+@medir()
+def gerar_pdf(orcamento_id, cliente, vendedor, itens_confeccionados, itens_bobinas, resumo_conf, resumo_bob, observacao, preco_m2, tipo_cliente="", estado="", data_hora=None):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", "B", 14)
+
+    # 1. INSERIR LOGO NO TOPO (bytes já carregados; sem logo, cabeçalho centralizado)
+    logo = carregar_logo()
+    if logo:
+        largura_da_imagem_no_pdf = 30 
+        posicao_x = 88 
+        posicao_y = 5 
+        
+        pdf.image(io.BytesIO(logo), x=posicao_x, y=posicao_y, w=largura_da_imagem_no_pdf, h=0) 
+        
+        pdf.set_y(posicao_y + 20) 
+        
+        pdf.set_font("Arial", "B", 14)
+        pdf.set_x(posicao_x + largura_da_imagem_no_pdf - 52) 
+        pdf.cell(0, 12, "Orçamento - Grupo Locomotiva", ln=True, align="L")
+        
+    else:
+        # O BLOCO ABAIXO PRECISA ESTAR INDENTADO COM 4 ESPAÇOS
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 12, "Orçamento - Grupo Locomotiva", ln=True, align="C") # Linha 270
+        
+
+    if orcamento_id:
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, 6, f"ID do Orçamento: {orcamento_id}", ln=True, align="C")
+    
+    pdf.ln(10)
+    pdf.set_font("Arial", size=9)
+    # Orçamentos salvos mostram a própria data (PDF reproduzível); novos, o horário atual
+    if not data_hora:
+        data_hora = datetime.now(FUSO_HORARIO).strftime('%d/%m/%Y %H:%M')
+    pdf.cell(0, 6, f"Data e Hora: {data_hora}", ln=True)
+    pdf.cell(0, 6, "Validade da Cotação: 7 dias.", ln=True, align="L")
+    pdf.ln(4)
+
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(0, 6, "Cliente", ln=True)
+    pdf.set_font("Arial", size=10)
+    largura_util = pdf.w - 2*pdf.l_margin
+
+    for chave in ["nome", "cnpj", "tipo_cliente", "estado", "frete", "tipo_pedido"]:
+        valor = str(cliente.get(chave, "") or "")
+        if valor.strip():
+            pdf.cell(0, 6, f"{chave.replace('_',' ').title()}: {valor}", align="L")
+            pdf.ln(5)
+    pdf.ln(5)
+
+    # Itens Confeccionados
+    if itens_confeccionados:
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, 8, "Itens Confeccionados", ln=True)
+        pdf.set_font("Arial", size=8)
+        for item in itens_confeccionados:
+            area_item = item['comprimento'] * item['largura'] * item['quantidade']
+            # Usa o preço por m² do item, se existir (foi salvo com o preco_m2 do input)
+            preco_item = item.get('preco_unitario', preco_m2) 
+            valor_item = area_item * preco_item
+            txt = (
+                f"{item['quantidade']}x {item['produto']} - {item['comprimento']}m x {item['largura']}m "
+                f"| Cor: {item.get('cor','')} | Valor Bruto: {formatar_brl(valor_item)}"
+            )
+            _texto(pdf, largura_util, 6, txt)
+            pdf.ln(1)
+
+    # Resumo Confeccionados
+    if resumo_conf:
+        m2_total, valor_bruto, valor_ipi, valor_final, valor_st, aliquota_st = resumo_conf
+        pdf.ln(3)
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, 10, "Resumo - Confeccionados", ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.cell(0, 8, f"Preço por m² utilizado: {formatar_brl(preco_m2)}", ln=True)
+        pdf.cell(0, 8, f"Área Total: {str(f'{m2_total:.2f}'.replace('.', ','))} m²", ln=True)
+        pdf.cell(0, 8, f"Valor Bruto: {formatar_brl(valor_bruto)}", ln=True)
+        if valor_ipi>0:
+            pdf.cell(0, 8, f"IPI: {formatar_brl(valor_ipi)}", ln=True)
+        if valor_st>0:
+            pdf.cell(0, 8, f"ST ({aliquota_st}%): {formatar_brl(valor_st)}", ln=True)
+        pdf.set_font("Arial", "B", 10)
+        pdf.cell(0, 8, f"Valor Total: {formatar_brl(valor_final)}", ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.ln(10)
+
+    # Itens Bobinas
+    if itens_bobinas:
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, 8, "Itens Bobina", ln=True)
+        pdf.set_font("Arial", size=8)
+        for item in itens_bobinas:
+            metros_item = item['comprimento'] * item['quantidade']
+            preco_item = item.get('preco_unitario') if item.get('preco_unitario') is not None else preco_m2
+            valor_item = metros_item * preco_item
+            txt = (
+                f"{item['quantidade']}x {item['produto']} - {item['comprimento']}m | Largura: {item['largura']}m "
+                f"| Cor: {item.get('cor','')} | Valor Bruto: {formatar_brl(valor_item)}"
+            )
+            if "espessura" in item and item.get('espessura') is not None:
+                esp = f"{item['espessura']:.2f}".replace(".", ",")
+                txt += f" | Esp: {esp} mm"
+                txt += f" | Preço metro: {formatar_brl(preco_item)}"
+            _texto(pdf, largura_util, 6, txt)
+            pdf.ln(1)
+
+        if resumo_bob:
+            # Resumo Bobinas espera 5 valores
+            m_total, valor_bruto, valor_ipi, valor_final, ipi_rate = resumo_bob 
+            pdf.ln(3)
+            pdf.set_font("Arial", "B", 11)
+            pdf.cell(0, 10, "Resumo - Bobinas", ln=True)
+            pdf.set_font("Arial", "", 10)
+            pdf.cell(0, 8, f"Total de Metros Lineares: {str(f'{m_total:.2f}'.replace('.', ','))} m", ln=True)
+            pdf.cell(0, 8, f"Valor Bruto: {formatar_brl(valor_bruto)}", ln=True)
+            if valor_ipi>0:
+                ipi_percent = ipi_rate * 100
+                # Exibe a alíquota correta
+                pdf.cell(0, 8, f"IPI ({ipi_percent:.2f}%): {formatar_brl(valor_ipi)}", ln=True)
+            pdf.set_font("Arial", "B", 10)
+            pdf.cell(0, 8, f"Valor Total: {formatar_brl(valor_final)}", ln=True)
+        pdf.ln(10)
+
+    # Observações
+    if observacao:
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, 11, "Observações", ln=True)
+        pdf.set_font("Arial", size=10)
+        # Usa multi_cell para texto longo
+        _texto(pdf, largura_util, 10, str(observacao))
+        pdf.ln(10)
+
+    # Vendedor
+    if vendedor:
+        pdf.set_font("Arial", "", 10)
+        vendedor_txt = (
+            f"Vendedor: {vendedor.get('nome','')}\n"
+            f"Telefone: {vendedor.get('tel','')}\n"
+            f"E-mail: {vendedor.get('email','')}"
+        )
+        _texto(pdf, largura_util, 8, vendedor_txt)
+        pdf.ln(5)
+
+    # fpdf2 devolve um bytearray (a API antiga de string latin-1 não existe mais)
+    pdf_bytes = bytes(pdf.output())
+    return pdf_bytes
+
+# ============================
+# PDF de orçamento salvo (gerado sob demanda no Histórico, com cache no banco)
+# ============================
+def args_pdf_orcamento_salvo(orc, confecc, bob):
+    """Argumentos de gerar_pdf para um orçamento salvo."""
+    # orc: linha completa de 'orcamentos' (SELECT *), confecc/bob: tuplas de carregar_orcamento_por_id
+    preco_m2_base = orc[12] if orc[12] is not None else 0.0
+    itens_bob_calc = [dict(zip(['produto','comprimento','largura','quantidade','cor','espessura','preco_unitario'], b)) for b in bob]
+    # Chamada retorna 5 valores
+    resumo_bob_calc = calcular_valores_bobinas(
+        itens_bob_calc, preco_m2_base, orc[7]
+    ) if itens_bob_calc else (0, 0, 0, 0, 0.0975)
+
+    args_pdf = dict(
+        orcamento_id=orc[0],
+        cliente={
+            "nome": orc[2],
+            "cnpj": orc[3],
+            "tipo_cliente": orc[4],
+            "estado": orc[5],
+            "frete": orc[6],
+            "tipo_pedido": orc[7]
+        },
+        vendedor={
+            "nome": orc[8],
+            "tel": orc[9],
+            "email": orc[10]
+        },
+        itens_confeccionados=[dict(zip(['produto','comprimento','largura','quantidade','cor'],c)) for c in confecc],
+        itens_bobinas=itens_bob_calc,
+        resumo_conf=None,
+        resumo_bob=resumo_bob_calc, # Passa o resumo de 5 itens
+        observacao=orc[11],
+        preco_m2=preco_m2_base,
+        data_hora=orc[1]
+    )
+    return args_pdf
+
+# Incrementar ao mudar o layout de gerar_pdf, para invalidar os PDFs já em cache
+PDF_LAYOUT_VERSAO = 1
+
+@medir()
+def gerar_pdf_orcamento_salvo(orc, confecc, bob, renderizar=None):
+    """PDF de um orçamento salvo, servido do cache quando as entradas não mudaram.
+
+    renderizar: função opcional args_pdf -> bytes para gerar o PDF fora deste processo
+    (padrão: gerar_pdf aqui mesmo).
+    """
+    args_pdf = args_pdf_orcamento_salvo(orc, confecc, bob)
+    # Chave = hash de tudo que entra no PDF: mesmo conteúdo, mesmo PDF
+    conteudo = json.dumps([PDF_LAYOUT_VERSAO, LOGO_PATH if carregar_logo() else None, args_pdf], sort_keys=True, default=str)
+    chave = hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+    pdf_bytes = db.buscar_pdf_cache(orc[0], chave)
+    if pdf_bytes is None:
+        pdf_bytes = renderizar(args_pdf) if renderizar else gerar_pdf(**args_pdf)
+        db.salvar_pdf_cache(orc[0], chave, pdf_bytes)
+    return pdf_bytes
+
+# Orçamentos lidos do banco por vez na exportação em ZIP (limita a memória)
+ZIP_LOTE_ORCAMENTOS = 200
+
+def tarefas_pdf_orcamentos(orcamento_ids):
+    """Gera (nome_arquivo, args de gerar_pdf) para cada orçamento, lendo o banco em lotes."""
+    for inicio in range(0, len(orcamento_ids), ZIP_LOTE_ORCAMENTOS):
+        lote = orcamento_ids[inicio:inicio + ZIP_LOTE_ORCAMENTOS]
+        carregados = db.carregar_orcamentos_por_ids(lote)
+        for orcamento_id in lote:
+            if orcamento_id in carregados:
+                yield f"orcamento_{orcamento_id}.pdf", args_pdf_orcamento_salvo(*carregados[orcamento_id])
@@ -0,0 +1,159 @@
+"""Cálculo de valores (área, valor bruto, IPI e ST) de itens confeccionados e bobinas.
+
+As funções calcular_valores_* trabalham com listas de dicts (formulário e PDF).
+O mesmo cálculo vetorizado (NumPy), para lotes grandes de itens, fica em calcloc.lote_precificacao.
+"""
+from calcloc.catalogo import IPI_CONFECCIONADO_DEFAULT, IPI_RATE_DEFAULT, info_produto, st_por_estado
+from calcloc.instrumentacao import medir
+
+# ============================
+# Regras de IPI e ST (tabelas e flags dos produtos em calcloc.catalogo)
+# ============================
+def _ipi_confeccionado(produto):
+    """Alíquota de IPI de um item confeccionado (zero para telas de sombreamento, Acrylic e Agora)."""
+    return 0.0 if info_produto(produto).ipi_zero else IPI_CONFECCIONADO_DEFAULT
+
+def _tem_st(produtos):
+    """Se algum dos produtos tem ST quando vendido para Revenda."""
+    return any(info_produto(produto).st_elegivel for produto in set(produtos))
+
+def _ipi_bobinas(produtos):
+    """Alíquota de IPI, única para todas as bobinas do pedido: a menor entre os produtos
+    (o Encerado zera o IPI e prevalece sobre a alíquota da Capota Marítima)."""
+    return min((info_produto(produto).ipi_bobina for produto in set(produtos)), default=IPI_RATE_DEFAULT)
+
+# ============================
+# Cálculos por item (listas de dicts)
+# ============================
+@medir()
+def calcular_valores_confeccionados(itens, preco_m2, tipo_cliente="", estado="", tipo_pedido="Direta"):
+    if not itens:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 0
+
+    # Agora calculamos usando o preco por item (se existir), senão usa o preco_m2 passado
+    m2_total = 0.0
+    valor_bruto = 0.0
+    for item in itens:
+        preco_item = item.get('preco_unitario', preco_m2)
+        area_item = item['comprimento'] * item['largura'] * item['quantidade']
+        m2_total += area_item
+        valor_bruto += area_item * preco_item
+
+    # Lógica de IPI e ST (mantida, mas aplicada sobre os valores por item)
+    if tipo_pedido == "Industrialização":
+        valor_ipi = 0.0
+        valor_st = 0.0
+        aliquota_st = 0
+        valor_final = valor_bruto
+    else:
+        valor_ipi_acumulado = 0.0
+        for item in itens:
+            produto = item.get('produto', '')
+            preco_item = item.get('preco_unitario', preco_m2)
+            area_item = item['comprimento'] * item['largura'] * item['quantidade']
+            valor_ipi_acumulado += area_item * preco_item * _ipi_confeccionado(produto)
+
+        valor_ipi = valor_ipi_acumulado
+        valor_final = valor_bruto + valor_ipi
+
+        valor_st = 0.0
+        aliquota_st = 0
+        if _tem_st(item.get('produto') for item in itens) and tipo_cliente == "Revenda":
+            aliquota_st = st_por_estado.get(estado, 0)
+            valor_st = valor_final * aliquota_st / 100
+            valor_final += valor_st
+
+    return m2_total, valor_bruto, valor_ipi, valor_final, valor_st, aliquota_st
+
+# FUNÇÃO CORRIGIDA PARA IPI DE CAPOTA MARÍTIMA
+@medir()
+def calcular_valores_bobinas(itens, preco_m2, tipo_pedido="Direta"):
+    if not itens:
+        # Retorna a alíquota padrão se não houver itens
+        return 0.0, 0.0, 0.0, 0.0, IPI_RATE_DEFAULT
+
+    m_total = sum(item['comprimento'] * item['quantidade'] for item in itens)
+
+    def preco_item_of(item):
+        pu = item.get('preco_unitario')
+        return pu if (pu is not None) else preco_m2
+
+    valor_bruto = sum((item['comprimento'] * item['quantidade']) * preco_item_of(item) for item in itens)
+
+    if tipo_pedido == "Industrialização":
+        return m_total, valor_bruto, 0.0, valor_bruto, 0.0 # Retorna 0.0 como taxa de IPI
+    else:
+        # Alíquota única para o pedido (Encerado zera, Capota Marítima reduz)
+        ipi_rate_to_use = _ipi_bobinas(item.get('produto') for item in itens)
+
+        valor_ipi = valor_bruto * ipi_rate_to_use
+        valor_final = valor_bruto + valor_ipi
+
+        # Novo: Retorna a taxa de IPI utilizada para exibição
+        return m_total, valor_bruto, valor_ipi, valor_final, ipi_rate_to_use
+
+def valores_por_produto(itens_confeccionados, itens_bobinas, preco_m2, aliquota_st=0, ipi_rate_bob=IPI_RATE_DEFAULT, tipo_pedido="Direta"):
+    """Valor final e m² (comprimento × largura × quantidade, também nas bobinas) de cada produto do orçamento.
+
+    aliquota_st e ipi_rate_bob são os devolvidos por calcular_valores_confeccionados e
+    calcular_valores_bobinas para o mesmo orçamento; a soma dos valores é o valor final do orçamento.
+    Retorna {produto: [valor_final, m2_total]}.
+    """
+    industrializacao = tipo_pedido == "Industrialização"
+    produtos = {}
+    for item in itens_confeccionados:
+        produto = item.get('produto') or ''
+        area_item = item['comprimento'] * item['largura'] * item['quantidade']
+        ipi = 0.0 if industrializacao else _ipi_confeccionado(produto)
+        valor_item = area_item * item.get('preco_unitario', preco_m2) * (1 + ipi) * (1 + aliquota_st / 100)
+        totais = produtos.setdefault(produto, [0.0, 0.0])
+        totais[0] += valor_item
+        totais[1] += area_item
+    for item in itens_bobinas:
+        produto = item.get('produto') or ''
+        preco_item = item.get('preco_unitario')
+        if preco_item is None:
+            preco_item = preco_m2
+        totais = produtos.setdefault(produto, [0.0, 0.0])
+        totais[0] += item['comprimento'] * item['quantidade'] * preco_item * (1 + ipi_rate_bob)
+        totais[1] += item['comprimento'] * item['largura'] * item['quantidade']
+    return produtos
+
+# ============================
+# Resumo dos itens (tipo, produto mais selecionado e m² confeccionado)
+# ============================
+def get_order_summary_info(confecc, bob):
+    # confecc: (produto, comprimento, largura, quantidade, cor, preco_unitario)
+    # bob: (produto, comprimento, largura, quantidade, cor, espessura, preco_unitario)
+    
+    has_conf = len(confecc) > 0
+    has_bob = len(bob) > 0
+    
+    # 1. Tipo do Item
+    if has_conf and has_bob:
+        tipo_item = "Misto (Conf. e Bobina)"
+    elif has_conf:
+        tipo_item = "Confeccionado"
+    elif has_bob:
+        tipo_item = "Bobina"
+    else:
+        tipo_item = "Nenhum"
+
+    # 2. Produto Mais Selecionado (por quantidade)
+    product_counts = {}
+    for item in confecc:
+        product = item[0] # Produto
+        quantity = item[3] # Quantidade
+        product_counts[product] = product_counts.get(product, 0) + quantity
+    
+    for item in bob:
+        product = item[0] # Produto
+        quantity = item[3] # Quantidade
+        product_counts[product] = product_counts.get(product, 0) + quantity
+
+    most_selected_product = max(product_counts, key=product_counts.get) if product_counts else ""
+        
+    # 3. Área Total em m² (Apenas Confeccionado, conforme métrica do m² solicitado)
+    m2_total_conf = sum(item[1] * item[2] * item[3] for item in confecc)
+
+    return tipo_item, most_selected_product, m2_total_conf
@@ -0,0 +1,154 @@
+"""Reprecificação em lote do histórico: todos os itens de N orçamentos como DataFrames.
+
+Mesmas regras de calcular_valores_confeccionados / calcular_valores_bobinas e de
+get_order_summary_info, aplicadas a todos os orçamentos de uma vez com groupby.
+"""
+import numpy as np
+import pandas as pd
+
+from calcloc.catalogo import IPI_RATE_DEFAULT, info_produto, st_por_estado
+from calcloc.precificacao import _ipi_confeccionado
+
+COLUNAS_CABECALHO = ["id", "tipo_cliente", "estado", "tipo_pedido", "preco_m2_base"]
+
+def _preco_por_item(itens):
+    """preco_unitario do item quando informado, senão o preco_m2_base do orçamento."""
+    if "preco_unitario" not in itens:
+        return itens["preco_m2_base"]
+    return itens["preco_unitario"].astype(float).fillna(itens["preco_m2_base"])
+
+def precificar_orcamentos(cabecalhos, itens_confeccionados, itens_bobinas):
+    """Calcula os totais de cada orçamento.
+
+    cabecalhos: id, tipo_cliente, estado, tipo_pedido, preco_m2_base (uma linha por orçamento).
+    itens_*: orcamento_id, produto, comprimento, largura, quantidade e, opcionalmente, preco_unitario.
+
+    Retorna um DataFrame indexado por id (na ordem de cabecalhos) com os valores de
+    confeccionados (m2_total, valor_bruto_conf, valor_ipi_conf, valor_st, aliquota_st,
+    valor_final_conf), de bobinas (m_total, valor_bruto_bob, valor_ipi_bob, valor_final_bob,
+    ipi_rate_bob) e valor_final_total.
+    """
+    cab = cabecalhos[COLUNAS_CABECALHO].set_index("id")
+    cab = cab.assign(preco_m2_base=cab["preco_m2_base"].astype(float).fillna(0.0))
+    industrializacao = cab["tipo_pedido"] == "Industrialização"
+
+    # Confeccionados: área, valor bruto e IPI por item, somados por orçamento
+    conf = itens_confeccionados.join(cab, on="orcamento_id")
+    area = conf["comprimento"] * conf["largura"] * conf["quantidade"]
+    valor_bruto = area * _preco_por_item(conf)
+    aliquotas_ipi = {produto: _ipi_confeccionado(produto or "") for produto in conf["produto"].unique()}
+    ipi_rate = conf["produto"].map(aliquotas_ipi).where(conf["tipo_pedido"] != "Industrialização", 0.0)
+    por_conf = pd.DataFrame({
+        "orcamento_id": conf["orcamento_id"],
+        "m2_total": area,
+        "valor_bruto_conf": valor_bruto,
+        "valor_ipi_conf": valor_bruto * ipi_rate,
+        "tem_st": conf["produto"].map({produto: info_produto(produto).st_elegivel for produto in conf["produto"].unique()}),
+    }).groupby("orcamento_id").agg({
+        "m2_total": "sum", "valor_bruto_conf": "sum", "valor_ipi_conf": "sum", "tem_st": "any",
+    }).reindex(cab.index)
+
+    # ST apenas quando há produto com ST, o cliente é Revenda e o pedido não é Industrialização
+    com_st = por_conf["tem_st"].fillna(False).astype(bool) & (cab["tipo_cliente"] == "Revenda") & ~industrializacao
+    aliquota_st = cab["estado"].map(st_por_estado).fillna(0).where(com_st, 0).astype(int)
+    valor_com_ipi = (por_conf["valor_bruto_conf"] + por_conf["valor_ipi_conf"]).fillna(0.0)
+    valor_st = valor_com_ipi * aliquota_st / 100
+
+    # Bobinas: metros lineares e valor bruto por item; a alíquota de IPI é única por orçamento
+    bob = itens_bobinas.join(cab, on="orcamento_id")
+    metros = bob["comprimento"] * bob["quantidade"]
+    por_bob = pd.DataFrame({
+        "orcamento_id": bob["orcamento_id"],
+        "m_total": metros,
+        "valor_bruto_bob": metros * _preco_por_item(bob),
+        "ipi_bobina": bob["produto"].map({produto: info_produto(produto).ipi_bobina for produto in bob["produto"].unique()}),
+    }).groupby("orcamento_id").agg({
+        "m_total": "sum", "valor_bruto_bob": "sum", "ipi_bobina": "min",
+    }).reindex(cab.index)
+    tem_bobinas = por_bob["m_total"].notna()
+    # Alíquota do pedido: a menor entre os produtos (Encerado zera, Capota Marítima reduz), como em calcular_valores_bobinas
+    ipi_rate_bob = pd.Series(
+        np.select([~tem_bobinas, industrializacao], [IPI_RATE_DEFAULT, 0.0], default=por_bob["ipi_bobina"]),
+        index=cab.index,
+    )
+    valor_bruto_bob = por_bob["valor_bruto_bob"].fillna(0.0)
+    valor_ipi_bob = valor_bruto_bob * ipi_rate_bob.where(tem_bobinas, 0.0)
+
+    totais = pd.DataFrame({
+        "m2_total": por_conf["m2_total"].fillna(0.0),
+        "valor_bruto_conf": por_conf["valor_bruto_conf"].fillna(0.0),
+        "valor_ipi_conf": por_conf["valor_ipi_conf"].fillna(0.0),
+        "valor_st": valor_st,
+        "aliquota_st": aliquota_st,
+        "valor_final_conf": valor_com_ipi + valor_st,
+        "m_total": por_bob["m_total"].fillna(0.0),
+        "valor_bruto_bob": valor_bruto_bob,
+        "valor_ipi_bob": valor_ipi_bob,
+        "valor_final_bob": valor_bruto_bob + valor_ipi_bob,
+        "ipi_rate_bob": ipi_rate_bob,
+    })
+    totais["valor_final_total"] = totais["valor_final_conf"] + totais["valor_final_bob"]
+    return totais
+
+def valores_por_produto_orcamentos(cabecalhos, itens_confeccionados, itens_bobinas, totais):
+    """Equivalente em lote de valores_por_produto.
+
+    totais: resultado de precificar_orcamentos para os mesmos orçamentos (aliquota_st e ipi_rate_bob).
+    Retorna um DataFrame com orcamento_id, produto, valor_final e m2_total, uma linha por produto de cada orçamento.
+    """
+    cab = cabecalhos[COLUNAS_CABECALHO].set_index("id")
+    cab = cab.assign(preco_m2_base=cab["preco_m2_base"].astype(float).fillna(0.0)).join(totais[["aliquota_st", "ipi_rate_bob"]])
+
+    conf = itens_confeccionados.join(cab, on="orcamento_id")
+    area = conf["comprimento"] * conf["largura"] * conf["quantidade"]
+    aliquotas_ipi = {produto: _ipi_confeccionado(produto or "") for produto in conf["produto"].unique()}
+    ipi_rate = conf["produto"].map(aliquotas_ipi).where(conf["tipo_pedido"] != "Industrialização", 0.0)
+
+    bob = itens_bobinas.join(cab, on="orcamento_id")
+    itens = pd.concat([
+        pd.DataFrame({
+            "orcamento_id": conf["orcamento_id"],
+            "produto": conf["produto"],
+            "valor_final": area * _preco_por_item(conf) * (1 + ipi_rate) * (1 + conf["aliquota_st"] / 100),
+            "m2_total": area,
+        }),
+        pd.DataFrame({
+            "orcamento_id": bob["orcamento_id"],
+            "produto": bob["produto"],
+            "valor_final": bob["comprimento"] * bob["quantidade"] * _preco_por_item(bob) * (1 + bob["ipi_rate_bob"]),
+            "m2_total": bob["comprimento"] * bob["largura"] * bob["quantidade"],
+        }),
+    ], ignore_index=True)
+    itens["produto"] = itens["produto"].fillna("")
+    return itens.groupby(["orcamento_id", "produto"], as_index=False, sort=False)[["valor_final", "m2_total"]].sum()
+
+def resumir_itens_orcamentos(ids, itens_confeccionados, itens_bobinas):
+    """Equivalente em lote de get_order_summary_info: tipo_item e produto_mais_selecionado por orçamento."""
+    indice = pd.Index(ids, name="id")
+    # 'ordem' preserva a ordem de get_order_summary_info (confeccionados antes de bobinas) para desempate
+    itens = pd.concat([
+        itens_confeccionados[["orcamento_id", "produto", "quantidade"]].assign(tipo="conf"),
+        itens_bobinas[["orcamento_id", "produto", "quantidade"]].assign(tipo="bob"),
+    ], ignore_index=True)
+    itens["ordem"] = np.arange(len(itens))
+
+    tipos = itens.groupby(["orcamento_id", "tipo"]).size().unstack(fill_value=0).reindex(indice, fill_value=0)
+    tem_conf = tipos["conf"] > 0 if "conf" in tipos else pd.Series(False, index=indice)
+    tem_bob = tipos["bob"] > 0 if "bob" in tipos else pd.Series(False, index=indice)
+    tipo_item = pd.Series(
+        np.select(
+            [tem_conf & tem_bob, tem_conf, tem_bob],
+            ["Misto (Conf. e Bobina)", "Confeccionado", "Bobina"],
+            default="Nenhum",
+        ),
+        index=indice,
+    )
+
+    por_produto = itens.groupby(["orcamento_id", "produto"], sort=False).agg(quantidade=("quantidade", "sum"), ordem=("ordem", "min")).reset_index()
+    mais_selecionado = (
+        por_produto.sort_values(["orcamento_id", "quantidade", "ordem"], ascending=[True, False, True])
+        .drop_duplicates("orcamento_id")
+        .set_index("orcamento_id")["produto"]
+        .reindex(indice, fill_value="")
+    )
+    return pd.DataFrame({"tipo_item": tipo_item, "produto_mais_selecionado": mais_selecionado})
@@ -1,431 +1,29 @@
 import os
+import json
+import time
 import streamlit as st
-from datetime import datetime, timedelta
-import pytz
-from fpdf import FPDF
-import sqlite3
-import pandas as pd
-from io import BytesIO
-
-try:
-    LOGO_PATH ="LOCOMOTIVA.JPG"
-    pass # Manteremos como um path string para a FPDF tentar carregar
-except Exception as e:
-    st.error(f"Erro ao carregar a imagem do logo: {e}") 
-    LOGO_PATH = None
-
-# ============================
-# Banco SQLite
-# ============================
-DB_NAME = "orcamentos.db" 
-
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    
-    # 1. Cria ou verifica a tabela orcamentos (AGORA USANDO O NOME preco_m2_base)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS orcamentos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data_hora TEXT,
-            cliente_nome TEXT,
-            cliente_cnpj TEXT,
-            tipo_cliente TEXT,
-            estado TEXT,
-            frete TEXT,
-            tipo_pedido TEXT,
-            vendedor_nome TEXT,
-            vendedor_tel TEXT,
-            vendedor_email TEXT,
-            observacao TEXT,
-            preco_m2_base REAL -- Nome da coluna ajustado para consistência
-        )
-    """)
-    
-    # Migração de Schema para orcamentos (garantindo que 'preco_m2_base' exista)
-    try:
-        cur.execute("SELECT preco_m2_base FROM orcamentos LIMIT 1")
-    except sqlite3.OperationalError:
-        try:
-            # Tenta adicionar com o nome consistente. Se a coluna antiga 'preco_m2' existir, ela será ignorada na migração.
-            cur.execute("ALTER TABLE orcamentos ADD COLUMN preco_m2_base REAL")
-            print("Migração de DB: Coluna 'preco_m2_base' adicionada à tabela 'orcamentos'.")
-        except sqlite3.OperationalError:
-            pass
-
-    # 3. Criação da tabela itens_confeccionados (COM preco_unitario)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS itens_confeccionados (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            orcamento_id INTEGER,
-            produto TEXT,
-            comprimento REAL,
-            largura REAL,
-            quantidade INTEGER,
-            cor TEXT,
-            preco_unitario REAL, 
-            FOREIGN KEY (orcamento_id) REFERENCES orcamentos(id)
-        )
-    """)
-    # Migração de Schema para itens_confeccionados
-    try:
-        cur.execute("SELECT preco_unitario FROM itens_confeccionados LIMIT 1")
-    except sqlite3.OperationalError:
-        cur.execute("ALTER TABLE itens_confeccionados ADD COLUMN preco_unitario REAL")
-        print("Migração de DB: Coluna 'preco_unitario' adicionada à tabela 'itens_confeccionados'.")
-
-    # 4. Criação da tabela itens_bobinas (COM preco_unitario)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS itens_bobinas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            orcamento_id INTEGER,
-            produto TEXT,
-            comprimento REAL,
-            largura REAL,
-            quantidade INTEGER,
-            cor TEXT,
-            preco_unitario REAL, 
-            FOREIGN KEY (orcamento_id) REFERENCES orcamentos(id)
-        )
-    """)
-    # Migração de Schema para itens_bobinas
-    try:
-        cur.execute("SELECT preco_unitario FROM itens_bobinas LIMIT 1")
-    except sqlite3.OperationalError:
-        cur.execute("ALTER TABLE itens_bobinas ADD COLUMN preco_unitario REAL")
-        print("Migração de DB: Coluna 'preco_unitario' adicionada à tabela 'itens_bobinas'.")
-    # Migração para espessura
-    try:
-        cur.execute("SELECT espessura FROM itens_bobinas LIMIT 1")
-    except sqlite3.OperationalError:
-        cur.execute("ALTER TABLE itens_bobinas ADD COLUMN espessura REAL")
-        print("Migração de DB: Coluna 'espessura' adicionada à tabela 'itens_bobinas'.")
-        
-    conn.commit()
-    conn.close()
-
-# ============================
-# Função corrigida: salvar_orcamento (Sem Alteração)
-# ============================
-def salvar_orcamento(cliente, vendedor, itens_confeccionados, itens_bobinas, observacao, preco_m2_base):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    
-    cur.execute("""
-        INSERT INTO orcamentos (data_hora, cliente_nome, cliente_cnpj, tipo_cliente, estado, frete, tipo_pedido, vendedor_nome, vendedor_tel, vendedor_email, observacao, preco_m2_base)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        datetime.now(pytz.timezone("America/Sao_Paulo")).strftime("%d/%m/%Y %H:%M"),
-        cliente.get("nome",""),
-        cliente.get("cnpj",""),
-        cliente.get("tipo_cliente",""),
-        cliente.get("estado",""),
-        cliente.get("frete",""),
-        cliente.get("tipo_pedido",""),
-        vendedor.get("nome",""),
-        vendedor.get("tel",""),
-        vendedor.get("email",""),
-        observacao,
-        preco_m2_base
-    ))
-    orcamento_id = cur.lastrowid
-
-    for item in itens_confeccionados:
-        cur.execute("""
-            INSERT INTO itens_confeccionados (orcamento_id, produto, comprimento, largura, quantidade, cor, preco_unitario)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (orcamento_id, item['produto'], item['comprimento'], item['largura'], item['quantidade'], item.get('cor','')))
-
-    for item in itens_bobinas:
-        cur.execute("""
-            INSERT INTO itens_bobinas (orcamento_id, produto, comprimento, largura, quantidade, cor, espessura, preco_unitario)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (orcamento_id, item['produto'], item['comprimento'], item['largura'], item['quantidade'], item.get('cor',''), item.get('espessura'), item.get('preco_unitario')))
-
-    conn.commit()
-    conn.close()
-    return orcamento_id
-
-def buscar_orcamentos():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("SELECT id, data_hora, cliente_nome, cliente_cnpj, vendedor_nome FROM orcamentos ORDER BY id DESC") 
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-# ============================
-# Função corrigida: carregar_orcamento_por_id
-# ============================
-def carregar_orcamento_por_id(orcamento_id):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    # >>> CORREÇÃO 2: Renomeia a coluna mapeada para 'preco_base_utilizado' para melhor semântica.
-    # A ordem dos campos em 'orc_cols' deve corresponder à ordem no CREATE TABLE (SELECT *)
-    orc_cols = ['id','data_hora','cliente_nome','cliente_cnpj','tipo_cliente','estado','frete','tipo_pedido','vendedor_nome','vendedor_tel','vendedor_email','observacao', 'preco_base_utilizado']
-    # Buscando todas as colunas
-    cur.execute("SELECT * FROM orcamentos WHERE id=?", (orcamento_id,))
-    orc = cur.fetchone()
-    cur.execute("SELECT produto, comprimento, largura, quantidade, cor FROM itens_confeccionados WHERE orcamento_id=?", (orcamento_id,))
-    confecc = cur.fetchall()
-    cur.execute("SELECT produto, comprimento, largura, quantidade, cor, espessura, preco_unitario FROM itens_bobinas WHERE orcamento_id=?", (orcamento_id,))
-    bob = cur.fetchall()
-    conn.close()
-    return orc, confecc, bob
-
-# ============================
-# Funções de Cálculo e Conversão
-# ============================
-
-def _format_brl(valor):
-    """Formata um valor float para a moeda Brasileira R$"""
-    if valor is None:
-        return "R$ 0,00"
-    # Formatação com separadores de milhar e decimal
-    return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-
-# ============================
-# Cálculos (Sem Alteração)
-# ============================
-st_por_estado = {} 
-
-def calcular_valores_confeccionados(itens, preco_m2, tipo_cliente="", estado="", tipo_pedido="Direta"):
-    if not itens:
-        return 0.0, 0.0, 0.0, 0.0, 0.0, 0
-
-    # Agora calculamos usando o preco por item (se existir), senão usa o preco_m2 passado
-    m2_total = 0.0
-    valor_bruto = 0.0
-    for item in itens:
-        preco_item = item.get('preco_unitario', preco_m2)
-        area_item = item['comprimento'] * item['largura'] * item['quantidade']
-        m2_total += area_item
-        valor_bruto += area_item * preco_item
-
-    # Lógica de IPI e ST (mantida, mas aplicada sobre os valores por item)
-    if tipo_pedido == "Industrialização":
-        valor_ipi = 0.0
-        valor_st = 0.0
-        aliquota_st = 0
-        valor_final = valor_bruto
-    else:
-        IPI_CONFECCIONADO_DEFAULT = 0.0325
-        IPI_ZERO_PRODS = ["Acrylic", "Agora", "Tela de Sombreamento 95%"]
-        IPI_ZERO_PREFIXES = ["Tela de Sombreamento"]
-
-        valor_ipi_acumulado = 0.0
-        for item in itens:
-            produto = item.get('produto', '')
-            preco_item = item.get('preco_unitario', preco_m2)
-            area_item = item['comprimento'] * item['largura'] * item['quantidade']
-            ipi_rate = IPI_CONFECCIONADO_DEFAULT
-            if produto in IPI_ZERO_PRODS or any(produto.startswith(prefix) for prefix in IPI_ZERO_PREFIXES):
-                ipi_rate = 0.0
-            valor_ipi_acumulado += area_item * preco_item * ipi_rate
-
-        valor_ipi = valor_ipi_acumulado
-        valor_final = valor_bruto + valor_ipi
-
-        valor_st = 0.0
-        aliquota_st = 0
-        if any(item.get('produto') == "Encerado" for item in itens) and tipo_cliente == "Revenda":
-            aliquota_st = st_por_estado.get(estado, 0)
-            valor_st = valor_final * aliquota_st / 100
-            valor_final += valor_st
-
-    return m2_total, valor_bruto, valor_ipi, valor_final, valor_st, aliquota_st
-    
-# FUNÇÃO CORRIGIDA PARA IPI DE CAPOTA MARÍTIMA
-def calcular_valores_bobinas(itens, preco_m2, tipo_pedido="Direta"):
-    IPI_RATE_DEFAULT = 0.0975 # 9.75%
-    
-    if not itens:
-        # Retorna a alíquota padrão se não houver itens
-        return 0.0, 0.0, 0.0, 0.0, IPI_RATE_DEFAULT
-
-    m_total = sum(item['comprimento'] * item['quantidade'] for item in itens)
-    
-    def preco_item_of(item):
-        pu = item.get('preco_unitario') 
-        return pu if (pu is not None) else preco_m2 
-
-    valor_bruto = sum((item['comprimento'] * item['quantidade']) * preco_item_of(item) for item in itens)
-
-    if tipo_pedido == "Industrialização":
-        return m_total, valor_bruto, 0.0, valor_bruto, 0.0 # Retorna 0.0 como taxa de IPI
-    else:
-        IPI_RATE_CAPOTA = 0.0325 # 3.25%
-        
-        # Verifica se algum item é "Capota Marítima"
-        has_capota_maritima = any(item.get('produto') == "Capota Marítima" for item in itens)
-        
-        # >>> NOVA LÓGICA: Verifica se algum item é "Encerado"
-        has_encerado = any(item.get('produto') == "Encerado" for item in itens)
-        
-        # Define a alíquota a ser usada
-        ipi_rate_to_use = IPI_RATE_DEFAULT
-        
-        if has_capota_maritima:
-            ipi_rate_to_use = IPI_RATE_CAPOTA
-        
-        # Se for Encerado (e não for industrialização, já excluída pelo 'else' externo), IPI é ZERO.
-        # Deve sobrescrever a alíquota de capota, se houver conflito.
-        if has_encerado:
-            ipi_rate_to_use = 0.0 # IPI ZERO para Encerado Bobina (REQ.)
-
-        valor_ipi = valor_bruto * ipi_rate_to_use
-        valor_final = valor_bruto + valor_ipi
-
-        # Novo: Retorna a taxa de IPI utilizada para exibição
-        return m_total, valor_bruto, valor_ipi, valor_final, ipi_rate_to_use
-
-# ============================
-# Função corrigida: gerar_pdf (Sem Alteração)
-# ============================
-def gerar_pdf(orcamento_id, cliente, vendedor, itens_confeccionados, itens_bobinas, resumo_conf, resumo_bob, observacao, preco_m2, tipo_cliente="", estado=""):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_font("Arial", "B", 14)
-
-    # 1. INSERIR LOGO NO TOPO
-    if LOGO_PATH:
-        largura_da_imagem_no_pdf = 30 
-        posicao_x = 88 
-        posicao_y = 5 
-        
-        pdf.image(LOGO_PATH, x=posicao_x, y=posicao_y, w=largura_da_imagem_no_pdf, h=0) 
-        
-        pdf.set_y(posicao_y + 20) 
-        
-        pdf.set_font("Arial", "B", 14)
-        pdf.set_x(posicao_x + largura_da_imagem_no_pdf - 52) 
-        pdf.cell(0, 12, "Orçamento - Grupo Locomotiva", ln=True, align="L")
-        
-    else:
-        # O BLOCO ABAIXO PRECISA ESTAR INDENTADO COM 4 ESPAÇOS
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(0, 12, "Orçamento - Grupo Locomotiva", ln=True, align="C") # Linha 270
-        
-
-    if orcamento_id:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(0, 6, f"ID do Orçamento: {orcamento_id}", ln=True, align="C")
-    
-    pdf.ln(10)
-    pdf.set_font("Arial", size=9)
-    brasilia_tz = pytz.timezone("America/Sao_Paulo")
-    pdf.cell(0, 6, f"Data e Hora: {datetime.now(brasilia_tz).strftime('%d/%m/%Y %H:%M')}", ln=True)
-    pdf.cell(0, 6, "Validade da Cotação: 7 dias.", ln=True, align="L")
-    pdf.ln(4)
-
-    pdf.set_font("Arial", "B", 11)
-    pdf.cell(0, 6, "Cliente", ln=True)
-    pdf.set_font("Arial", size=10)
-    largura_util = pdf.w - 2*pdf.l_margin
-
-    for chave in ["nome", "cnpj", "tipo_cliente", "estado", "frete", "tipo_pedido"]:
-        valor = str(cliente.get(chave, "") or "")
-        if valor.strip():
-            pdf.cell(0, 6, f"{chave.replace('_',' ').title()}: {valor}", align="L")
-            pdf.ln(5)
-    pdf.ln(5)
-
-    # Itens Confeccionados
-    if itens_confeccionados:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(0, 8, "Itens Confeccionados", ln=True)
-        pdf.set_font("Arial", size=8)
-        for item in itens_confeccionados:
-            area_item = item['comprimento'] * item['largura'] * item['quantidade']
-            # Usa o preço por m² do item, se existir (foi salvo com o preco_m2 do input)
-            preco_item = item.get('preco_unitario', preco_m2) 
-            valor_item = area_item * preco_item
-            txt = (
-                f"{item['quantidade']}x {item['produto']} - {item['comprimento']}m x {item['largura']}m "
-                f"| Cor: {item.get('cor','')} | Valor Bruto: {_format_brl(valor_item)}"
-            )
-            pdf.multi_cell(largura_util, 6, txt)
-            pdf.ln(1)
-
-    # Resumo Confeccionados
-    if resumo_conf:
-        m2_total, valor_bruto, valor_ipi, valor_final, valor_st, aliquota_st = resumo_conf
-        pdf.ln(3)
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(0, 10, "Resumo - Confeccionados", ln=True)
-        pdf.set_font("Arial", "", 10)
-        pdf.cell(0, 8, f"Preço por m² utilizado: {_format_brl(preco_m2)}", ln=True)
-        pdf.cell(0, 8, f"Área Total: {str(f'{m2_total:.2f}'.replace('.', ','))} m²", ln=True)
-        pdf.cell(0, 8, f"Valor Bruto: {_format_brl(valor_bruto)}", ln=True)
-        if valor_ipi>0:
-            pdf.cell(0, 8, f"IPI: {_format_brl(valor_ipi)}", ln=True)
-        if valor_st>0:
-            pdf.cell(0, 8, f"ST ({aliquota_st}%): {_format_brl(valor_st)}", ln=True)
-        pdf.set_font("Arial", "B", 10)
-        pdf.cell(0, 8, f"Valor Total: {_format_brl(valor_final)}", ln=True)
-        pdf.set_font("Arial", "", 10)
-        pdf.ln(10)
-
-    # Itens Bobinas
-    if itens_bobinas:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(0, 8, "Itens Bobina", ln=True)
-        pdf.set_font("Arial", size=8)
-        for item in itens_bobinas:
-            metros_item = item['comprimento'] * item['quantidade']
-            preco_item = item.get('preco_unitario') if item.get('preco_unitario') is not None else preco_m2
-            valor_item = metros_item * preco_item
-            txt = (
-                f"{item['quantidade']}x {item['produto']} - {item['comprimento']}m | Largura: {item['largura']}m "
-                f"| Cor: {item.get('cor','')} | Valor Bruto: {_format_brl(valor_item)}"
-            )
-            if "espessura" in item and item.get('espessura') is not None:
-                esp = f"{item['espessura']:.2f}".replace(".", ",")
-                txt += f" | Esp: {esp} mm"
-                txt += f" | Preço metro: {_format_brl(preco_item)}"
-            pdf.multi_cell(largura_util, 6, txt)
-            pdf.ln(1)
-
-        if resumo_bob:
-            # Resumo Bobinas espera 5 valores
-            m_total, valor_bruto, valor_ipi, valor_final, ipi_rate = resumo_bob 
-            pdf.ln(3)
-            pdf.set_font("Arial", "B", 11)
-            pdf.cell(0, 10, "Resumo - Bobinas", ln=True)
-            pdf.set_font("Arial", "", 10)
-            pdf.cell(0, 8, f"Total de Metros Lineares: {str(f'{m_total:.2f}'.replace('.', ','))} m", ln=True)
-            pdf.cell(0, 8, f"Valor Bruto: {_format_brl(valor_bruto)}", ln=True)
-            if valor_ipi>0:
-                ipi_percent = ipi_rate * 100
-                # Exibe a alíquota correta
-                pdf.cell(0, 8, f"IPI ({ipi_percent:.2f}%): {_format_brl(valor_ipi)}", ln=True)
-            pdf.set_font("Arial", "B", 10)
-            pdf.cell(0, 8, f"Valor Total: {_format_brl(valor_final)}", ln=True)
-        pdf.ln(10)
-
-    # Observações
-    if observacao:
-        pdf.set_font("Arial", "B", 11)
-        pdf.cell(0, 11, "Observações", ln=True)
-        pdf.set_font("Arial", size=10)
-        # Usa multi_cell para texto longo
-        pdf.multi_cell(largura_util, 10, str(observacao))
-        pdf.ln(10)
-
-    # Vendedor
-    if vendedor:
-        pdf.set_font("Arial", "", 10)
-        vendedor_txt = (
-            f"Vendedor: {vendedor.get('nome','')}\n"
-            f"Telefone: {vendedor.get('tel','')}\n"
-            f"E-mail: {vendedor.get('email','')}"
-        )
-        pdf.multi_cell(largura_util, 8, vendedor_txt)
-        pdf.ln(5)
+from datetime import datetime
+import functools
+
+# Toda a lógica (banco, precificação, catálogo, PDF, exportação e tarefas) fica em calcloc, que não
+# depende do Streamlit nem tem efeitos na importação; este script é só a interface.
+# pandas, fpdf2 e openpyxl são importados só nos caminhos que os usam (backfill, Relatórios,
+# PDF, exportação): a primeira renderização não paga por eles. Ver benchmarks/bench_inicializacao.py.
+from calcloc.precificacao import calcular_valores_confeccionados, calcular_valores_bobinas
+from calcloc.formatacao import formatar_brl
+from calcloc.catalogo import CATALOGO, ESTADOS, FUSO_HORARIO, PRODUTOS, icms_por_estado, info_produto, st_por_estado
+from calcloc.db import (
+    DATA_HORA_FMT, DIMENSOES_AGREGADOS, buscar_agregados, buscar_intervalo_datas, buscar_orcamentos,
+    carregar_orcamentos_por_ids, carregar_totais_por_ids, contar_orcamentos,
+    init_db, salvar_orcamento, sugerir_clientes,
+)
+from calcloc.pdf import gerar_pdf, gerar_pdf_orcamento_salvo
+from calcloc.jobs import ROTULOS_JOBS, enfileirar_job, executor_jobs, ha_jobs_ativos, ler_arquivo_job, listar_jobs, parametros_job
+from calcloc.exportacao import FORMATOS_EXPORTACAO
+from calcloc.instrumentacao import LIMITES_MS, iniciar_rodada, metricas_ativas, registros_da_rodada, resumo as resumo_metricas, zerar as zerar_metricas
 
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
-    return pdf_bytes
+# Início do rerun atual, para o painel de desempenho (CALCLOC_METRICAS=1)
+inicio_rodada = iniciar_rodada()
 
 # ============================
 # Funções de Reset (Sem Alteração)
@@ -471,9 +69,9 @@ def reset_novo_orcamento_state():
 
 def reset_historico_filters():
     """Reseta todos os filtros do Histórico de Orçamentos."""
-    st.session_state["filtro_cliente"] = "Todos"
-    st.session_state["filtro_cnpj"] = "Todos"
+    st.session_state["filtro_busca"] = ""
     st.session_state["filtro_id"] = ""
+    st.session_state["filtro_pagina"] = 1
     # O Streamlit faz o rerun automaticamente após a função on_click.
 
 # ============================
@@ -494,48 +92,48 @@ def update_vendedor_details():
     st.session_state["vend_email"] = details["email"]
 
 # ============================
-# Funções de Resumo para Exportação Excel (Sem Alteração)
+# Tarefas em segundo plano: painel (a fila fica em calcloc.jobs)
 # ============================
-def get_order_summary_info(confecc, bob):
-    # confecc: (produto, comprimento, largura, quantidade, cor)
-    # bob: (produto, comprimento, largura, quantidade, cor, espessura, preco_unitario)
-    
-    has_conf = len(confecc) > 0
-    has_bob = len(bob) > 0
-    
-    # 1. Tipo do Item
-    if has_conf and has_bob:
-        tipo_item = "Misto (Conf. e Bobina)"
-    elif has_conf:
-        tipo_item = "Confeccionado"
-    elif has_bob:
-        tipo_item = "Bobina"
-    else:
-        tipo_item = "Nenhum"
-
-    # 2. Produto Mais Selecionado (por quantidade)
-    product_counts = {}
-    for item in confecc:
-        product = item[0] # Produto
-        quantity = item[3] # Quantidade
-        product_counts[product] = product_counts.get(product, 0) + quantity
-    
-    for item in bob:
-        product = item[0] # Produto
-        quantity = item[3] # Quantidade
-        product_counts[product] = product_counts.get(product, 0) + quantity
-
-    most_selected_product = max(product_counts, key=product_counts.get) if product_counts else ""
-        
-    # 3. Área Total em m² (Apenas Confeccionado, conforme métrica do m² solicitado)
-    m2_total_conf = sum(item[1] * item[2] * item[3] for item in confecc)
+def _painel_jobs():
+    """Tarefas recentes com progresso e, quando concluídas, o download do arquivo gerado."""
+    jobs = listar_jobs()
+    if not jobs:
+        return
+    st.markdown("**Exportações recentes**")
+    for job_id, tipo, status, progresso, total, nome_arquivo, mime, arquivo, erro, criado_em in jobs:
+        rotulo = f"#{job_id} {ROTULOS_JOBS.get(tipo, tipo)} ({datetime.fromtimestamp(criado_em, FUSO_HORARIO).strftime(DATA_HORA_FMT)})"
+        if status == "concluido" and arquivo and os.path.exists(arquivo):
+            st.download_button(
+                f"⬇️ {rotulo}: {nome_arquivo}",
+                data=functools.partial(ler_arquivo_job, arquivo),
+                file_name=nome_arquivo,
+                mime=mime,
+                on_click="ignore",
+                key=f"download_job_{job_id}"
+            )
+        elif status == "erro":
+            st.error(f"{rotulo}: falhou. {erro or ''}")
+        elif status == "concluido":
+            st.caption(f"{rotulo}: arquivo não está mais disponível.")
+        else:
+            fracao = min(progresso / total, 1.0) if total else 0.0
+            st.progress(fracao, text=f"{rotulo}: {'na fila' if status == 'pendente' else f'{progresso}/{total}'}")
 
-    return tipo_item, most_selected_product, m2_total_conf
+def painel_jobs():
+    """Renderiza _painel_jobs como fragmento que se atualiza a cada 2 s enquanto houver tarefa ativa."""
+    st.fragment(_painel_jobs, run_every=2 if ha_jobs_ativos() else None)()
 
 # ============================
 # Inicialização (Sem Alteração)
 # ============================
-init_db()
+@st.cache_resource
+def _inicializar_db():
+    """Executa init_db uma vez por processo (e não a cada rerun do Streamlit)."""
+    init_db()
+    return True
+
+_inicializar_db()
+executor_jobs()
 
 # session state defaults
 defaults = {
@@ -545,9 +143,10 @@ defaults = {
     "bobinas_adicionadas": [], "frete_sel": "CIF", "obs": "",
     "vend_nome": "", "vend_tel": "", "vend_email": "",
     "menu_index": 0,
-    "filtro_cliente": "Todos", 
-    "filtro_cnpj": "Todos",   
+    "filtro_busca": "",
     "filtro_id": "",          
+    "filtro_por_pagina": 25,
+    "filtro_pagina": 1,
     "vendedor_select": VENDEDORES_NOMES[0] # Novo default
 }
 for k, v in defaults.items():
@@ -561,7 +160,7 @@ st.set_page_config(page_title="Calculadora Grupo Locomotiva", page_icon="📏",
 st.title("Orçamento - Grupo Locomotiva")
 
 # --- Menu ---
-menu_options = ["Novo Orçamento","Histórico de Orçamentos"]
+menu_options = ["Novo Orçamento","Histórico de Orçamentos","Relatórios"]
 menu = st.sidebar.selectbox(
     "Menu", 
     menu_options, 
@@ -572,29 +171,10 @@ menu = st.sidebar.selectbox(
 if menu != menu_options[st.session_state['menu_index']]:
     st.session_state['menu_index'] = menu_options.index(menu)
 
-# ============================
-# Tabelas de ICMS e ST (Sem Alteração)
-# ============================
-icms_por_estado = {
-    "SP": 18, "MG": 12, "PR": 12, "RJ": 12, "RS": 12, "SC": 12
-}
-todos_estados = [
-    "AC","AL","AM","AP","BA","CE","DF","ES","GO","MA","MT","MS",
-    "PA","PB","PE","PI","RN","RO","RR","SE","TO"
-]
-for uf in todos_estados:
-    if uf not in icms_por_estado:
-        icms_por_estado[uf] = 7
+# Tabelas de ICMS/ST e o catálogo de produtos vêm de calcloc.catalogo (montados uma vez por processo)
 if st.session_state.get("estado") not in icms_por_estado:
      st.session_state["estado"] = "SP" 
 
-st_por_estado.update({ 
-    "SP": 14, "RJ": 27, "MG": 22, "ES": 0, "PR": 22, "RS": 20, "SC": 0,
-    "BA": 29, "PE": 29, "CE": 19, "RN": 0, "PB": 29, "SE": 0, "AL": 29,
-    "DF": 29, "GO": 0, "MS": 0, "MT": 22, "AM": 29, "PA": 26, "RO": 0,
-    "RR": 27, "AC": 27, "AP": 29, "MA": 29, "PI": 22, "TO": 0
-})
-
 # ============================
 # Interface - Novo Orçamento (Sem Alteração na Lógica de Estado)
 # ============================
@@ -603,8 +183,7 @@ if menu == "Novo Orçamento":
     st.button("🧹 Limpar Formulário", on_click=reset_novo_orcamento_state, key="clear_novo_orc_form")
     st.markdown("---")
     
-    brasilia_tz = pytz.timezone("America/Sao_Paulo")
-    data_hora_brasilia = datetime.now(brasilia_tz).strftime("%d/%m/%Y %H:%M")
+    data_hora_brasilia = datetime.now(FUSO_HORARIO).strftime("%d/%m/%Y %H:%M")
     st.markdown(f"🕒 **Data e Hora:** {data_hora_brasilia}")
 
     # Cliente
@@ -620,30 +199,9 @@ if menu == "Novo Orçamento":
     tipo_pedido = st.radio("Tipo do Pedido:", ["Direta", "Industrialização"], index=0 if st.session_state.get("tipo_pedido","Direta")=="Direta" else 1, key="tipo_pedido")
     
     tipo_cliente = st.selectbox("Tipo do Cliente:", [" ","Consumidor Final", "Revenda"], index=0 if st.session_state.get("tipo_cliente"," ") == " " else (1 if st.session_state.get("tipo_cliente")=="Consumidor Final" else 2), key="tipo_cliente")
-    estado = st.selectbox("Estado do Cliente:", options=list(icms_por_estado.keys()), index=list(icms_por_estado.keys()).index(st.session_state.get("estado")) if st.session_state.get("estado") in icms_por_estado else 0, key="estado")
+    estado = st.selectbox("Estado do Cliente:", options=ESTADOS, index=ESTADOS.index(st.session_state.get("estado")) if st.session_state.get("estado") in icms_por_estado else 0, key="estado")
     # --- FIM DA REORDENAÇÃO (REQ. DO USUÁRIO) ---
 
-    produtos_lista = [
-        " ","Lonil de PVC","Lonil KP","Lonil Inflável KP","Encerado","Duramax",
-        "Lonaleve","Sider Truck Teto","Sider Truck Lateral","Capota Marítima",
-        "Night&Day Plus 1,40","Night&Day Plus 2,00","Night&Day Listrado","Vitro 0,40",
-        "Vitro 0,50","Vitro 0,60","Vitro 0,80","Vitro 1,00","Durasol","Poli Light",
-        "Sunset","Tenda","Tenda 2,3x2,3","Acrylic","Agora","Lona Galpão Teto",
-        "Lona Galpão Lateral","Tela de Sombreamento 30%","Tela de Sombreamento 50%",
-        "Tela de Sombreamento 80%", "Tela de Sombreamento 95%","Geomembrana RV 0,42","Geomembrana RV 0,80",
-        "Geomembrana RV 1,00","Geomembrana ATX 0,80","Geomembrana ATX 1,00",
-        "Geomembrana ATX 1,50","Geo Bio s/ reforço 1,00","Geo Bio s/ reforço 1,20",
-        "Geo Bio s/ reforço 1,50","Geo Bio c/ reforço 1,20","Cristal com Pó",
-        "Cristal com Papel","Cristal Colorido","Filme Liso","Filme Kamurcinha",
-        "Filme Verniz","Block Lux","Filme Dimension","Filme Sarja","Filme Emborrachado",
-        "Filme Pneumático","Adesivo Branco Brilho 0,08","Adesivo Branco Brilho 0,10",
-        "Adesivo Branco Fosco 0,10","Adesivo Preto Brilho 0,08","Adesivo Preto Fosco 0,10",
-        "Adesivo Transparente Brilho 0,08","Adesivo Transparente Jateado 0,08",
-        "Adesivo Mascara Brilho 0,08","Adesivo Aço Escovado 0,08"
-    ]
-
-    prefixos_espessura = ("Geomembrana", "Geo", "Vitro", "Cristal", "Filme", "Adesivo", "Block Lux")
-
     # Seleção de Produto (interface para adicionar)
     st.markdown("---")
     st.subheader("➕ Adicionar Produto")
@@ -652,7 +210,7 @@ if menu == "Novo Orçamento":
     # 2. Adicionar Produto: Tipo do Produto (Radio) antes do Nome do Produto (Selectbox)
     tipo_produto = st.radio("Tipo do Produto:", ["Confeccionado", "Bobina"], key="tipo_prod_sel")
     
-    produto = st.selectbox("Nome do Produto:", options=produtos_lista, index=produtos_lista.index(st.session_state.get("produto_sel")) if st.session_state.get("produto_sel") in produtos_lista else 0, key="produto_sel")
+    produto = st.selectbox("Nome do Produto:", options=PRODUTOS, index=CATALOGO[st.session_state["produto_sel"]].indice if st.session_state.get("produto_sel") in CATALOGO else 0, key="produto_sel")
     # --- FIM DA REORDENAÇÃO (REQ. DO USUÁRIO) ---
     
     preco_m2 = st.number_input("Preço por m² ou metro linear (R$):", min_value=0.0, value=st.session_state.get("preco_m2",0.0), step=0.01, key="preco_m2")
@@ -662,7 +220,7 @@ if menu == "Novo Orçamento":
     st.info(f"🔹 Alíquota de ICMS para {estado}: **{aliquota_icms}% (já incluso no preço)**")
 
     # ST aviso
-    if produto == "Encerado" and tipo_cliente == "Revenda":
+    if info_produto(produto).st_elegivel and tipo_cliente == "Revenda":
         aliquota_st = st_por_estado.get(estado, 0)
         st.warning(f"⚠️ Este produto possui ST no estado {estado} aproximado a: **{aliquota_st}%**")
 
@@ -698,7 +256,7 @@ if menu == "Novo Orçamento":
                     st.markdown(f"**{item['produto']}**")
                     st.markdown(
                         f"🔹 {item['quantidade']}x {item['comprimento']:.2f}m x {item['largura']:.2f}m = {area_item:.2f} m² "
-                        f"× {_format_brl(preco_item)}/m² → {_format_brl(valor_item)}"
+                        f"× {formatar_brl(preco_item)}/m² → {formatar_brl(valor_item)}"
                     )
                 with col2:
                     # Usando chaves únicas para inputs dinâmicos
@@ -721,14 +279,14 @@ if menu == "Novo Orçamento":
             st.markdown("---")
             st.success("💰 **Resumo do Pedido - Confeccionado**")
             st.write(f"📏 Área Total: **{m2_total:.2f} m²**".replace(".", ","))
-            st.write(f"💵 Valor Bruto: **{_format_brl(valor_bruto)}**")
+            st.write(f"💵 Valor Bruto: **{formatar_brl(valor_bruto)}**")
             if tipo_pedido != "Industrialização":
-                st.write(f"🧾 IPI: **{_format_brl(valor_ipi)}**") 
+                st.write(f"🧾 IPI: **{formatar_brl(valor_ipi)}**") 
                 if valor_st > 0:
-                    st.write(f"⚖️ ST ({aliquota_st}%): **{_format_brl(valor_st)}**")
-                st.write(f"💰 Valor Final com IPI{(' + ST' if valor_st>0 else '')}: **{_format_brl(valor_final)}**")
+                    st.write(f"⚖️ ST ({aliquota_st}%): **{formatar_brl(valor_st)}**")
+                st.write(f"💰 Valor Final com IPI{(' + ST' if valor_st>0 else '')}: **{formatar_brl(valor_final)}**")
             else:
-                st.write(f"💰 Valor Final: **{_format_brl(valor_final)}**")
+                st.write(f"💰 Valor Final: **{formatar_brl(valor_final)}**")
 
     # Bobina
     if tipo_produto == "Bobina":
@@ -742,7 +300,7 @@ if menu == "Novo Orçamento":
             quantidade = st.number_input("Quantidade:", min_value=1, value=st.session_state.get("qtd_bob", 1), step=1, key="qtd_bob")
 
         espessura_bobina = None
-        if produto.startswith(prefixos_espessura):
+        if info_produto(produto).exige_espessura:
             espessura_bobina = st.number_input("Espessura da Bobina (mm):", min_value=0.010, value=st.session_state.get("esp_bob", 0.10), step=0.010, key="esp_bob")
 
         if st.button("➕ Adicionar Bobina", key="add_bob"):
@@ -768,11 +326,11 @@ if menu == "Novo Orçamento":
                     valor_item = metros_item * (item.get('preco_unitario') if item.get('preco_unitario') is not None else preco_m2)
                     detalhes = (
                         f"🔹 {item['quantidade']}x {item['comprimento']:.2f}m | Largura: {item['largura']:.2f}m "
-                        f"= {metros_item:.2f} m → {_format_brl(valor_item)}"
+                        f"= {metros_item:.2f} m → {formatar_brl(valor_item)}"
                     )
                     if 'espessura' in item and item.get('espessura') is not None:
                         detalhes += f" | Esp: {item['espessura']:.2f}mm"
-                        detalhes += f" | unit: {_format_brl(item.get('preco_unitario', preco_m2))}"
+                        detalhes += f" | unit: {formatar_brl(item.get('preco_unitario', preco_m2))}"
                     st.markdown(f"**{item['produto']}**")
                     st.markdown(detalhes)
                 with col2:
@@ -793,13 +351,13 @@ if menu == "Novo Orçamento":
             st.markdown("---")
             st.success("💰 **Resumo do Pedido - Bobinas**")
             st.write(f"📏 Total de Metros Lineares: **{m_total:.2f} m**".replace(".", ","))
-            st.write(f"💵 Valor Bruto: **{_format_brl(valor_bruto_bob)}**")
+            st.write(f"💵 Valor Bruto: **{formatar_brl(valor_bruto_bob)}**")
             if tipo_pedido != "Industrialização":
                 # Exibe a alíquota correta
-                st.write(f"🧾 IPI ({ipi_percent:.2f}%): **{_format_brl(valor_ipi_bob)}**")
-                st.write(f"💰 Valor Final com IPI ({ipi_percent:.2f}%): **{_format_brl(valor_final_bob)}**")
+                st.write(f"🧾 IPI ({ipi_percent:.2f}%): **{formatar_brl(valor_ipi_bob)}**")
+                st.write(f"💰 Valor Final com IPI ({ipi_percent:.2f}%): **{formatar_brl(valor_final_bob)}**")
             else:
-                st.write(f"💰 Valor Final: **{_format_brl(valor_final_bob)}**")
+                st.write(f"💰 Valor Final: **{formatar_brl(valor_final_bob)}**")
 
             if st.button("🧹 Limpar Bobinas", key="limpar_bob_list"):
                 st.session_state['bobinas_adicionadas'] = []
@@ -919,122 +477,81 @@ if menu == "Novo Orçamento":
 # ============================
 if menu == "Histórico de Orçamentos":
     st.subheader("📋 Histórico de Orçamentos Salvos")
-    orcamentos = buscar_orcamentos()
-    if not orcamentos:
+    if contar_orcamentos() == 0:
         st.info("Nenhum orçamento encontrado.")
     else:
-        clientes = sorted(list({o[2] for o in orcamentos if o[2]}))
-        cnpjs = sorted(list({o[3] for o in orcamentos if o[3]}))
-        
         # Filtro por ID (Novo)
         orc_id_filtro = st.text_input("Filtrar por ID do Orçamento:", value=st.session_state.get("filtro_id", ""), key="filtro_id")
 
-        # Filtros de Seleção (mantendo state)
-        cliente_filtro = st.selectbox("Filtrar por cliente:", ["Todos"] + clientes, key="filtro_cliente")
-        cnpj_filtro = st.selectbox("Filtrar por CNPJ:", ["Todos"] + cnpjs, key="filtro_cnpj")
+        # Busca textual no índice FTS5 (substitui as listas com todos os clientes e CNPJs)
+        busca_filtro = st.text_input(
+            "🔎 Buscar por cliente, CNPJ, observação ou produto:",
+            key="filtro_busca",
+            placeholder="Ex.: locomotiva, 12.345.678, encerado"
+        )
+        sugestoes = sugerir_clientes(busca_filtro)
+        if sugestoes:
+            st.caption("Clientes encontrados: " + " · ".join(sugestoes))
         
         # Botão Limpar Filtros
         st.button("🧹 Limpar Filtros", on_click=reset_historico_filters, key="clear_historico_filters")
 
-        datas = [datetime.strptime(o[1], "%d/%m/%Y %H:%M") for o in orcamentos]
-        min_data = min(datas) if datas else datetime.now(pytz.timezone("America/Sao_Paulo"))
-        max_budget_date = max(datas).date() if datas else datetime.now(pytz.timezone("America/Sao_Paulo")).date()
-        max_possible_date = datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+        # Intervalo de datas calculado no SQL (MIN/MAX), sem carregar todas as linhas
+        min_data, max_budget_date = buscar_intervalo_datas()
+        # Orçamentos com data futura (importados ou gravados com o relógio adiantado) também cabem no seletor
+        max_possible_date = max(max_budget_date, datetime.now(FUSO_HORARIO).date())
 
         data_inicio, data_fim = st.date_input(
             "Filtrar por intervalo de datas:",
-            (min_data.date(), max_budget_date), 
-            min_value=min_data.date(),
+            (min_data, max_budget_date), 
+            min_value=min_data,
             max_value=max_possible_date, 
             key="filtro_datas"
         )
         
-        orcamentos_filtrados = []
-        for o in orcamentos:
-            orc_id, data_hora, cliente_nome, cliente_cnpj, vendedor_nome = o
-            data_obj = datetime.strptime(data_hora, "%d/%m/%Y %H:%M")
-
-            # Lógica de Filtragem
-            id_ok = True
-            if orc_id_filtro:
-                # Permite pesquisa por prefixo do ID (string)
-                if not str(orc_id).startswith(orc_id_filtro):
-                    id_ok = False
-
-            cliente_ok = (cliente_filtro == "Todos" or cliente_nome == cliente_filtro)
-            cnpj_ok = (cnpj_filtro == "Todos" or cliente_cnpj == cnpj_filtro)
-            data_ok = (data_inicio <= data_obj.date() <= data_fim) 
-            
-            if cliente_ok and cnpj_ok and data_ok and id_ok:
-                orcamentos_filtrados.append(o)
+        # Filtragem e paginação feitas no SQL
+        filtros = dict(
+            busca=busca_filtro,
+            id_prefixo=orc_id_filtro.strip(),
+            data_inicio=data_inicio,
+            data_fim=data_fim
+        )
+        total_filtrados = contar_orcamentos(**filtros)
 
-        if not orcamentos_filtrados:
+        if total_filtrados == 0:
             st.warning("Nenhum orçamento encontrado com os filtros selecionados.")
         else:
-            # Exportar Excel (NOVA LÓGICA - REQ. 2)
-            if st.button("📊 Exportar Excel do Histórico Filtrado"):
-                linhas_excel = []
-                # Colunas para carregar dados do orcamento
-                orc_cols = ['id','data_hora','cliente_nome','cliente_cnpj','tipo_cliente','estado','frete','tipo_pedido','vendedor_nome','vendedor_tel','vendedor_email','observacao', 'preco_m2_base']
-
-                for o in orcamentos_filtrados:
-                    orc_id, data_hora, cliente_nome, cliente_cnpj, vendedor_nome = o
-                    orc, confecc, bob = carregar_orcamento_por_id(orc_id)
-                    
-                    orc_data = dict(zip(orc_cols, orc))
-                    preco_m2_base = orc_data.get('preco_m2_base') if orc_data.get('preco_m2_base') is not None else 0.0
-
-                    # 1. Obter info de resumo (Tipo de Item, Produto Mais Selecionado, Área Total Conf.)
-                    # confecc/bob são listas de tuplas (ex: (produto, comprimento, largura, quantidade, cor))
-                    tipo_item, produto_mais_sel, m2_total_conf = get_order_summary_info(confecc, bob)
-                    
-                    # 2. Calcular valores finais
-                    itens_conf_calc = [dict(zip(['produto','comprimento','largura','quantidade','cor'], c)) for c in confecc]
-                    # Bobinas carregadas têm 7 campos, incluindo espessura e preco_unitario
-                    itens_bob_calc = [dict(zip(['produto','comprimento','largura','quantidade','cor','espessura','preco_unitario'], b)) for b in bob]
-
-                    resumo_conf = calcular_valores_confeccionados(
-                        itens_conf_calc, preco_m2_base, orc_data['tipo_cliente'], orc_data['estado'], orc_data['tipo_pedido']
-                    ) if itens_conf_calc else (0, 0, 0, 0, 0, 0) 
-                    
-                    # Chamada retorna 5 valores (incluindo IPI rate)
-                    resumo_bob = calcular_valores_bobinas(
-                        itens_bob_calc, preco_m2_base, orc_data['tipo_pedido']
-                    ) if itens_bob_calc else (0, 0, 0, 0, 0.0975) 
-                    
-                    valor_final_total = resumo_conf[3] + resumo_bob[3]
-                    
-                    # 3. Criar uma única linha por pedido com as colunas solicitadas
-                    linhas_excel.append({
-                        "ID": orc_id, 
-                        "Nome do Cliente": cliente_nome, 
-                        "CNPJ/CPF": cliente_cnpj,
-                        "Tipo do Cliente": orc_data['tipo_cliente'], 
-                        "Estado": orc_data['estado'], 
-                        "Frete": orc_data['frete'], 
-                        "Tipo do Pedido": orc_data['tipo_pedido'],
-                        "Produto Mais Selecionado": produto_mais_sel, 
-                        "Tipo do Item": tipo_item,
-                        "Preço Base Utilizado (R$)": preco_m2_base, 
-                        "Área Total em m² (Confeccionado)": m2_total_conf, # Coluna solicitada
-                        "Final Total (R$)": valor_final_total 
-                    })
-                # Fim da lógica de exportação
-
-                df_excel = pd.DataFrame(linhas_excel)
-                excel_bytes = BytesIO()
-                df_excel.to_excel(excel_bytes, index=False)
-                st.download_button(
-                    "⬇️ Baixar Excel",
-                    data=excel_bytes.getvalue(),
-                    file_name="resumo_orcamentos.xlsx", 
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-
-            # Exibir orçamentos
-            for o in orcamentos_filtrados:
+            col_pag1, col_pag2 = st.columns(2)
+            with col_pag1:
+                itens_por_pagina = st.selectbox("Orçamentos por página:", [10, 25, 50, 100], key="filtro_por_pagina")
+            total_paginas = (total_filtrados + itens_por_pagina - 1) // itens_por_pagina
+            if st.session_state.get("filtro_pagina", 1) > total_paginas:
+                st.session_state["filtro_pagina"] = total_paginas
+            with col_pag2:
+                pagina = st.number_input(f"Página (de {total_paginas}):", min_value=1, max_value=total_paginas, step=1, key="filtro_pagina")
+            st.caption(f"{total_filtrados} orçamento(s) encontrado(s).")
+
+            orcamentos_pagina = buscar_orcamentos(**filtros, limit=itens_por_pagina, offset=(pagina - 1) * itens_por_pagina)
+
+            # Exportações (NOVA LÓGICA - REQ. 2): todos os orçamentos filtrados, não apenas a página atual.
+            # Rodam em segundo plano (tabela jobs); o painel abaixo mostra o progresso e o download.
+            col_exp1, col_exp2 = st.columns(2)
+            with col_exp1:
+                formato_exportacao = st.radio("Formato da exportação:", list(FORMATOS_EXPORTACAO), horizontal=True, format_func=str.upper, key="formato_exportacao")
+                if st.button("📊 Exportar Histórico Filtrado"):
+                    extensao, mime = FORMATOS_EXPORTACAO[formato_exportacao]
+                    enfileirar_job("exportacao", parametros_job(filtros, formato=formato_exportacao), f"resumo_orcamentos{extensao}", mime, total_filtrados)
+            with col_exp2:
+                if st.button("🗂️ Exportar PDFs (ZIP) do Histórico Filtrado"):
+                    enfileirar_job("pdf_zip", parametros_job(filtros), "orcamentos_pdf.zip", "application/zip", total_filtrados)
+            painel_jobs()
+
+            # Exibir orçamentos (itens da página atual carregados em lote)
+            orcamentos_carregados = carregar_orcamentos_por_ids([o[0] for o in orcamentos_pagina])
+            totais_pagina = carregar_totais_por_ids([o[0] for o in orcamentos_pagina])
+            for o in orcamentos_pagina:
                 orc_id, data_hora, cliente_nome, cliente_cnpj, vendedor_nome = o
-                orc, confecc, bob = carregar_orcamento_por_id(orc_id)
+                orc, confecc, bob = orcamentos_carregados[orc_id]
                 
                 # CORREÇÃO 2: Atualiza a lista aqui também
                 orc_cols = ['id','data_hora','cliente_nome','cliente_cnpj','tipo_cliente','estado','frete','tipo_pedido','vendedor_nome','vendedor_tel','vendedor_email','observacao', 'preco_base_utilizado']
@@ -1048,7 +565,9 @@ if menu == "Histórico de Orçamentos":
                     st.markdown(f"**CNPJ:** {cliente_cnpj}")
                     st.markdown(f"**Vendedor:** {vendedor_nome}")
                     # CORREÇÃO 2/B: Exibe o Preço Base Utilizado
-                    st.markdown(f"**Preço Base Utilizado (💵):** {_format_brl(preco_m2_base)}") 
+                    st.markdown(f"**Preço Base Utilizado (💵):** {formatar_brl(preco_m2_base)}") 
+                    if orc_id in totais_pagina:
+                        st.markdown(f"**Valor Total do Orçamento (💰):** {formatar_brl(totais_pagina[orc_id])}")
                     # CORREÇÃO 4: Exibe as Observações
                     if orc_data['observacao']:
                         st.markdown(f"**Observações:** {orc_data['observacao']}")
@@ -1086,7 +605,7 @@ if menu == "Histórico de Orçamentos":
                                 "Cliente_nome": orc[2] or "",
                                 "Cliente_CNPJ": orc[3] or "",
                                 "tipo_cliente": orc[4] or " ",
-                                "estado": orc[5] or list(icms_por_estado.keys())[0], 
+                                "estado": orc[5] or ESTADOS[0], 
                                 "frete_sel": orc[6] or "CIF",
                                 "tipo_pedido": orc[7] or "Direta",
                                 "vend_nome": orc[8] or "",
@@ -1103,39 +622,65 @@ if menu == "Histórico de Orçamentos":
                             st.rerun()
 
                     with col2:
-                        # Baixar PDF 
-                        itens_bob_calc = [dict(zip(['produto','comprimento','largura','quantidade','cor','espessura','preco_unitario'], b)) for b in bob]
-                        # Chamada retorna 5 valores
-                        resumo_bob_calc = calcular_valores_bobinas(
-                            itens_bob_calc, preco_m2_base, orc_data['tipo_pedido']
-                        ) if itens_bob_calc else (0, 0, 0, 0, 0.0975)
-                        
-                        pdf_bytes = gerar_pdf(
-                            orc_id, 
-                            cliente={
-                                "nome": orc[2],
-                                "cnpj": orc[3],
-                                "tipo_cliente": orc[4],
-                                "estado": orc[5],
-                                "frete": orc[6],
-                                "tipo_pedido": orc[7]
-                            },
-                            vendedor={
-                                "nome": orc[8],
-                                "tel": orc[9],
-                                "email": orc[10]
-                            },
-                            itens_confeccionados=[dict(zip(['produto','comprimento','largura','quantidade','cor'],c)) for c in confecc],
-                            itens_bobinas=itens_bob_calc,
-                            resumo_conf=None, 
-                            resumo_bob=resumo_bob_calc, # Passa o resumo de 5 itens
-                            observacao=orc[11],
-                            preco_m2=preco_m2_base
-                        ) 
+                        # Baixar PDF: o PDF só é gerado no clique (data adiada), com o cache de PDFs do app;
+                        # nada fica guardado na sessão
                         st.download_button(
                             "📄 Baixar PDF",
-                            data=pdf_bytes,
+                            data=functools.partial(gerar_pdf_orcamento_salvo, orc, confecc, bob),
                             file_name=f"orcamento_{orc_id}.pdf",
                             mime="application/pdf",
+                            on_click="ignore",
                             key=f"download_historico_{orc_id}"
                         )
+
+# ============================
+# Interface - Relatórios
+# ============================
+if menu == "Relatórios":
+    import pandas as pd
+
+    st.subheader("📈 Relatórios de Vendas")
+    # Lidos de agregados_vendas (atualizada a cada orçamento salvo): o custo não depende do tamanho do histórico
+    por_mes = buscar_agregados("mes")
+    if not por_mes:
+        st.info("Nenhum orçamento encontrado.")
+    else:
+        col_r1, col_r2, col_r3 = st.columns(3)
+        col_r1.metric("Orçamentos", sum(linha[1] for linha in por_mes))
+        col_r2.metric("Valor Orçado", formatar_brl(sum(linha[2] for linha in por_mes)))
+        col_r3.metric("Área Total", f"{sum(linha[3] for linha in por_mes):.2f} m²".replace(".", ","))
+        st.caption("Área: m² dos confeccionados e das bobinas, em todas as abas.")
+
+        abas = st.tabs(list(DIMENSOES_AGREGADOS.values()))
+        for aba, (dimensao, rotulo) in zip(abas, DIMENSOES_AGREGADOS.items()):
+            with aba:
+                linhas = por_mes if dimensao == "mes" else buscar_agregados(dimensao)
+                df_agregados = pd.DataFrame(linhas, columns=[rotulo, "Orçamentos", "Valor Orçado (R$)", "Área (m²)"])
+                df_agregados[rotulo] = df_agregados[rotulo].replace("", "(não informado)")
+                if dimensao == "produto":
+                    st.caption("Cada orçamento conta em cada um dos seus produtos, com o valor e a área dos itens daquele produto.")
+                st.bar_chart(df_agregados, x=rotulo, y="Valor Orçado (R$)")
+                st.dataframe(df_agregados, hide_index=True)
+
+# ============================
+# Painel de Desempenho (apenas com CALCLOC_METRICAS=1)
+# ============================
+if metricas_ativas():
+    with st.sidebar.expander("⏱️ Desempenho"):
+        st.caption(f"Este rerun: {(time.perf_counter() - inicio_rodada) * 1000:.1f} ms")
+        registros = registros_da_rodada()
+        if registros:
+            st.table([{"Função": nome, "ms": round(ms, 2)} for nome, ms in registros])
+        st.markdown("**Acumulado do processo**")
+        metricas = resumo_metricas()
+        st.table([
+            {"Função": nome, "Chamadas": m["chamadas"], "Média (ms)": m["media_ms"], "Máx. (ms)": m["max_ms"]}
+            for nome, m in metricas.items()
+        ])
+        st.download_button(
+            "⬇️ Exportar JSON",
+            data=json.dumps({"limites_ms": LIMITES_MS, "metricas": metricas}, ensure_ascii=False, indent=2),
+            file_name="metricas_calcloc.json",
+            mime="application/json"
+        )
+        st.button("🧹 Zerar métricas", on_click=zerar_metricas)
@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calcloc import db  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco migrado num diretório temporário; conexao_db() aponta para ele durante o teste."""
+    caminho = str(tmp_path / "orcamentos.db")
+    db.configurar(caminho)
+    db.init_db()
+    yield caminho
+    db.configurar()
+
+
+PRODUTOS = ["Encerado", "Lonil de PVC", "Capota Marítima", "Acrylic", "Tela de Sombreamento 50%", "Vitro 0,40"]
+
+
+def _gerar_orcamentos(n, semente=7):
+    rnd = random.Random(semente)
+
+    def itens(maximo, preco_m2):
+        return [{
+            "produto": rnd.choice(PRODUTOS),
+            "comprimento": round(rnd.uniform(0.5, 60.0), 2),
+            "largura": round(rnd.uniform(0.5, 4.0), 2),
+            "quantidade": rnd.randint(1, 10),
+            "cor": "",
+            "preco_unitario": rnd.choice([preco_m2, round(rnd.uniform(5.0, 80.0), 2)]),
+        } for _ in range(rnd.randint(0, maximo))]
+
+    orcamentos = []
+    for _ in range(n):
+        preco_m2 = round(rnd.uniform(5.0, 80.0), 2)
+        orcamentos.append({
+            "cliente": {
+                "nome": "Cliente", "cnpj": "", "tipo_cliente": rnd.choice(["Revenda", "Consumidor Final"]),
+                "estado": rnd.choice(["SP", "RJ", "SC", "AM"]), "frete": "CIF",
+                "tipo_pedido": rnd.choice(["Direta", "Direta", "Industrialização"]),
+            },
+            "vendedor": {"nome": "Vendedor", "tel": "", "email": ""},
+            "itens_confeccionados": itens(4, preco_m2),
+            "itens_bobinas": itens(3, preco_m2),
+            "observacao": "",
+            "preco_m2_base": preco_m2,
+        })
+    return orcamentos
+
+
+@pytest.fixture(scope="session")
+def gerar_orcamentos():
+    """gerar_orcamentos(n, semente=7): n orçamentos aleatórios (reprodutíveis) no formato de salvar_orcamentos_em_lote."""
+    return _gerar_orcamentos
+
+
+@pytest.fixture
+def historico(banco, gerar_orcamentos):
+    """30 orçamentos: três clientes alternados, um por dia a partir de 01/03/2024."""
+    orcamentos = gerar_orcamentos(30)
+    clientes = [("Lonas Silva", "12.345.678/0001-90"), ("Transportes Souza", "98.765.432/0001-10"), ("Oficina Ótima", "")]
+    for i, orcamento in enumerate(orcamentos):
+        nome, cnpj = clientes[i % 3]
+        orcamento["cliente"] = dict(orcamento["cliente"], nome=nome, cnpj=cnpj)
+        orcamento["data_hora"] = datetime(2024, 3, 1 + i, 10, 30)
+        orcamento["observacao"] = "entrega urgente" if i == 7 else ""
+    return db.salvar_orcamentos_em_lote(orcamentos)
@@ -0,0 +1,123 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from calcloc import db
+from calcloc.api import criar_servidor
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    """Servidor da API numa porta livre, com banco temporário; retorna uma função (método, caminho, corpo) -> (status, JSON)."""
+    servidor = criar_servidor(porta=0, banco=str(tmp_path_factory.mktemp("api") / "orcamentos.db"), workers_pdf=1, silencioso=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    def requisitar(metodo, caminho, corpo=None):
+        conexao = http.client.HTTPConnection("127.0.0.1", servidor.server_address[1], timeout=30)
+        try:
+            conexao.request(metodo, caminho, body=corpo if isinstance(corpo, (str, type(None))) else json.dumps(corpo))
+            resposta = conexao.getresponse()
+            conteudo = resposta.read()
+        finally:
+            conexao.close()
+        return resposta.status, json.loads(conteudo) if resposta.getheader("Content-Type", "").startswith("application/json") else conteudo
+
+    requisitar.porta = servidor.server_address[1]
+    yield requisitar
+    servidor.shutdown()
+    servidor.server_close()
+    db.configurar()
+
+
+def corpo(preco_m2=20, **item):
+    return {
+        "cliente": {"nome": "Cliente", "estado": "SP", "tipo_cliente": "Revenda"},
+        "preco_m2": preco_m2,
+        "itens_confeccionados": [dict({"produto": "Encerado", "comprimento": 2, "largura": 3, "quantidade": 1}, **item)],
+    }
+
+
+def test_precificar(api):
+    status, dados = api("POST", "/precificar", corpo())
+    assert status == 200
+    assert dados["valor_final"] == round(120 * 1.0325 * 1.14, 2)
+
+
+@pytest.mark.parametrize("texto", [
+    '{"preco_m2": NaN, "itens_confeccionados": [{"produto": "Encerado", "comprimento": 2, "largura": 3, "quantidade": 1}]}',
+    '{"preco_m2": 20, "itens_confeccionados": [{"produto": "Encerado", "comprimento": Infinity, "largura": 3, "quantidade": 1}]}',
+    '{"preco_m2": 20, "itens_confeccionados": [{"produto": "Encerado", "comprimento": 2, "largura": 3, "quantidade": 1, "preco_unitario": -Infinity}]}',
+    json.dumps(corpo(preco_m2="nan")),
+    json.dumps(corpo(preco_unitario="inf")),
+])
+@pytest.mark.parametrize("rota", ["/precificar", "/orcamentos", "/pdf"])
+def test_rejeita_numeros_nao_finitos(api, rota, texto):
+    status, dados = api("POST", rota, texto)
+    assert status == 422
+    assert "não é um número válido" in dados["erro"]
+
+
+@pytest.mark.parametrize("dados_corpo, mensagem", [
+    (corpo(preco_m2=-20), "preco_m2 não pode ser negativo"),
+    (corpo(preco_unitario=-1), "preco_unitario não pode ser negativo"),
+    ({"preco_m2": 20, "itens_bobinas": [{"produto": "Vitro 0,40", "comprimento": 10, "largura": 1.4, "quantidade": 1, "espessura": -1}]},
+     "espessura deve ser maior que zero"),
+])
+def test_rejeita_valores_negativos(api, dados_corpo, mensagem):
+    status, dados = api("POST", "/orcamentos", dados_corpo)
+    assert status == 422
+    assert mensagem in dados["erro"]
+
+
+def test_valores_rejeitados_nao_sao_salvos(api):
+    antes = db.contar_orcamentos()
+    for dados_corpo in (corpo(preco_m2="nan"), corpo(preco_m2=-1), corpo(comprimento="inf")):
+        assert api("POST", "/orcamentos", dados_corpo)[0] == 422
+    assert db.contar_orcamentos() == antes
+
+
+def test_salvar_e_carregar(api):
+    status, salvo = api("POST", "/orcamentos", corpo(preco_unitario=25))
+    assert status == 201
+    status, dados = api("GET", f"/orcamentos/{salvo['id']}")
+    assert status == 200
+    assert dados["valor_final"] == salvo["valor_final"]
+    assert dados["itens_confeccionados"] == [
+        {"produto": "Encerado", "comprimento": 2, "largura": 3, "quantidade": 1, "cor": "", "preco_unitario": 25},
+    ]
+
+
+@pytest.mark.parametrize("metodo, caminho", [("POST", "/naoexiste"), ("POST", "/saude"), ("GET", "/saude")])
+def test_corpo_nao_usado_nao_corrompe_a_conexao(api, metodo, caminho):
+    conexao = http.client.HTTPConnection("127.0.0.1", api.porta, timeout=30)
+    try:
+        conexao.request(metodo, caminho, body=json.dumps(corpo()))
+        conexao.getresponse().read()
+        conexao.request("GET", "/saude")
+        resposta = conexao.getresponse()
+        assert (resposta.status, json.loads(resposta.read())) == (200, {"status": "ok"})
+    finally:
+        conexao.close()
+
+
+def test_corpo_grande_demais_fecha_a_conexao(api):
+    conexao = http.client.HTTPConnection("127.0.0.1", api.porta, timeout=30)
+    try:
+        conexao.putrequest("POST", "/precificar")
+        conexao.putheader("Content-Length", str(2 * 1024 * 1024))
+        conexao.endheaders()
+        resposta = conexao.getresponse()
+        resposta.read()
+        assert resposta.status == 413
+        assert resposta.will_close
+    finally:
+        conexao.close()
+
+
+@pytest.mark.parametrize("caminho", ["/orcamentos/99999999999999999999999", "/orcamentos/99999999999999999999999/pdf"])
+def test_id_fora_do_intervalo_do_sqlite(api, caminho):
+    status, dados = api("GET", caminho)
+    assert status == 404
+    assert "não encontrado" in dados["erro"]
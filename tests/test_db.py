@@ -0,0 +1,219 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from calcloc import db, instrumentacao
+
+
+def agregados(dimensao):
+    return {chave: (orcamentos, valor, m2) for chave, orcamentos, valor, m2 in db.buscar_agregados(dimensao)}
+
+
+def test_agregado_por_produto_soma_os_itens_de_cada_produto(banco):
+    orcamento_id = db.salvar_orcamento(
+        {"nome": "Cliente", "cnpj": "", "tipo_cliente": "Revenda", "estado": "SP", "frete": "CIF", "tipo_pedido": "Direta"},
+        {"nome": "Vendedor", "tel": "", "email": ""},
+        [{"produto": "Lonil KP", "comprimento": 2.0, "largura": 3.0, "quantidade": 1, "cor": "", "preco_unitario": 10.0}],
+        [{"produto": "Vitro 0,40", "comprimento": 10.0, "largura": 1.4, "quantidade": 2, "cor": "", "espessura": 0.4, "preco_unitario": 10.0}],
+        "", 10.0,
+    )
+    assert orcamento_id == 1
+    por_produto = agregados("produto")
+    assert por_produto["Lonil KP"] == (1, pytest.approx(60.0 * 1.0325), pytest.approx(6.0))
+    assert por_produto["Vitro 0,40"] == (1, pytest.approx(200.0 * 1.0975), pytest.approx(28.0))
+    # O orçamento inteiro continua em estado, vendedor e mês
+    assert agregados("estado")["SP"][1] == pytest.approx(60.0 * 1.0325 + 200.0 * 1.0975)
+
+
+def test_produtos_somam_o_valor_dos_orcamentos(banco, gerar_orcamentos):
+    db.salvar_orcamentos_em_lote(gerar_orcamentos(300))
+    total_produtos = sum(valor for _, valor, _ in agregados("produto").values())
+    total_estados = sum(valor for _, valor, _ in agregados("estado").values())
+    assert total_produtos == pytest.approx(total_estados)
+
+
+def test_area_e_a_mesma_em_todas_as_dimensoes(banco, gerar_orcamentos):
+    db.salvar_orcamentos_em_lote(gerar_orcamentos(300))
+    areas = {dimensao: sum(m2 for _, _, m2 in agregados(dimensao).values()) for dimensao in db.DIMENSOES_AGREGADOS}
+    assert areas["produto"] > 0
+    for dimensao, area in areas.items():
+        assert area == pytest.approx(areas["produto"]), dimensao
+
+
+def test_area_de_orcamento_so_com_bobinas(banco):
+    db.salvar_orcamento(
+        {"nome": "Cliente", "cnpj": "", "tipo_cliente": "Revenda", "estado": "RJ", "frete": "CIF", "tipo_pedido": "Direta"},
+        {"nome": "Vendedor", "tel": "", "email": ""},
+        [],
+        [{"produto": "Vitro 0,40", "comprimento": 10.0, "largura": 1.4, "quantidade": 2, "cor": "", "espessura": 0.4, "preco_unitario": 10.0}],
+        "", 10.0,
+    )
+    assert agregados("estado")["RJ"][2] == pytest.approx(28.0)
+    assert agregados("vendedor")["Vendedor"][2] == pytest.approx(28.0)
+
+
+def test_migracao_refaz_a_area_dos_agregados(banco, gerar_orcamentos):
+    db.salvar_orcamentos_em_lote(gerar_orcamentos(300))
+    esperado = {dimensao: agregados(dimensao) for dimensao in db.DIMENSOES_AGREGADOS}
+
+    # Banco na versão 9: estado, vendedor e mês com a área só dos confeccionados
+    conn = sqlite3.connect(banco)
+    conn.execute("UPDATE agregados_vendas SET m2_total = 0 WHERE dimensao != 'produto'")
+    conn.execute(f"PRAGMA user_version = {db.MIGRACOES.index(db._migracao_010_area_agregados)}")
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    for dimensao, linhas in esperado.items():
+        obtido = agregados(dimensao)
+        for chave, (orcamentos, valor, m2) in linhas.items():
+            assert obtido[chave] == (orcamentos, pytest.approx(valor), pytest.approx(m2))
+
+
+def test_migracao_refaz_os_agregados_por_produto(banco, gerar_orcamentos):
+    db.salvar_orcamentos_em_lote(gerar_orcamentos(300))
+    esperado = {dimensao: agregados(dimensao) for dimensao in db.DIMENSOES_AGREGADOS}
+
+    # Banco na versão anterior: sem orcamentos_produtos e com os agregados antigos
+    conn = sqlite3.connect(banco)
+    conn.execute("DROP TABLE orcamentos_produtos")
+    conn.execute("UPDATE agregados_vendas SET valor_final = 0, m2_total = 0, orcamentos = 0")
+    conn.execute(f"PRAGMA user_version = {db.MIGRACOES.index(db._migracao_009_produtos)}")
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    for dimensao, linhas in esperado.items():
+        obtido = agregados(dimensao)
+        assert obtido.keys() == linhas.keys()
+        for chave, (orcamentos, valor, m2) in linhas.items():
+            assert obtido[chave] == (orcamentos, pytest.approx(valor), pytest.approx(m2))
+
+
+@pytest.mark.parametrize("id_prefixo", ["1", "12", "1_", "%", "1%", "_"])
+def test_filtro_por_prefixo_do_id(banco, gerar_orcamentos, id_prefixo):
+    db.salvar_orcamentos_em_lote(gerar_orcamentos(150))
+    esperado = sorted(i for i in range(1, 151) if str(i).startswith(id_prefixo))
+    assert sorted(o[0] for o in db.buscar_orcamentos(id_prefixo=id_prefixo)) == esperado
+    assert db.contar_orcamentos(id_prefixo=id_prefixo) == len(esperado)
+
+
+def test_salvar_orcamento_e_medido_uma_vez(banco, gerar_orcamentos):
+    instrumentacao.ativar()
+    instrumentacao.iniciar_rodada()
+    try:
+        db.salvar_orcamentos_em_lote(gerar_orcamentos(1))
+        db.salvar_orcamento(
+            {"nome": "Cliente", "cnpj": "", "tipo_cliente": "Revenda", "estado": "SP", "frete": "CIF", "tipo_pedido": "Direta"},
+            {"nome": "Vendedor", "tel": "", "email": ""},
+            [{"produto": "Encerado", "comprimento": 2.0, "largura": 3.0, "quantidade": 1, "cor": "", "preco_unitario": 10.0}],
+            [], "", 10.0,
+        )
+        gravacoes = [nome for nome, _ in instrumentacao.registros_da_rodada() if nome.startswith("salvar_orcamento")]
+    finally:
+        instrumentacao.ativar(False)
+        instrumentacao.zerar()
+    assert gravacoes == ["salvar_orcamentos_em_lote", "salvar_orcamentos_em_lote"]
+
+
+# ============================
+# Histórico: filtros e paginação
+# ============================
+def test_paginacao_cobre_todos_os_orcamentos_uma_vez(historico):
+    paginas = [db.buscar_orcamentos(limit=7, offset=offset) for offset in range(0, 35, 7)]
+    assert [len(pagina) for pagina in paginas] == [7, 7, 7, 7, 2]
+    assert [o[0] for pagina in paginas for o in pagina] == sorted(historico, reverse=True)
+    assert db.contar_orcamentos() == 30
+    assert db.buscar_intervalo_datas() == (date(2024, 3, 1), date(2024, 3, 30))
+
+
+@pytest.mark.parametrize("filtros, esperado", [
+    ({"cliente": "Transportes Souza"}, {2, 5, 8, 11, 14, 17, 20, 23, 26, 29}),
+    ({"cliente": "Todos", "cnpj": "12.345.678/0001-90"}, {1, 4, 7, 10, 13, 16, 19, 22, 25, 28}),
+    ({"data_inicio": date(2024, 3, 5), "data_fim": date(2024, 3, 8)}, {5, 6, 7, 8}),
+    ({"cliente": "Oficina Ótima", "data_fim": date(2024, 3, 10)}, {3, 6, 9}),
+    ({"busca": "souza"}, {2, 5, 8, 11, 14, 17, 20, 23, 26, 29}),
+    ({"busca": "oficina otima"}, {3, 6, 9, 12, 15, 18, 21, 24, 27, 30}),
+    ({"busca": "12345678"}, {1, 4, 7, 10, 13, 16, 19, 22, 25, 28}),
+    ({"busca": "urg"}, {8}),
+    ({"busca": "lonas", "id_prefixo": "1"}, {1, 10, 13, 16, 19}),
+])
+def test_filtros_do_historico(historico, filtros, esperado):
+    assert {o[0] for o in db.buscar_orcamentos(**filtros)} == esperado
+    assert db.contar_orcamentos(**filtros) == len(esperado)
+
+
+def test_sugestao_de_clientes(historico):
+    assert db.sugerir_clientes("tra") == ["Transportes Souza"]
+    assert db.sugerir_clientes("") == []
+
+
+# ============================
+# Migrações
+# ============================
+def test_banco_novo_fica_na_ultima_versao(banco, capsys):
+    with db.conexao_db() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRACOES)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    db.init_db()
+    assert "Migração de DB" not in capsys.readouterr().out
+
+
+def test_banco_anterior_as_migracoes(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)
+    conn.executescript("""
+        CREATE TABLE orcamentos (id INTEGER PRIMARY KEY AUTOINCREMENT, data_hora TEXT, cliente_nome TEXT, cliente_cnpj TEXT,
+            tipo_cliente TEXT, estado TEXT, frete TEXT, tipo_pedido TEXT, vendedor_nome TEXT, vendedor_tel TEXT,
+            vendedor_email TEXT, observacao TEXT);
+        CREATE TABLE itens_confeccionados (id INTEGER PRIMARY KEY AUTOINCREMENT, orcamento_id INTEGER, produto TEXT,
+            comprimento REAL, largura REAL, quantidade INTEGER, cor TEXT);
+        CREATE TABLE itens_bobinas (id INTEGER PRIMARY KEY AUTOINCREMENT, orcamento_id INTEGER, produto TEXT,
+            comprimento REAL, largura REAL, quantidade INTEGER, cor TEXT);
+        INSERT INTO orcamentos VALUES (1, '15/02/2024 09:45', 'Cliente Antigo', '', 'Consumidor Final', 'SP', 'CIF',
+            'Direta', 'Vendedor', '', '', '');
+        INSERT INTO itens_confeccionados VALUES (1, 1, 'Encerado', 2.0, 3.0, 1, '');
+    """)
+    conn.commit()
+    conn.close()
+
+    db.configurar(caminho)
+    try:
+        db.init_db()
+        with db.conexao_db() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRACOES)
+            assert conn.execute("SELECT data_hora_iso FROM orcamentos").fetchone()[0] == "2024-02-15 09:45"
+            assert conn.execute("SELECT m2_total FROM orcamentos_totais").fetchone()[0] == pytest.approx(6.0)
+        assert [o[0] for o in db.buscar_orcamentos(busca="antigo", data_inicio=date(2024, 2, 15))] == [1]
+        assert agregados("mes")["2024-02"][0] == 1
+    finally:
+        db.configurar()
+
+
+# ============================
+# Cache de PDFs e pool de conexões
+# ============================
+def test_cache_de_pdfs_remove_os_menos_usados(banco, monkeypatch):
+    monkeypatch.setattr(db, "PDF_CACHE_MAX_BYTES", 250)
+    relogio = iter(range(100))
+    monkeypatch.setattr(db.time, "time", lambda: next(relogio))
+    db.salvar_pdf_cache(1, "a", b"1" * 100)
+    db.salvar_pdf_cache(2, "a", b"2" * 100)
+    assert db.buscar_pdf_cache(1, "a") == b"1" * 100  # renova o acesso ao 1
+    db.salvar_pdf_cache(3, "a", b"3" * 100)
+    assert db.buscar_pdf_cache(2, "a") is None
+    assert db.buscar_pdf_cache(1, "a") == b"1" * 100
+    assert db.buscar_pdf_cache(3, "a") == b"3" * 100
+    assert db.buscar_pdf_cache(3, "outra chave") is None
+
+
+def test_conexao_volta_ao_pool_sem_transacao(banco):
+    with pytest.raises(RuntimeError):
+        with db.conexao_db() as conn:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM orcamentos")
+            raise RuntimeError
+    with db.conexao_db() as reaproveitada:
+        assert reaproveitada is conn
+        assert not reaproveitada.in_transaction
@@ -0,0 +1,69 @@
+import io
+import time
+import zipfile
+from datetime import date
+
+import pytest
+from openpyxl import load_workbook
+
+from calcloc import db, jobs
+from calcloc.exportacao import COLUNAS_RESUMO, exportar_resumo
+
+FILTROS = {"cliente": "Transportes Souza", "data_inicio": date(2024, 3, 10)}
+IDS_FILTRADOS = [29, 26, 23, 20, 17, 14, 11]
+
+
+def test_csv(historico):
+    destino = io.BytesIO()
+    assert exportar_resumo(db.iterar_resumo_orcamentos(FILTROS, tamanho_lote=3), destino, "csv") == len(IDS_FILTRADOS)
+    cabecalho, *linhas = destino.getvalue().decode("utf-8-sig").splitlines()
+    assert cabecalho.split(";") == COLUNAS_RESUMO
+    assert [int(linha.split(";")[0]) for linha in linhas] == IDS_FILTRADOS
+    valores = db.carregar_totais_por_ids(IDS_FILTRADOS)
+    for linha in linhas:
+        campos = linha.split(";")
+        assert campos[1] == "Transportes Souza"
+        assert campos[-1] == f"{valores[int(campos[0])]:.2f}".replace(".", ",")
+
+
+def test_xlsx(historico):
+    destino = io.BytesIO()
+    assert exportar_resumo(db.iterar_resumo_orcamentos(FILTROS), destino, "xlsx") == len(IDS_FILTRADOS)
+    cabecalho, *linhas = load_workbook(destino, read_only=True).active.iter_rows(values_only=True)
+    assert list(cabecalho) == COLUNAS_RESUMO
+    assert [linha[0] for linha in linhas] == IDS_FILTRADOS
+    valores = db.carregar_totais_por_ids(IDS_FILTRADOS)
+    assert [linha[-1] for linha in linhas] == [round(valores[i], 2) for i in IDS_FILTRADOS]
+
+
+def test_formato_desconhecido():
+    with pytest.raises(ValueError):
+        exportar_resumo([], io.BytesIO(), "ods")
+
+
+def aguardar_job(job_id, limite=60):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        job = next(j for j in jobs.listar_jobs() if j[0] == job_id)
+        if job[2] in ("concluido", "erro"):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"Tarefa {job_id} não terminou")
+
+
+def test_job_de_exportacao(historico, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path / "exportacoes"))
+    job_id = jobs.enfileirar_job("exportacao", jobs.parametros_job(FILTROS, formato="csv"), "resumo.csv", "text/csv", len(IDS_FILTRADOS))
+    _, _, status, progresso, total, _, _, arquivo, erro, _ = aguardar_job(job_id)
+    assert (status, erro, progresso, total) == ("concluido", None, len(IDS_FILTRADOS), len(IDS_FILTRADOS))
+    linhas = jobs.ler_arquivo_job(arquivo).decode("utf-8-sig").splitlines()
+    assert [int(linha.split(";")[0]) for linha in linhas[1:]] == IDS_FILTRADOS
+
+
+def test_job_de_pdfs_zip(historico, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path / "exportacoes"))
+    job_id = jobs.enfileirar_job("pdf_zip", jobs.parametros_job(FILTROS), "orcamentos_pdf.zip", "application/zip", len(IDS_FILTRADOS))
+    _, _, status, _, _, _, _, arquivo, erro, _ = aguardar_job(job_id)
+    assert (status, erro) == ("concluido", None)
+    with zipfile.ZipFile(arquivo) as zf:
+        assert zf.namelist() == [f"orcamento_{i}.pdf" for i in IDS_FILTRADOS]
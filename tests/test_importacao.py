@@ -0,0 +1,84 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from calcloc import db
+from calcloc.catalogo import FUSO_HORARIO
+from calcloc.importacao import main, montar_orcamentos
+
+
+def linha(**valores):
+    base = {
+        "orcamento": "A", "cliente_nome": "Cliente", "estado": "SP", "preco_m2": "20",
+        "produto": "Lonil KP", "comprimento": "2", "largura": "3", "quantidade": "1",
+    }
+    base.update(valores)
+    return base
+
+
+def test_linha_valida():
+    [(chave, orcamento)] = montar_orcamentos([linha(preco_m2="20,5", preco_unitario="")])
+    assert chave == "A"
+    assert orcamento["preco_m2_base"] == 20.5
+    assert orcamento["itens_confeccionados"][0]["preco_unitario"] == 20.5
+
+
+@pytest.mark.parametrize("coluna", ["preco_m2", "comprimento", "largura", "quantidade", "preco_unitario"])
+@pytest.mark.parametrize("valor", ["nan", "NaN", "inf", "-inf", "Infinity", math.nan, math.inf])
+def test_rejeita_numeros_nao_finitos(coluna, valor):
+    with pytest.raises(ValueError, match="não é um número válido"):
+        montar_orcamentos([linha(**{coluna: valor})])
+
+
+def test_rejeita_espessura_nao_finita():
+    with pytest.raises(ValueError, match="não é um número válido"):
+        montar_orcamentos([linha(tipo="Bobina", produto="Vitro 0,40", espessura="nan")])
+
+
+@pytest.mark.parametrize("valores, mensagem", [
+    ({"preco_m2": "-1"}, "preco_m2 não pode ser negativo"),
+    ({"preco_unitario": "-0,01"}, "preco_unitario não pode ser negativo"),
+    ({"tipo": "Bobina", "produto": "Vitro 0,40", "espessura": "0"}, "espessura deve ser maior que zero"),
+    ({"tipo": "Bobina", "produto": "Vitro 0,40", "espessura": "-0,4"}, "espessura deve ser maior que zero"),
+])
+def test_rejeita_precos_negativos_e_espessura_invalida(valores, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        montar_orcamentos([linha(**valores)])
+
+
+def test_rejeita_data_no_futuro():
+    amanha = datetime.now(FUSO_HORARIO) + timedelta(days=1)
+    with pytest.raises(ValueError, match="está no futuro"):
+        montar_orcamentos([linha(data_hora=amanha.strftime(db.DATA_HORA_FMT))])
+    with pytest.raises(ValueError, match="está no futuro"):
+        montar_orcamentos([linha(data_hora=amanha.replace(tzinfo=None))])
+    [(_, orcamento)] = montar_orcamentos([linha(data_hora="01/02/2024 10:30")])
+    assert orcamento["data_hora"] == datetime(2024, 2, 1, 10, 30)
+
+
+def test_erros_de_todas_as_linhas():
+    with pytest.raises(ValueError) as erro:
+        montar_orcamentos([linha(preco_m2="nan"), linha(orcamento="B", comprimento="-1")])
+    assert "linha 2:" in str(erro.value) and "linha 3:" in str(erro.value)
+
+
+def test_main_informa_erro_do_banco(tmp_path, capsys):
+    planilha = tmp_path / "planilha.csv"
+    planilha.write_text("orcamento;preco_m2;produto;comprimento;largura;quantidade\nA;20;Lonil KP;2;3;1\n", encoding="utf-8")
+    try:
+        assert main([str(planilha), "--banco", str(tmp_path / "nao_existe" / "orcamentos.db")]) == 1
+    finally:
+        db.configurar()
+    assert "ERRO ao salvar" in capsys.readouterr().err
+
+
+def test_main_salva_os_orcamentos(tmp_path, capsys):
+    planilha = tmp_path / "planilha.csv"
+    planilha.write_text("orcamento;preco_m2;produto;comprimento;largura;quantidade\nA;20;Lonil KP;2;3;1\n", encoding="utf-8")
+    try:
+        assert main([str(planilha), "--banco", str(tmp_path / "orcamentos.db")]) == 0
+        assert db.contar_orcamentos() == 1
+    finally:
+        db.configurar()
+    assert "1 orçamento(s) salvo(s)" in capsys.readouterr().out
@@ -0,0 +1,68 @@
+import io
+import os
+import sys
+import types
+import zipfile
+
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+
+from calcloc import jobs, lote_pdf
+from calcloc.importacao import args_pdf, precificar
+
+
+@pytest.fixture
+def pool():
+    yield lote_pdf.pool_pdf(1)
+    lote_pdf.encerrar_pool_pdf()
+
+
+def tarefas(n):
+    orcamento = {
+        "cliente": {"nome": "Cliente", "cnpj": "", "tipo_cliente": "Revenda", "estado": "SP", "frete": "CIF", "tipo_pedido": "Direta"},
+        "vendedor": {"nome": "Vendedor", "tel": "", "email": ""},
+        "observacao": "",
+        "preco_m2_base": 20.0,
+        "itens_confeccionados": [{"produto": "Encerado", "comprimento": 2.0, "largura": 3.0, "quantidade": 1, "cor": "", "preco_unitario": 20.0}],
+        "itens_bobinas": [],
+    }
+    return [(f"orcamento_{i}.pdf", args_pdf(i, orcamento, *precificar(orcamento))) for i in range(1, n + 1)]
+
+
+def test_exporta_os_pdfs_em_ordem(pool):
+    destino = io.BytesIO()
+    assert lote_pdf.exportar_pdfs_zip(tarefas(3), destino) == 3
+    with zipfile.ZipFile(destino) as zf:
+        assert zf.namelist() == ["orcamento_1.pdf", "orcamento_2.pdf", "orcamento_3.pdf"]
+        assert all(zf.read(nome).startswith(b"%PDF") for nome in zf.namelist())
+
+
+def test_pool_e_criado_sob_demanda(banco):
+    # O app chama executor_jobs() a cada rerun: os workers só nascem no primeiro PDF
+    lote_pdf.encerrar_pool_pdf()
+    jobs.executor_jobs()
+    assert lote_pdf._pool is None
+
+
+def test_workers_nao_reexecutam_o_main(pool, tmp_path, monkeypatch):
+    # Como sob o Streamlit: __main__ é um script que não deve rodar nos workers
+    marcador = tmp_path / "executado"
+    script = tmp_path / "app.py"
+    script.write_text(f"open({str(marcador)!r}, 'w').close()\n")
+    principal = types.ModuleType("__main__")
+    principal.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, "__main__", principal)
+
+    assert [nome for nome, _ in lote_pdf.renderizar_pdfs(tarefas(2))] == ["orcamento_1.pdf", "orcamento_2.pdf"]
+    assert not marcador.exists()
+    assert sys.modules["__main__"] is principal
+
+
+def test_pool_quebrado_e_substituido(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os._exit, 1).result()
+    with pytest.raises(BrokenProcessPool):
+        list(lote_pdf.renderizar_pdfs(tarefas(1)))
+    novo = lote_pdf.pool_pdf()
+    assert novo is not pool
+    assert [nome for nome, _ in lote_pdf.renderizar_pdfs(tarefas(1))] == ["orcamento_1.pdf"]
@@ -0,0 +1,20 @@
+from calcloc import db
+from calcloc.pdf import gerar_pdf, gerar_pdf_orcamento_salvo
+
+
+def test_pdf_do_historico_vem_do_cache(historico):
+    renderizados = []
+
+    def renderizar(args_pdf):
+        renderizados.append(args_pdf["orcamento_id"])
+        return gerar_pdf(**args_pdf)
+
+    orc, confecc, bob = db.carregar_orcamento_por_id(historico[0])
+    primeiro = gerar_pdf_orcamento_salvo(orc, confecc, bob, renderizar=renderizar)
+    assert primeiro.startswith(b"%PDF")
+    assert gerar_pdf_orcamento_salvo(orc, confecc, bob, renderizar=renderizar) == primeiro
+    assert renderizados == [orc[0]]
+
+    # Entradas diferentes (ex.: observação editada) geram outra chave e outro PDF
+    gerar_pdf_orcamento_salvo((*orc[:11], "nova observação", *orc[12:]), confecc, bob, renderizar=renderizar)
+    assert renderizados == [orc[0], orc[0]]
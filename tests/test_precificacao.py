@@ -0,0 +1,45 @@
+import pytest
+
+from calcloc import db
+from calcloc.lote_precificacao import calcular_lote_bobinas, calcular_lote_confeccionados, lote_de_itens
+from calcloc.precificacao import calcular_valores_bobinas, calcular_valores_confeccionados
+
+def valor_exibido(orcamento):
+    cliente = orcamento["cliente"]
+    conf = calcular_valores_confeccionados(
+        orcamento["itens_confeccionados"], orcamento["preco_m2_base"], cliente["tipo_cliente"], cliente["estado"], cliente["tipo_pedido"]
+    )
+    bob = calcular_valores_bobinas(orcamento["itens_bobinas"], orcamento["preco_m2_base"], cliente["tipo_pedido"])
+    return conf[3] + bob[3]
+
+
+@pytest.mark.parametrize("semente", range(200))
+def test_calculo_vetorizado_igual_ao_por_item(gerar_orcamentos, semente):
+    orcamento = gerar_orcamentos(1, semente)[0]
+    cliente = orcamento["cliente"]
+    args_conf = (orcamento["preco_m2_base"], cliente["tipo_cliente"], cliente["estado"], cliente["tipo_pedido"])
+    assert calcular_lote_confeccionados(lote_de_itens(orcamento["itens_confeccionados"]), *args_conf) == pytest.approx(
+        calcular_valores_confeccionados(orcamento["itens_confeccionados"], *args_conf)
+    )
+    args_bob = (orcamento["preco_m2_base"], cliente["tipo_pedido"])
+    assert calcular_lote_bobinas(lote_de_itens(orcamento["itens_bobinas"]), *args_bob) == pytest.approx(
+        calcular_valores_bobinas(orcamento["itens_bobinas"], *args_bob)
+    )
+
+
+def test_total_gravado_igual_ao_exibido(banco, gerar_orcamentos):
+    orcamentos = gerar_orcamentos(200)
+    ids = db.salvar_orcamentos_em_lote(orcamentos)
+    gravados = db.carregar_totais_por_ids(ids)
+    for orcamento_id, orcamento in zip(ids, orcamentos):
+        assert gravados[orcamento_id] == valor_exibido(orcamento)
+
+
+def test_preenchimento_em_lote_igual_ao_gravado(banco, gerar_orcamentos):
+    ids = db.salvar_orcamentos_em_lote(gerar_orcamentos(200))
+    with db.conexao_db() as conn:
+        gravados = {row[0]: row for row in conn.execute("SELECT * FROM orcamentos_totais")}
+        em_lote = db._totais_em_lote(conn, ids)
+    for linha in em_lote:
+        assert linha[1:7] == pytest.approx(gravados[linha[0]][1:7])
+        assert linha[7:] == gravados[linha[0]][7:]